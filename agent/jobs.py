@@ -0,0 +1,399 @@
+# agent/jobs.py
+
+import hashlib
+import logging
+import queue
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set
+from utils import serialization
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+EXPIRED = "expired"
+
+FINISHED_STATUSES = {SUCCEEDED, FAILED, CANCELLED, EXPIRED}
+
+class JobQueueFull(Exception):
+    """Raised when a job is submitted while the queue is at capacity."""
+
+class JobCancelled(Exception):
+    """Raised inside a running job once it has been cancelled or has passed its deadline."""
+
+class Job:
+    """A unit of background work (a research query or a page scrape) and its progress."""
+    
+    def __init__(self, kind: str, params: Dict[str, Any], key: str, deadline: Optional[float] = None):
+        """
+        Initialize the Job.
+        
+        Args:
+            kind: Name of the runner that executes the job
+            params: JSON-serializable runner parameters
+            key: Deduplication key; identical in-flight submissions share one job
+            deadline: Seconds from submission after which the job is abandoned
+        """
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.params = params
+        self.key = key
+        self.status = QUEUED
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.deadline_at = self.created_at + deadline if deadline is not None else None
+        self.events: List[Dict[str, Any]] = []
+        self._cancel_requested = False
+        self._condition = threading.Condition()
+    
+    @property
+    def done(self) -> bool:
+        return self.status in FINISHED_STATUSES
+    
+    def expired(self) -> bool:
+        return self.deadline_at is not None and time.time() >= self.deadline_at
+    
+    def cancel(self) -> bool:
+        """
+        Request cancellation.
+        
+        A queued job is cancelled immediately; a running job stops at its next
+        check(). Cancelling a finished job has no effect.
+        
+        Returns:
+            True if the job was still queued or running
+        """
+        with self._condition:
+            if self.done:
+                return False
+            self._cancel_requested = True
+            if self.status == QUEUED:
+                self._finish(CANCELLED, error="Cancelled before start")
+            return True
+    
+    def check(self):
+        """Raise JobCancelled if the job has been cancelled or has run past its deadline; runners call this between steps."""
+        if self._cancel_requested:
+            raise JobCancelled("Cancelled")
+        if self.expired():
+            raise JobCancelled("Deadline exceeded")
+    
+    def emit(self, event: Dict[str, Any]):
+        """Record a progress event and wake up subscribers."""
+        with self._condition:
+            self.events.append(event)
+            self._condition.notify_all()
+    
+    def iter_events(self, timeout: Optional[float] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Yield the job's progress events, waiting for new ones until the job finishes.
+        
+        Args:
+            timeout: Seconds to wait overall before giving up
+        """
+        give_up_at = time.monotonic() + timeout if timeout is not None else None
+        position = 0
+        while True:
+            with self._condition:
+                while position >= len(self.events) and not self.done:
+                    remaining = give_up_at - time.monotonic() if give_up_at is not None else None
+                    if remaining is not None and remaining <= 0:
+                        return
+                    self._condition.wait(remaining)
+                pending = self.events[position:]
+                finished = self.done
+            yield from pending
+            position += len(pending)
+            if finished and position >= len(self.events):
+                return
+    
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until the job finishes; returns False on timeout."""
+        with self._condition:
+            return self._condition.wait_for(lambda: self.done, timeout)
+    
+    def _start(self) -> bool:
+        with self._condition:
+            if self.done:
+                return False
+            if self.expired():
+                self._finish(EXPIRED, error="Deadline exceeded before start")
+                return False
+            self.status = RUNNING
+            self.started_at = time.time()
+            return True
+    
+    def _finish(self, status: str, result: Any = None, error: Optional[str] = None):
+        with self._condition:
+            self.status = status
+            self.result = result
+            self.error = error
+            self.finished_at = time.time()
+            self._condition.notify_all()
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "params": self.params,
+            "status": self.status,
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "deadline_at": self.deadline_at
+        }
+
+class JobStore:
+    """SQLite record of jobs, so results outlive the in-memory queue and survive restarts."""
+    
+    def __init__(self, path: str = ":memory:"):
+        """
+        Initialize the JobStore.
+        
+        Args:
+            path: Database file path (":memory:" for a private in-memory database)
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "id TEXT PRIMARY KEY, kind TEXT NOT NULL, status TEXT NOT NULL, record TEXT NOT NULL, "
+                "updated_at REAL NOT NULL)"
+            )
+            # Jobs that were queued or running when the previous process stopped will never finish
+            for job_id, record in self._conn.execute(
+                    "SELECT id, record FROM jobs WHERE status IN (?, ?)", (QUEUED, RUNNING)).fetchall():
+                record = serialization.loads(record)
+                record.update(status=FAILED, error="Interrupted by restart", finished_at=time.time())
+                self._conn.execute("UPDATE jobs SET status = ?, record = ?, updated_at = ? WHERE id = ?",
+                                   (FAILED, serialization.dumps_text(record), time.time(), job_id))
+    
+    def save(self, job: Job):
+        record = job.to_dict()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO jobs (id, kind, status, record, updated_at) VALUES (?, ?, ?, ?, ?)",
+                (job.id, job.kind, record["status"], serialization.dumps_text(record), time.time())
+            )
+    
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute("SELECT record FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return serialization.loads(row[0]) if row else None
+    
+    def purge(self, older_than: float) -> int:
+        """Delete finished jobs last updated more than older_than seconds ago, returning how many were removed."""
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "DELETE FROM jobs WHERE status NOT IN (?, ?) AND updated_at < ?",
+                (QUEUED, RUNNING, time.time() - older_than)
+            )
+            return cursor.rowcount
+    
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+class JobQueue:
+    """
+    Bounded in-process queue of background jobs served by a pool of worker threads.
+    
+    Submitting returns a Job immediately; callers poll it, wait on it or
+    subscribe to its events. Identical submissions (same kind and
+    parameters) made while a matching job is queued or running share that
+    job instead of doing the work twice.
+    """
+    
+    def __init__(self, runners: Dict[str, Callable[[Job], Any]], max_workers: int = 4, max_queued: int = 100,
+                 store: Optional[JobStore] = None, default_deadline: Optional[float] = None,
+                 max_finished: int = 1000):
+        """
+        Initialize the JobQueue.
+        
+        Args:
+            runners: {kind: callable(job) -> result}; runners should call job.check() between steps
+            max_workers: Number of worker threads
+            max_queued: Jobs waiting to start before submissions are rejected with JobQueueFull
+            store: Optional JobStore recording every job
+            default_deadline: Deadline in seconds for jobs submitted without one
+            max_finished: Finished jobs kept in memory (older ones remain readable from the store)
+        """
+        self.runners = dict(runners)
+        self.max_workers = max(1, max_workers)
+        self.store = store
+        self.default_deadline = default_deadline
+        self.max_queued = max_queued
+        self.max_finished = max_finished
+        self.deduplicated = 0
+        self.logger = logging.getLogger(__name__)
+        self._queue: "queue.Queue[Optional[Job]]" = queue.Queue()
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._inflight: Dict[str, Job] = {}
+        # Ids of jobs waiting to start; cancelled ones leave at once even though the queue still holds them
+        self._waiting: Set[str] = set()
+        self._lock = threading.Lock()
+        self._closed = False
+        self._workers = [threading.Thread(target=self._work, name=f"job-worker-{i}", daemon=True)
+                         for i in range(self.max_workers)]
+        for worker in self._workers:
+            worker.start()
+    
+    @staticmethod
+    def make_key(kind: str, params: Dict[str, Any]) -> str:
+        """Deduplication key: the kind plus the parameters with whitespace normalized."""
+        normalized = {name: " ".join(value.split()) if isinstance(value, str) else value
+                      for name, value in params.items()}
+        if isinstance(normalized.get("query"), str):
+            normalized["query"] = normalized["query"].lower()
+        return hashlib.sha1(serialization.dumps([kind, normalized], sort_keys=True)).hexdigest()
+    
+    def submit(self, kind: str, params: Dict[str, Any], deadline: Optional[float] = None) -> Job:
+        """
+        Queue a job, or return the matching in-flight job.
+        
+        Args:
+            kind: Runner name
+            params: Runner parameters
+            deadline: Seconds the job may take from submission to completion
+        
+        Returns:
+            The queued (or shared in-flight) Job
+        
+        Raises:
+            KeyError: If no runner is registered for kind
+            JobQueueFull: If the queue is at capacity
+        """
+        if kind not in self.runners:
+            raise KeyError(f"Unknown job kind: {kind}")
+        key = self.make_key(kind, params)
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Job queue is closed")
+            existing = self._inflight.get(key)
+            if existing is not None and not (existing.done or existing._cancel_requested or existing.expired()):
+                self.deduplicated += 1
+                return existing
+            if len(self._waiting) >= self.max_queued:
+                raise JobQueueFull(f"Job queue is full ({self.max_queued} waiting)")
+            job = Job(kind, params, key, deadline if deadline is not None else self.default_deadline)
+            self._queue.put_nowait(job)
+            self._waiting.add(job.id)
+            self._inflight[key] = job
+            self._jobs[job.id] = job
+            self._trim()
+        self._save(job)
+        return job
+    
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+    
+    def status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Current record of a job, falling back to the store for jobs no longer held in memory."""
+        job = self.get(job_id)
+        if job is not None:
+            return job.to_dict()
+        return self.store.get(job_id) if self.store is not None else None
+    
+    def cancel(self, job_id: str) -> bool:
+        """
+        Cancel a queued or running job; returns False if it is unknown or already finished.
+        
+        The job stops sharing its key at once, so a resubmission starts a new
+        job instead of joining one that is about to stop.
+        """
+        job = self.get(job_id)
+        if job is None or not job.cancel():
+            return False
+        self._release(job)
+        return True
+    
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            counts = {status: 0 for status in (QUEUED, RUNNING) | FINISHED_STATUSES}
+            for job in self._jobs.values():
+                counts[job.status] += 1
+        counts["deduplicated"] = self.deduplicated
+        return counts
+    
+    def _work(self):
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            with self._lock:
+                self._waiting.discard(job.id)
+            try:
+                self._run(job)
+            except Exception as e:
+                self.logger.error(f"Job {job.id} crashed: {e}")
+    
+    def _run(self, job: Job):
+        if not job._start():
+            self._release(job)
+            return
+        self._save(job)
+        try:
+            result = self.runners[job.kind](job)
+            job.check()
+        except JobCancelled as e:
+            job._finish(EXPIRED if job.expired() and not job._cancel_requested else CANCELLED, error=str(e))
+        except Exception as e:
+            self.logger.warning(f"Job {job.id} ({job.kind}) failed: {e}")
+            job._finish(FAILED, error=str(e))
+        else:
+            job._finish(SUCCEEDED, result=result)
+        self._release(job)
+    
+    def _release(self, job: Job):
+        with self._lock:
+            if self._inflight.get(job.key) is job:
+                del self._inflight[job.key]
+            if job.done:
+                self._waiting.discard(job.id)
+        self._save(job)
+    
+    def _trim(self):
+        """Forget the oldest finished jobs beyond max_finished (caller holds the lock)."""
+        finished = sum(1 for job in self._jobs.values() if job.done)
+        for job_id in list(self._jobs):
+            if finished <= self.max_finished:
+                break
+            if self._jobs[job_id].done:
+                del self._jobs[job_id]
+                finished -= 1
+    
+    def _save(self, job: Job):
+        if self.store is not None:
+            try:
+                self.store.save(job)
+            except Exception as e:
+                self.logger.warning(f"Saving job {job.id} failed: {e}")
+    
+    def close(self, wait: bool = True):
+        """Cancel queued jobs and stop the workers once running jobs finish."""
+        with self._lock:
+            self._closed = True
+            jobs = list(self._jobs.values())
+        for job in jobs:
+            if job.status == QUEUED:
+                job.cancel()
+                self._release(job)
+        for _ in self._workers:
+            self._queue.put(None)
+        if wait:
+            for worker in self._workers:
+                worker.join()
@@ -1,30 +1,127 @@
 # agent/research_agent.py
 
-from tools.web_search import WebSearchTool
-from tools.web_scraper import WebScraper
+from tools.web_search import WebSearchTool, SearchResult
+from tools.search_cache import SearchResultCache
+from tools.search_providers import CorpusSearchProvider
+from tools.web_scraper import WebScraper, ScrapedContent
+from tools.page_cache import PageCache
+from tools.analysis_pool import AnalysisPool
+from tools.corpus import Corpus
 from tools.content_analyzer import ContentAnalyzer
+from tools.near_duplicates import NearDuplicateDetector
 from tools.news_aggregator import NewsAggregator
-from utils.helpers import QueryAnalyzer, generate_report
+from utils.helpers import IncrementalReport, QueryAnalyzer, generate_report
+from utils.http_client import HttpClient
+from utils.async_http_client import AsyncHttpClient
+from concurrent.futures import Future, ThreadPoolExecutor, wait, FIRST_COMPLETED
+import asyncio
 import logging
-from typing import List, Dict, Any
+import time
+from typing import AsyncIterator, Iterator, List, Dict, Any, Optional, Tuple
+
+async def _next_page(pages: AsyncIterator[List[SearchResult]]) -> Optional[List[SearchResult]]:
+    """Next page from an async page iterator, or None once it is exhausted."""
+    try:
+        return await pages.__anext__()
+    except StopAsyncIteration:
+        return None
+
+class _ResearchStream:
+    """State shared by iter_research and aiter_research while sources arrive in completion order."""
+    
+    def __init__(self, agent: "WebResearchAgent", query: str, search_results: List[SearchResult]):
+        self.agent = agent
+        self.query = query
+        self.search_results = search_results
+        self.report = IncrementalReport(query)
+        self.duplicates = agent.duplicate_detector.index() if agent.duplicate_detector is not None else None
+        self.contents: Dict[int, ScrapedContent] = {}
+        self.merged: Dict[int, List[Dict[str, Any]]] = {}
+    
+    def source_event(self, index: int, content: ScrapedContent,
+                     analysis: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Event for a scraped page: a duplicate notice, or the page's analysis (computed here if needed)."""
+        result = self.search_results[index]
+        if self.duplicates is not None:
+            match = self.duplicates.add(index, content)
+            if match is not None:
+                kept, similarity = match
+                self.merged.setdefault(kept, []).append({"url": result.url, "similarity": similarity})
+                return {"event": "duplicate", "data": {"url": result.url, "duplicate_of": self.search_results[kept].url,
+                                                       "similarity": similarity}}
+        if analysis is None:
+            analysis = self.agent.analyzer.analyze_content(content, self.query)
+        source = {"url": result.url, "title": result.title, "analysis": analysis}
+        self.agent._remember_analyses([(content, source)], self.query)
+        self.contents[index] = content
+        self.report.add_analysis(source)
+        return {"event": "source", "data": source}
+    
+    def news_event(self, news_articles: List[Any]) -> Dict[str, Any]:
+        self.report.add_news(news_articles)
+        return {"event": "news", "data": [article.to_dict() for article in news_articles]}
+    
+    def final_events(self) -> Iterator[Dict[str, Any]]:
+        """Contradictions across the distinct sources, then the finished report."""
+        contradictions = self.agent.analyzer.find_contradictions([self.contents[i] for i in sorted(self.contents)])
+        self.report.set_contradictions(contradictions)
+        yield {"event": "contradictions", "data": contradictions}
+        self.report.set_duplicates([{"url": self.search_results[kept].url, "merged": merged}
+                                    for kept, merged in sorted(self.merged.items())])
+        yield {"event": "report", "data": self.report.to_dict()}
 
 class WebResearchAgent:
     """Web Research Agent for automated research and report generation."""
     
-    def __init__(self, use_mock: bool = True, max_results: int = 5):
+    def __init__(self, use_mock: bool = True, max_results: int = 5, concurrent: bool = False,
+                 max_workers: int = 5, url_timeout: Optional[float] = 15.0,
+                 deadline: Optional[float] = None, http_client: Optional[HttpClient] = None,
+                 async_http_client: Optional[AsyncHttpClient] = None,
+                 search_cache: Optional[SearchResultCache] = None,
+                 page_cache: Optional[PageCache] = None,
+                 analysis_pool: Optional[AnalysisPool] = None,
+                 duplicate_threshold: Optional[float] = 0.9, corpus: Optional[Corpus] = None,
+                 corpus_mode: str = "augment"):
         """
         Initialize the agent with tools.
         
         Args:
             use_mock: Whether to use mock data for testing
             max_results: Maximum number of search results to process
+            concurrent: Whether to scrape and analyze search results in parallel
+            max_workers: Number of worker threads used in concurrent mode
+            url_timeout: Seconds a single URL may take to scrape and analyze in concurrent mode
+            deadline: Overall seconds allowed for the scrape-and-analyze step in concurrent mode
+            http_client: Shared HTTP transport for the search, scraping and news tools
+            async_http_client: Shared asyncio HTTP transport used by aresearch
+            search_cache: Optional cache for web search results
+            page_cache: Optional cache of downloaded and parsed pages
+            analysis_pool: Optional process pool that parses and analyzes pages off the main process
+            duplicate_threshold: Shingle similarity at which scraped pages are merged as near-duplicates (None disables)
+            corpus: Optional local store of scraped pages, reused instead of re-fetching and searched alongside the web
+            corpus_mode: "augment" adds matching stored pages to the web results; "prefer" skips the web search
+                when the corpus alone has max_results matching pages
         """
-        self.web_search = WebSearchTool(use_mock=use_mock)
-        self.scraper = WebScraper(use_mock=use_mock)
-        self.analyzer = ContentAnalyzer(use_mock=use_mock)
-        self.news_aggregator = NewsAggregator(use_mock=use_mock)
+        if corpus_mode not in ("augment", "prefer"):
+            raise ValueError(f"Unknown corpus mode: {corpus_mode}")
+        self.web_search = WebSearchTool(use_mock=use_mock, http_client=http_client,
+                                        async_http_client=async_http_client, cache=search_cache)
+        self.scraper = WebScraper(use_mock=use_mock, http_client=http_client,
+                                  async_http_client=async_http_client, page_cache=page_cache)
+        self.analyzer = ContentAnalyzer(use_mock=use_mock,
+                                        ranking_index=analysis_pool.ranking_index if analysis_pool is not None else None)
+        self.news_aggregator = NewsAggregator(use_mock=use_mock, http_client=http_client,
+                                              async_http_client=async_http_client)
         self.query_analyzer = QueryAnalyzer()
+        self.analysis_pool = analysis_pool
+        self.duplicate_detector = NearDuplicateDetector(duplicate_threshold) if duplicate_threshold is not None else None
+        self.corpus = corpus
+        self.corpus_mode = corpus_mode
         self.max_results = max_results
+        self.concurrent = concurrent
+        self.max_workers = max(1, max_workers)
+        self.url_timeout = url_timeout
+        self.deadline = deadline
         self.logger = logging.getLogger(__name__)
     
     def research(self, query: str, time_range: str = None) -> Dict[str, Any]:
@@ -34,7 +131,7 @@ class WebResearchAgent:
         Args:
             query: User research query
             time_range: Optional time range for news (e.g., "day", "week")
-            
+        
         Returns:
             Research report as a dictionary
         """
@@ -44,37 +141,24 @@ class WebResearchAgent:
             self.logger.info(f"Query analysis: {query_info}")
             
             # Step 2: Perform web search
-            search_results = self.web_search.search(
-                query_info["search_query"],
-                num_results=self.max_results,
-                time_range=time_range
-            )
+            search_results = self._search(query_info["search_query"], time_range)
             if not search_results:
                 self.logger.warning("No search results found.")
                 return {"error": "No results found for the query."}
             
-            # Step 3: Scrape and analyze content
-            scraped_contents = []
-            analyses = []
-            for result in search_results[:self.max_results]:
-                content = self.scraper.scrape_url(result.url)
-                if content:
-                    analysis = self.analyzer.test_content_analyzer(content, query)
-                    scraped_contents.append(content)
-                    analyses.append({
-                        "url": result.url,
-                        "title": result.title,
-                        "analysis": analysis
-                    })
+            # Step 3: Scrape and analyze content, merging near-duplicate pages
+            processed, duplicates = self._process_results(search_results, query)
+            self._remember_analyses(processed, query)
+            scraped_contents = [content for content, _ in processed]
+            analyses = [analysis for _, analysis in processed]
             
             # Step 4: Fetch news for time-sensitive queries
             news_articles = []
             if query_info["is_news_related"]:
                 news_articles = self.news_aggregator.fetch_news(
                     query_info["search_query"],
-                    time_range or "week",
-                    max_results=3
-                )
+                    num_articles=3
+                ) or []
             
             # Step 5: Check for contradictions
             contradictions = self.analyzer.find_contradictions(scraped_contents)
@@ -84,15 +168,595 @@ class WebResearchAgent:
                 query=query,
                 analyses=analyses,
                 news_articles=news_articles,
-                contradictions=contradictions
+                contradictions=contradictions,
+                duplicates=duplicates
             )
             
             self.logger.info("Research completed successfully.")
             return report
+        
+        except Exception as e:
+            self.logger.error(f"Research failed: {e}")
+            return {"error": str(e)}
+    
+    async def aresearch(self, query: str, time_range: str = None) -> Dict[str, Any]:
+        """
+        Asynchronous version of research().
+        
+        The news fetch starts alongside the web search, and all pages are
+        scraped concurrently (at most max_workers at a time) on the running
+        event loop, honouring url_timeout and deadline.
+        
+        Args:
+            query: User research query
+            time_range: Optional time range for news (e.g., "day", "week")
+        
+        Returns:
+            Research report as a dictionary
+        """
+        news_task = None
+        try:
+            query_info = self.query_analyzer.analyze(query)
+            self.logger.info(f"Query analysis: {query_info}")
+            
+            if query_info["is_news_related"]:
+                news_task = asyncio.ensure_future(
+                    self.news_aggregator.afetch_news(query_info["search_query"], num_articles=3)
+                )
+            
+            search_results = await self._asearch(query_info["search_query"], time_range)
+            if not search_results:
+                self.logger.warning("No search results found.")
+                return {"error": "No results found for the query."}
+            
+            processed, duplicates = await self._aprocess_results(search_results, query)
+            self._remember_analyses(processed, query)
+            scraped_contents = [content for content, _ in processed]
+            analyses = [analysis for _, analysis in processed]
+            
+            news_articles = []
+            if news_task is not None:
+                news_articles = await news_task or []
+            
+            contradictions = self.analyzer.find_contradictions(scraped_contents)
             
+            report = generate_report(
+                query=query,
+                analyses=analyses,
+                news_articles=news_articles,
+                contradictions=contradictions,
+                duplicates=duplicates
+            )
+            
+            self.logger.info("Research completed successfully.")
+            return report
+        
         except Exception as e:
             self.logger.error(f"Research failed: {e}")
             return {"error": str(e)}
+        
+        finally:
+            if news_task is not None and not news_task.done():
+                news_task.cancel()
+    
+    def iter_research(self, query: str, time_range: str = None) -> Iterator[Dict[str, Any]]:
+        """
+        Perform research, yielding partial results as soon as each is ready.
+        
+        Events are dicts of the form {"event": name, "data": payload}, in this order:
+        "query" (query analysis), "search" (search hits, once per page of
+        results), then "source" (one page's analysis) or "duplicate" (a page
+        merged into an earlier one) per page and "news" as they finish, then
+        "contradictions" and the final "report". Pages are scraped in parallel
+        (max_workers at a time) starting with the first page of search
+        results while later ones still load, and sources arrive in completion
+        order, so near-duplicates are merged into whichever copy finished
+        first. Pages missing the per-URL timeout or the overall deadline are
+        dropped. Failures yield an "error" event.
+        
+        Args:
+            query: User research query
+            time_range: Optional time range for news (e.g., "day", "week")
+        
+        Yields:
+            Research events
+        """
+        scrape_executor = io_executor = None
+        try:
+            query_info = self.query_analyzer.analyze(query)
+            yield {"event": "query", "data": query_info}
+            
+            pages = self._search_pages(query_info["search_query"], time_range)
+            first_page = next(pages, None)
+            if not first_page:
+                yield {"event": "error", "data": {"error": "No results found for the query."}}
+                return
+            
+            stream = _ResearchStream(self, query, [])
+            # Scrapes get max_workers threads of their own; the next search page and the news use separate ones
+            scrape_executor = ThreadPoolExecutor(max_workers=self.max_workers)
+            io_executor = ThreadPoolExecutor(max_workers=2)
+            futures: Dict[Future, Any] = {}
+            started_at: Dict[int, float] = {}
+            
+            def fetch(index: int, result: SearchResult):
+                started_at[index] = time.monotonic()
+                return self._fetch_for_stream(result, query)
+            
+            def add_page(page: List[SearchResult]):
+                """Start scraping a page of results and ask for the next page."""
+                for result in page:
+                    index = len(stream.search_results)
+                    futures[scrape_executor.submit(fetch, index, result)] = index
+                    stream.search_results.append(result)
+                futures[io_executor.submit(next, pages, None)] = "search"
+                return {"event": "search", "data": [result.to_dict() for result in page]}
+            
+            yield add_page(first_page)
+            if query_info["is_news_related"]:
+                futures[io_executor.submit(self.news_aggregator.fetch_news, query_info["search_query"], 3)] = None
+            
+            pending = set(futures)
+            deadline_at = time.monotonic() + self.deadline if self.deadline is not None else None
+            while pending:
+                scrapes = [future for future in pending if isinstance(futures[future], int)]
+                done, pending = wait(pending, timeout=self._next_wakeup(scrapes, futures, started_at, deadline_at),
+                                     return_when=FIRST_COMPLETED)
+                for future in done:
+                    index = futures[future]
+                    try:
+                        outcome = future.result()
+                    except Exception as e:
+                        name = {None: "news", "search": "search"}.get(index) or stream.search_results[index].url
+                        self.logger.warning(f"Processing {name} failed: {e}")
+                        continue
+                    if index == "search":
+                        if outcome:
+                            submitted = len(futures)
+                            yield add_page(outcome)
+                            pending.update(list(futures)[submitted:])
+                    elif index is None:
+                        yield stream.news_event(outcome or [])
+                    elif outcome:
+                        yield stream.source_event(index, *outcome)
+                
+                now = time.monotonic()
+                if deadline_at is not None and now >= deadline_at:
+                    self.logger.warning(f"Research deadline reached; dropping {len(pending)} unfinished task(s).")
+                    break
+                if self.url_timeout is not None:
+                    for future in list(pending):
+                        index = futures[future]
+                        if isinstance(index, int) and now - started_at.get(index, now) >= self.url_timeout:
+                            self.logger.warning(f"Timed out processing {stream.search_results[index].url}")
+                            pending.discard(future)
+            
+            yield from stream.final_events()
+            self.logger.info("Research completed successfully.")
+        
+        except Exception as e:
+            self.logger.error(f"Research failed: {e}")
+            yield {"event": "error", "data": {"error": str(e)}}
+        
+        finally:
+            for executor in (scrape_executor, io_executor):
+                if executor is not None:
+                    executor.shutdown(wait=False, cancel_futures=True)
+    
+    def _fetch_for_stream(self, result: SearchResult, query: str) -> Optional[Tuple[ScrapedContent, Optional[Dict[str, Any]]]]:
+        """Scrape a page for streaming; the analysis is included only when the process pool produces it alongside."""
+        stored = self._stored_page(result.url)
+        if stored is not None:
+            return stored, self._stored_analysis(stored, query)
+        if self.analysis_pool is not None:
+            html = self.scraper.fetch_html(result.url)
+            return self._remember_page(self.analysis_pool.analyze(result.url, html, query)) if html is not None else None
+        content = self._scrape_page(result.url, check_corpus=False)
+        return (content, None) if content else None
+    
+    async def aiter_research(self, query: str, time_range: str = None) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Asynchronous version of iter_research().
+        
+        Args:
+            query: User research query
+            time_range: Optional time range for news (e.g., "day", "week")
+        
+        Yields:
+            Research events
+        """
+        tasks: Dict[asyncio.Future, Any] = {}
+        try:
+            query_info = self.query_analyzer.analyze(query)
+            yield {"event": "query", "data": query_info}
+            
+            if query_info["is_news_related"]:
+                tasks[asyncio.ensure_future(
+                    self.news_aggregator.afetch_news(query_info["search_query"], num_articles=3)
+                )] = None
+            
+            pages = self._asearch_pages(query_info["search_query"], time_range)
+            first_page = await _next_page(pages)
+            if not first_page:
+                yield {"event": "error", "data": {"error": "No results found for the query."}}
+                return
+            
+            stream = _ResearchStream(self, query, [])
+            semaphore = asyncio.Semaphore(self.max_workers)
+            
+            async def fetch(result: SearchResult):
+                stored = self._stored_page(result.url)
+                if stored is not None:
+                    return stored, self._stored_analysis(stored, query)
+                async with semaphore:
+                    if self.analysis_pool is not None:
+                        html = await asyncio.wait_for(self.scraper.afetch_html(result.url), self.url_timeout)
+                        if html is None:
+                            return None
+                        return self._remember_page(await self.analysis_pool.aanalyze(result.url, html, query))
+                    content = await asyncio.wait_for(self._ascrape_page(result.url, check_corpus=False), self.url_timeout)
+                    return (content, None) if content else None
+            
+            def add_page(page: List[SearchResult]):
+                """Start scraping a page of results and ask for the next page."""
+                for result in page:
+                    tasks[asyncio.ensure_future(fetch(result))] = len(stream.search_results)
+                    stream.search_results.append(result)
+                tasks[asyncio.ensure_future(_next_page(pages))] = "search"
+                return {"event": "search", "data": [result.to_dict() for result in page]}
+            
+            yield add_page(first_page)
+            pending = set(tasks)
+            deadline_at = time.monotonic() + self.deadline if self.deadline is not None else None
+            while pending:
+                timeout = max(0.0, deadline_at - time.monotonic()) if deadline_at is not None else None
+                done, pending = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    self.logger.warning(f"Research deadline reached; dropping {len(pending)} unfinished task(s).")
+                    break
+                for task in sorted(done, key=lambda task: tasks[task] if isinstance(tasks[task], int) else -1):
+                    index = tasks[task]
+                    if task.exception() is not None:
+                        name = {None: "news", "search": "search"}.get(index) or stream.search_results[index].url
+                        self.logger.warning(f"Processing {name} failed: {task.exception()!r}")
+                    elif index == "search":
+                        if task.result():
+                            submitted = len(tasks)
+                            yield add_page(task.result())
+                            pending.update(list(tasks)[submitted:])
+                    elif index is None:
+                        yield stream.news_event(task.result() or [])
+                    elif task.result():
+                        yield stream.source_event(index, *task.result())
+            
+            for event in stream.final_events():
+                yield event
+            self.logger.info("Research completed successfully.")
+        
+        except Exception as e:
+            self.logger.error(f"Research failed: {e}")
+            yield {"event": "error", "data": {"error": str(e)}}
+        
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+    
+    def _search(self, search_query: str, time_range: str = None) -> List[SearchResult]:
+        """
+        Search the web and the local corpus.
+        
+        Up to max_results web results come first, followed by up to
+        max_results matching stored pages the web search did not return. In
+        "prefer" mode the web is not searched at all when the corpus alone has
+        max_results matching pages.
+        
+        Args:
+            search_query: Query to search for
+            time_range: Optional time range for the web search
+        
+        Returns:
+            Results to scrape and analyze, best first
+        """
+        return [result for page in self._search_pages(search_query, time_range) for result in page]
+    
+    def _search_pages(self, search_query: str, time_range: str = None) -> Iterator[List[SearchResult]]:
+        """The results of _search() page by page, as each page of web results arrives."""
+        local_results = self._local_results(search_query)
+        if self.corpus_mode == "prefer" and len(local_results) >= self.max_results:
+            self.logger.info(f"Answering from {len(local_results)} stored page(s); skipping web search.")
+            yield local_results[:self.max_results]
+            return
+        seen = set()
+        for page in self.web_search.iter_search_pages(search_query, num_results=self.max_results, time_range=time_range):
+            seen.update(result.url for result in page)
+            yield page
+        local_results = [result for result in local_results if result.url not in seen]
+        if local_results:
+            yield local_results
+    
+    async def _asearch(self, search_query: str, time_range: str = None) -> List[SearchResult]:
+        """Asynchronous version of _search()."""
+        return [result async for page in self._asearch_pages(search_query, time_range) for result in page]
+    
+    async def _asearch_pages(self, search_query: str, time_range: str = None) -> AsyncIterator[List[SearchResult]]:
+        """Asynchronous version of _search_pages()."""
+        local_results = self._local_results(search_query)
+        if self.corpus_mode == "prefer" and len(local_results) >= self.max_results:
+            self.logger.info(f"Answering from {len(local_results)} stored page(s); skipping web search.")
+            yield local_results[:self.max_results]
+            return
+        seen = set()
+        async for page in self.web_search.aiter_search_pages(search_query, num_results=self.max_results,
+                                                             time_range=time_range):
+            seen.update(result.url for result in page)
+            yield page
+        local_results = [result for result in local_results if result.url not in seen]
+        if local_results:
+            yield local_results
+    
+    def _local_results(self, search_query: str) -> List[SearchResult]:
+        """Stored pages matching the query, as search results (empty without a corpus)."""
+        if self.corpus is None:
+            return []
+        return CorpusSearchProvider(self.corpus).search(search_query, self.max_results)
+    
+    def _stored_page(self, url: str) -> Optional[ScrapedContent]:
+        return self.corpus.get(url) if self.corpus is not None else None
+    
+    def _stored_analysis(self, content: ScrapedContent, query: str) -> Optional[Dict[str, Any]]:
+        """Analysis the corpus kept for this page and exactly this query, so it need not be analyzed again."""
+        return self.corpus.get_analysis(content.url, query) if self.corpus is not None else None
+    
+    def _scrape_page(self, url: str, check_corpus: bool = True) -> Optional[ScrapedContent]:
+        """Scrape a page, reusing the stored copy when the corpus has a fresh one and storing newly fetched pages."""
+        content = self._stored_page(url) if check_corpus else None
+        if content is None:
+            content = self.scraper.scrape_url(url)
+            if content and self.corpus is not None:
+                self.corpus.add(content)
+        return content
+    
+    async def _ascrape_page(self, url: str, check_corpus: bool = True) -> Optional[ScrapedContent]:
+        """Asynchronous version of _scrape_page()."""
+        content = self._stored_page(url) if check_corpus else None
+        if content is None:
+            content = await self.scraper.ascrape_url(url)
+            if content and self.corpus is not None:
+                self.corpus.add(content)
+        return content
+    
+    def _remember_page(self, outcome: Tuple[ScrapedContent, Dict[str, Any]]) -> Tuple[ScrapedContent, Dict[str, Any]]:
+        """Store a page parsed (and analyzed) by the analysis pool, passing the outcome through."""
+        if self.corpus is not None:
+            content, _ = outcome
+            self.corpus.add(content)
+        return outcome
+    
+    def _remember_analyses(self, processed: List[Tuple[ScrapedContent, Dict[str, Any]]], query: str):
+        """Record the analyses made for query next to the stored pages."""
+        if self.corpus is None:
+            return
+        for content, source in processed:
+            self.corpus.set_analysis(content.url, source["analysis"], query)
+    
+    async def _aprocess_results(self, search_results: List[SearchResult], query: str) -> Tuple[List[Tuple[ScrapedContent, Dict[str, Any]]], List[Dict[str, Any]]]:
+        """Asynchronous version of _process_results(); pages are fetched concurrently on the event loop."""
+        semaphore = asyncio.Semaphore(self.max_workers)
+        
+        async def scrape(result: SearchResult) -> Optional[Tuple[SearchResult, ScrapedContent]]:
+            content = self._stored_page(result.url)
+            if content is None:
+                async with semaphore:
+                    content = await asyncio.wait_for(self._ascrape_page(result.url, check_corpus=False),
+                                                     self.url_timeout)
+            return (result, content) if content else None
+        
+        async def scrape_and_analyze(result: SearchResult) -> Optional[Tuple[ScrapedContent, Dict[str, Any]]]:
+            content = self._stored_page(result.url)
+            if content is None:
+                async with semaphore:
+                    html = await asyncio.wait_for(self.scraper.afetch_html(result.url), self.url_timeout)
+                if html is None:
+                    return None
+                content, analysis = self._remember_page(await self.analysis_pool.aanalyze(result.url, html, query))
+            else:
+                analysis = self._stored_analysis(content, query) or self.analyzer.analyze_content(content, query)
+            return content, {
+                "url": result.url,
+                "title": result.title,
+                "analysis": analysis
+            }
+        
+        if self.analysis_pool is not None:
+            processed = await self._arun_all(search_results, scrape_and_analyze)
+            return self._collapse_duplicates(processed, [content for content, _ in processed])
+        scraped = await self._arun_all(search_results, scrape)
+        scraped, duplicates = self._collapse_duplicates(scraped, [content for _, content in scraped])
+        return self._analyze_scraped(scraped, query), duplicates
+    
+    async def _arun_all(self, search_results: List[SearchResult], work) -> List[Any]:
+        """Run a coroutine function over every search result, keeping the results that finish by the deadline in order."""
+        tasks = [asyncio.ensure_future(work(result)) for result in search_results]
+        done, pending = await asyncio.wait(tasks, timeout=self.deadline)
+        if pending:
+            self.logger.warning(f"Research deadline reached; dropping {len(pending)} unfinished URL(s).")
+            for future in pending:
+                future.cancel()
+        
+        outcomes = []
+        for result, future in zip(search_results, tasks):
+            if future not in done:
+                continue
+            if future.exception() is not None:
+                self.logger.warning(f"Processing {result.url} failed: {future.exception()!r}")
+                continue
+            if future.result():
+                outcomes.append(future.result())
+        return outcomes
+    
+    def _scrape_and_analyze(self, result: SearchResult, query: str) -> Optional[Tuple[ScrapedContent, Dict[str, Any]]]:
+        """Scrape a single search result and analyze it on its own; returns None if scraping fails."""
+        content = self._stored_page(result.url)
+        if content is None and self.analysis_pool is not None:
+            html = self.scraper.fetch_html(result.url)
+            if html is None:
+                return None
+            content, analysis = self._remember_page(self.analysis_pool.analyze(result.url, html, query))
+        elif content is not None:
+            analysis = self._stored_analysis(content, query) or self.analyzer.analyze_content(content, query)
+        else:
+            content = self._scrape_page(result.url, check_corpus=False)
+            if not content:
+                return None
+            analysis = self.analyzer.analyze_content(content, query)
+        return content, {
+            "url": result.url,
+            "title": result.title,
+            "analysis": analysis
+        }
+    
+    def _process_results(self, search_results: List[SearchResult], query: str) -> Tuple[List[Tuple[ScrapedContent, Dict[str, Any]]], List[Dict[str, Any]]]:
+        """
+        Scrape search results, merge near-duplicate pages and analyze the distinct ones as one batch.
+        
+        Pages are scraped in parallel when the agent is concurrent and one
+        after another otherwise. With an analysis pool, workers parse and
+        analyze each page as it arrives, so near-duplicates are merged after
+        analysis instead.
+        
+        Args:
+            search_results: Search results to process
+            query: Original research query
+        
+        Returns:
+            Tuple of ((content, source) pairs in search-result order, merge report)
+        """
+        if self.analysis_pool is not None:
+            processed = self._run_all(search_results, lambda result: self._scrape_and_analyze(result, query))
+            return self._collapse_duplicates(processed, [content for content, _ in processed])
+        scraped = self._run_all(search_results, self._scrape_result)
+        scraped, duplicates = self._collapse_duplicates(scraped, [content for _, content in scraped])
+        return self._analyze_scraped(scraped, query), duplicates
+    
+    def _scrape_result(self, result: SearchResult) -> Optional[Tuple[SearchResult, ScrapedContent]]:
+        """Scrape a single search result; returns None if scraping fails."""
+        content = self._scrape_page(result.url)
+        return (result, content) if content else None
+    
+    def _run_all(self, search_results: List[SearchResult], work) -> List[Any]:
+        """Apply work to every search result, in parallel when concurrent, keeping non-empty results in order."""
+        if self.concurrent:
+            return self._run_concurrently(search_results, work)
+        outcomes = []
+        for result in search_results:
+            outcome = work(result)
+            if outcome:
+                outcomes.append(outcome)
+        return outcomes
+    
+    def _analyze_scraped(self, scraped: List[Tuple[SearchResult, ScrapedContent]], query: str) -> List[Tuple[ScrapedContent, Dict[str, Any]]]:
+        """Analyze scraped pages as one batch, reusing analyses the corpus kept for the same query."""
+        analyses = [self._stored_analysis(content, query) for _, content in scraped]
+        fresh = iter(self.analyzer.analyze_batch([content for (_, content), analysis in zip(scraped, analyses)
+                                                  if analysis is None], query))
+        analyses = [analysis if analysis is not None else next(fresh) for analysis in analyses]
+        return [(content, {
+            "url": result.url,
+            "title": result.title,
+            "analysis": analysis
+        }) for (result, content), analysis in zip(scraped, analyses)]
+    
+    def _collapse_duplicates(self, items: List[Tuple], contents: List[ScrapedContent]) -> Tuple[List[Tuple], List[Dict[str, Any]]]:
+        """
+        Drop items whose page is a near-duplicate of an earlier (higher-ranked) one.
+        
+        Args:
+            items: Items to filter, one per page
+            contents: Scraped page for each item
+        
+        Returns:
+            Tuple of (kept items in their original order, merge report)
+        """
+        if self.duplicate_detector is None or len(items) < 2:
+            return items, []
+        kept, duplicates = self.duplicate_detector.deduplicate(contents)
+        if duplicates:
+            merged = sum(len(entry["merged"]) for entry in duplicates)
+            self.logger.info(f"Merged {merged} near-duplicate page(s) into {len(duplicates)} source(s).")
+        return [items[index] for index in kept], duplicates
+    
+    def _run_concurrently(self, search_results: List[SearchResult], work) -> List[Any]:
+        """
+        Apply work to search results in parallel.
+        
+        Results that miss the per-URL timeout or the overall deadline are
+        dropped, and the remaining non-empty ones are returned in
+        search-result order.
+        
+        Args:
+            search_results: Search results to process
+            work: Function called with one search result
+        
+        Returns:
+            Outcomes of work in search-result order
+        """
+        started_at: Dict[int, float] = {}
+        submitted_at = time.monotonic()
+        deadline_at = submitted_at + self.deadline if self.deadline is not None else None
+        
+        def task(index: int, result: SearchResult):
+            started_at[index] = time.monotonic()
+            return work(result)
+        
+        executor = ThreadPoolExecutor(max_workers=min(self.max_workers, len(search_results)) or 1)
+        futures = {executor.submit(task, i, result): i for i, result in enumerate(search_results)}
+        pending = set(futures)
+        outcomes: Dict[int, Any] = {}
+        
+        try:
+            while pending:
+                done, pending = wait(pending, timeout=self._next_wakeup(pending, futures, started_at, deadline_at),
+                                     return_when=FIRST_COMPLETED)
+                for future in done:
+                    index = futures[future]
+                    try:
+                        outcome = future.result()
+                    except Exception as e:
+                        self.logger.warning(f"Processing {search_results[index].url} failed: {e}")
+                        continue
+                    if outcome:
+                        outcomes[index] = outcome
+                
+                now = time.monotonic()
+                if deadline_at is not None and now >= deadline_at:
+                    self.logger.warning(f"Research deadline reached; dropping {len(pending)} unfinished URL(s).")
+                    break
+                if self.url_timeout is not None:
+                    for future in list(pending):
+                        index = futures[future]
+                        if now - started_at.get(index, now) >= self.url_timeout:
+                            self.logger.warning(f"Timed out processing {search_results[index].url}")
+                            pending.discard(future)
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+        
+        return [outcomes[index] for index in sorted(outcomes)]
+    
+    def _next_wakeup(self, pending, futures, started_at: Dict[int, float], deadline_at: Optional[float]) -> Optional[float]:
+        """Seconds until the next per-URL timeout or the overall deadline, or None to block."""
+        now = time.monotonic()
+        candidates = []
+        if deadline_at is not None:
+            candidates.append(deadline_at - now)
+        if self.url_timeout is not None:
+            for future in pending:
+                # Tasks still waiting for a worker are re-checked after a full timeout period
+                start = started_at.get(futures[future], now)
+                candidates.append(start + self.url_timeout - now)
+        if not candidates:
+            return None
+        return max(0.0, min(candidates))
     
     def refine_search(self, query: str, additional_terms: List[str]) -> Dict[str, Any]:
         """
@@ -101,9 +765,9 @@ class WebResearchAgent:
         Args:
             query: Original query
             additional_terms: Terms to refine the search
-            
+        
         Returns:
             Refined research report
         """
         refined_query = query + " " + " ".join(additional_terms)
-        return self.research(refined_query)
\ No newline at end of file
+        return self.research(refined_query)
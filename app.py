@@ -1,9 +1,17 @@
-from flask import Flask, request, render_template
+from flask import Flask, Response, request, render_template, stream_with_context
 import logging
-from tools.web_search import WebSearchTool
-from tools.web_scraper import WebScraper
-from tools.content_analyzer import ContentAnalyzer
-from tools.news_aggregator import NewsAggregator
+import os
+import threading
+from typing import Callable, Optional
+from dotenv import load_dotenv
+from tools.corpus import Corpus
+from utils import serialization
+from tools.registry import ToolRegistry
+from agent.research_agent import WebResearchAgent
+from agent.jobs import Job, JobQueue, JobQueueFull, JobStore
+
+# API keys are read from the environment by the tools; load .env once per process
+load_dotenv()
 
 # Set up logging
 logging.basicConfig(level=logging.DEBUG)
@@ -11,79 +19,262 @@ logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
 
+# Tools shared by every request; set ANALYSIS_POOL_WORKERS to parse and analyze pages in worker processes
+# and CORPUS_PATH to keep scraped pages in a local searchable corpus
+_registry = None
+_registry_lock = threading.Lock()
+
+def get_registry() -> ToolRegistry:
+    """Create and warm the tool registry on first use (never at import, so spawned workers do not build their own)."""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            workers = os.environ.get("ANALYSIS_POOL_WORKERS")
+            corpus_path = os.environ.get("CORPUS_PATH")
+            _registry = ToolRegistry(analysis_pool_workers=int(workers) if workers else None,
+                                     corpus=Corpus(corpus_path) if corpus_path else None)
+    _registry.warm()
+    return _registry
+
+# Background research and scrape jobs; JOB_WORKERS, JOB_QUEUE_SIZE and JOB_STORE_PATH tune the queue
+_job_queue = None
+_job_queue_lock = threading.Lock()
+
+def get_job_queue() -> JobQueue:
+    """Create the job queue and its worker threads on first use."""
+    global _job_queue
+    with _job_queue_lock:
+        if _job_queue is None:
+            store_path = os.environ.get("JOB_STORE_PATH")
+            _job_queue = JobQueue(
+                {"research": run_research_job, "scrape": run_scrape_job},
+                max_workers=int(os.environ.get("JOB_WORKERS", "4")),
+                max_queued=int(os.environ.get("JOB_QUEUE_SIZE", "100")),
+                store=JobStore(store_path) if store_path else None
+            )
+        return _job_queue
+
 @app.route("/", methods=["GET", "POST"])
 def index():
     if request.method == "POST":
         query = request.form["query"]
-        search_tool = WebSearchTool(use_mock=False)
-        results = search_tool.search(query, num_results=5)
+        results = get_registry().web_search.search(query, num_results=5)
         return render_template("index.html", results=results, query=query)
     return render_template("index.html", results=None, query="")
 
+def create_research_agent() -> WebResearchAgent:
+    """Agent used by the streaming research endpoint."""
+    return get_registry().agent
+
+def format_sse(event: str, data) -> str:
+    """Encode one Server-Sent Events message."""
+    return f"event: {event}\ndata: {serialization.dumps_text(data)}\n\n"
+
+@app.route("/research/stream")
+def research_stream():
+    """Stream research progress (search hits, each source, news, contradictions, final report) as Server-Sent Events."""
+    query = request.args.get("query", "").strip()
+    if not query:
+        return Response(format_sse("error", {"error": "Missing query."}), status=400, mimetype="text/event-stream")
+    time_range = request.args.get("time_range") or None
+    agent = create_research_agent()
+    
+    def events():
+        for event in agent.iter_research(query, time_range=time_range):
+            yield format_sse(event["event"], event["data"])
+    
+    return Response(stream_with_context(events()), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+def analyze_url(url: str, query: str, check: Optional[Callable[[], None]] = None):
+    """
+    Scrape and analyze one page into the result template's data; returns None if the page cannot be scraped.
+    
+    check, when given, is called between the download, the analysis and the
+    news fetch so a job can be abandoned there (e.g. Job.check); a download
+    in progress is bounded by the HTTP timeouts instead.
+    """
+    registry = get_registry()
+    scraper = registry.scraper
+    analyzer = registry.analyzer
+    aggregator = registry.news_aggregator
+    
+    analysis = None
+    pool = registry.analysis_pool
+    if pool is not None:
+        html = scraper.fetch_html(url)
+        content, analysis = pool.analyze(url, html, query) if html is not None else (None, None)
+    else:
+        content = scraper.scrape_url(url)
+    if not content:
+        return None
+    if check is not None:
+        check()
+    
+    # Normalize content to ensure it's a dictionary with string attributes
+    if hasattr(content, 'main_content') and callable(getattr(content, 'main_content')):
+        normalized_content = {"main_content": content.main_content(), "title": getattr(content, 'title', '')(), "url": url}
+    else:
+        normalized_content = {
+            "main_content": getattr(content, 'main_content', '') if hasattr(content, 'main_content') else str(content),
+            "title": getattr(content, 'title', '') if hasattr(content, 'title') else '',
+            "url": url
+        }
+    
+    if analysis is not None:
+        relevance = analysis["relevance"]
+        key_info = analysis["key_information"]
+    else:
+        relevance = analyzer.analyze_relevance(normalized_content, query)
+        key_info = analyzer.extract_key_information(normalized_content, query)
+    # Ensure key_info is a dict with lists
+    key_info = {
+        "key_points": key_info.get("key_points", []),
+        "relevant_terms": key_info.get("relevant_terms", []),
+        "mentions": key_info.get("mentions", {}),
+        "topic_relevance": key_info.get("topic_relevance", 0.0)
+    }
+    if analysis is not None:
+        reliability = analysis["reliability"]
+    else:
+        reliability = analyzer.assess_reliability(normalized_content, url)
+    # Ensure reliability is a dict with values
+    reliability = {
+        "reliability_score": reliability.get("reliability_score", 0.0),
+        "factors": reliability.get("factors", []),
+        "domain_reputation": reliability.get("domain_reputation", "Unknown")
+    }
+    if analysis is not None:
+        summary = analysis["summary"]
+        categories = analysis["categories"]
+    else:
+        summary = analyzer.summarize_content(normalized_content)
+        categories = analyzer.categorize_content(normalized_content)
+    if check is not None:
+        check()
+    news = aggregator.fetch_news(query, num_articles=3)
+    
+    # Log data for debugging
+    logger.debug(f"Normalized Content: {normalized_content}")
+    logger.debug(f"Key Info: {key_info}")
+    logger.debug(f"Reliability: {reliability}")
+    logger.debug(f"Summary: {summary}")
+    logger.debug(f"Categories: {categories}")
+    logger.debug(f"News: {news}")
+    
+    template_data = {
+        "content": normalized_content,
+        "relevance": relevance,
+        "key_info": key_info,
+        "reliability": reliability,
+        "summary": summary,
+        "categories": categories,
+        "news": news
+    }
+    
+    return template_data
+
 @app.route("/scrape")
 def scrape():
     url = request.args.get("url")
     query = request.args.get("query")
-    scraper = WebScraper(use_mock=False)
-    analyzer = ContentAnalyzer(use_mock=False)
-    aggregator = NewsAggregator(use_mock=False)
-
-    content = scraper.scrape_url(url)
-    if content:
-        try:
-            # Normalize content to ensure it's a dictionary with string attributes
-            if hasattr(content, 'main_content') and callable(getattr(content, 'main_content')):
-                normalized_content = {"main_content": content.main_content(), "title": getattr(content, 'title', '')(), "url": url}
-            else:
-                normalized_content = {
-                    "main_content": getattr(content, 'main_content', '') if hasattr(content, 'main_content') else str(content),
-                    "title": getattr(content, 'title', '') if hasattr(content, 'title') else '',
-                    "url": url
-                }
-
-            relevance = analyzer.analyze_relevance(normalized_content, query)
-            key_info = analyzer.extract_key_information(normalized_content, query)
-            # Ensure key_info is a dict with lists
-            key_info = {
-                "key_points": key_info.get("key_points", []),
-                "relevant_terms": key_info.get("relevant_terms", []),
-                "mentions": key_info.get("mentions", {}),
-                "topic_relevance": key_info.get("topic_relevance", 0.0)
-            }
-            reliability = analyzer.assess_reliability(normalized_content, url)
-            # Ensure reliability is a dict with values
-            reliability = {
-                "reliability_score": reliability.get("reliability_score", 0.0),
-                "factors": reliability.get("factors", []),
-                "domain_reputation": reliability.get("domain_reputation", "Unknown")
-            }
-            summary = analyzer.summarize_content(normalized_content)
-            categories = analyzer.categorize_content(normalized_content)
-            news = aggregator.fetch_news(query, num_articles=3)
-
-            # Log data for debugging
-            logger.debug(f"Normalized Content: {normalized_content}")
-            logger.debug(f"Key Info: {key_info}")
-            logger.debug(f"Reliability: {reliability}")
-            logger.debug(f"Summary: {summary}")
-            logger.debug(f"Categories: {categories}")
-            logger.debug(f"News: {news}")
-
-            template_data = {
-                "content": normalized_content,
-                "relevance": relevance,
-                "key_info": key_info,
-                "reliability": reliability,
-                "summary": summary,
-                "categories": categories,
-                "news": news
-            }
-
-            return render_template("result.html", **template_data)
-        except Exception as e:
-            logger.error(f"Error in scrape route: {str(e)}", exc_info=True)
-            return f"Error processing content: {str(e)}"
-    return "Failed to scrape content."
+    try:
+        template_data = analyze_url(url, query)
+    except Exception as e:
+        logger.error(f"Error in scrape route: {str(e)}", exc_info=True)
+        return f"Error processing content: {str(e)}"
+    if template_data is None:
+        return "Failed to scrape content."
+    return render_template("result.html", **template_data)
+
+def run_research_job(job: Job):
+    """Job runner: research a query, publishing each streamed event on the job."""
+    events = create_research_agent().iter_research(job.params["query"], time_range=job.params.get("time_range"))
+    try:
+        for event in events:
+            job.check()
+            job.emit(event)
+            if event["event"] == "error":
+                raise RuntimeError(event["data"]["error"])
+            if event["event"] == "report":
+                return event["data"]
+    finally:
+        events.close()
+    raise RuntimeError("Research ended without a report")
+
+def run_scrape_job(job: Job):
+    """Job runner: scrape and analyze one page."""
+    template_data = analyze_url(job.params["url"], job.params.get("query", ""), check=job.check)
+    if template_data is None:
+        raise RuntimeError("Failed to scrape content.")
+    template_data["news"] = [article.to_dict() for article in template_data["news"] or []]
+    return template_data
+
+def _json_response(data, status: int = 200) -> Response:
+    return app.response_class(serialization.dumps(data), status=status, mimetype="application/json")
+
+@app.route("/jobs", methods=["POST"])
+def submit_job():
+    """Queue a research or scrape job; responds 202 with the job record to poll."""
+    payload = request.get_json(silent=True) or request.form.to_dict()
+    kind = payload.get("kind", "research")
+    if kind == "research" and payload.get("query"):
+        params = {"query": payload["query"], "time_range": payload.get("time_range") or None}
+    elif kind == "scrape" and payload.get("url"):
+        params = {"url": payload["url"], "query": payload.get("query", "")}
+    else:
+        return _json_response({"error": "Expected kind 'research' with a query or 'scrape' with a url."}, 400)
+    try:
+        deadline = float(payload["deadline"]) if payload.get("deadline") is not None else None
+        job = get_job_queue().submit(kind, params, deadline=deadline)
+    except ValueError:
+        return _json_response({"error": "deadline must be a number of seconds."}, 400)
+    except JobQueueFull as e:
+        return _json_response({"error": str(e)}, 429)
+    return _json_response(job.to_dict(), 202)
+
+@app.route("/jobs/<job_id>", methods=["GET"])
+def job_status(job_id: str):
+    status = get_job_queue().status(job_id)
+    if status is None:
+        return _json_response({"error": "Unknown job."}, 404)
+    return _json_response(status)
+
+@app.route("/jobs/<job_id>", methods=["DELETE"])
+def cancel_job(job_id: str):
+    queue = get_job_queue()
+    if queue.status(job_id) is None:
+        return _json_response({"error": "Unknown job."}, 404)
+    queue.cancel(job_id)
+    return _json_response(queue.status(job_id))
+
+@app.route("/jobs/<job_id>/events")
+def job_events(job_id: str):
+    """Subscribe to a job's progress as Server-Sent Events, ending with its final record."""
+    job = get_job_queue().get(job_id)
+    if job is None:
+        return _json_response({"error": "Unknown job."}, 404)
+    
+    def events():
+        for event in job.iter_events():
+            yield format_sse(event["event"], event["data"])
+        yield format_sse("job", job.to_dict())
+    
+    return Response(stream_with_context(events()), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.route("/ready")
+def ready():
+    """Readiness probe: 200 once the shared tools are built and warmed, 503 otherwise."""
+    try:
+        status = get_registry().readiness()
+    except Exception as e:
+        logger.error(f"Tool registry failed to start: {str(e)}", exc_info=True)
+        status = {"ready": False, "error": str(e)}
+    return _json_response(status, 200 if status["ready"] else 503)
 
 if __name__ == "__main__":
+    # With the debug reloader only the child process serves requests, so only it builds the tools
+    if os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+        get_registry()
     app.run(debug=True)
\ No newline at end of file
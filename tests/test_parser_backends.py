@@ -0,0 +1,40 @@
+# tests/test_parser_backends.py
+
+import glob
+import json
+import os
+import unittest
+from tools.parser_backends import BACKENDS, available_backends, get_backend
+from tools.web_scraper import WebScraper
+
+GOLDEN_DIR = os.path.join(os.path.dirname(__file__), "golden")
+
+class TestParserBackendParity(unittest.TestCase):
+    """Every parser backend must turn the saved golden pages into the same ScrapedContent."""
+    
+    def golden_pages(self):
+        for html_path in sorted(glob.glob(os.path.join(GOLDEN_DIR, "*.html"))):
+            with open(html_path, encoding="utf-8") as f:
+                html = f.read()
+            with open(html_path[:-len(".html")] + ".json", encoding="utf-8") as f:
+                expected = json.load(f)
+            yield os.path.basename(html_path), html, expected
+    
+    def test_backends_match_golden_files(self):
+        pages = list(self.golden_pages())
+        self.assertGreater(len(pages), 0)
+        for backend in BACKENDS:
+            with self.subTest(backend=backend):
+                if backend not in available_backends():
+                    self.skipTest(f"{backend} is not installed")
+                scraper = WebScraper(use_mock=False, parser=backend)
+                for name, html, expected in pages:
+                    content = scraper._parse_html(html, "https://example.com/" + name)
+                    self.assertEqual(content.to_dict(), expected, f"{backend} drifted on {name}")
+    
+    def test_unknown_backend(self):
+        with self.assertRaises(ValueError):
+            get_backend("regex")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,7 +1,45 @@
 # tests/test_tools.py
 
+import asyncio
+import datetime
+import math
+import random
+import time
 import unittest
+from unittest import mock
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from agent.research_agent import WebResearchAgent
+from agent.jobs import JobQueue, JobQueueFull, JobStore
+import json
+import os
+import tempfile
+from tools.web_scraper import WebScraper, ScrapedContent
+from tools.web_search import SearchResult, WebSearchTool
+from tools.search_cache import SearchResultCache
+from tools.search_providers import CorpusSearchProvider, HedgedSearch, SearchProvider, SerpApiProvider
+from tools.page_cache import PageCache
+from tools.page_stream import PageReader
+from tools.robots import RobotsCache, parse_robots_txt
+from tools.analysis_pool import AnalysisPool
+from tools.content_analyzer import ContentAnalyzer
+from tools.corpus import Corpus
+from tools.contradictions import ContradictionDetector
+from tools.near_duplicates import NearDuplicateDetector
+from tools.text_analysis import get_document
+from tools.ranking import BM25Index
+from tools.registry import ToolRegistry
+from tools.news_aggregator import NewsAggregator, NewsArticle
+from utils.helpers import IncrementalReport, generate_report
+from utils.http_client import HttpClient
+from utils.keyword_matcher import KeywordMatcher
+from utils.singleflight import SingleFlight
+from utils.host_scheduler import AdaptiveHostScheduler
+from utils.latency import LatencyHistogram
+from utils import serialization
+from utils.async_http_client import AsyncHttpClient, aiohttp
 
 class TestWebResearchAgent(unittest.TestCase):
     def setUp(self):
@@ -21,9 +59,10 @@ class TestWebResearchAgent(unittest.TestCase):
         self.assertGreater(len(report["news"]), 0)
     
     def test_empty_results(self):
-        # Simulate empty results by modifying WebSearchTool (not implemented here)
+        # Simulate empty results by modifying WebSearchTool
         query = "nonexistent topic 12345"
-        report = self.agent.research(query)
+        with mock.patch.object(self.agent.web_search, "search", return_value=[]):
+            report = self.agent.research(query)
         self.assertIn("error", report)
     
     def test_refine_search(self):
@@ -32,5 +71,1418 @@ class TestWebResearchAgent(unittest.TestCase):
         report = self.agent.refine_search(query, additional_terms)
         self.assertIn("key_findings", report)
 
+class TestConcurrentResearch(unittest.TestCase):
+    def setUp(self):
+        self.agent = WebResearchAgent(use_mock=True, max_results=5, concurrent=True, max_workers=5)
+    
+    def test_concurrent_matches_sequential_sources(self):
+        query = "lemon tree price"
+        sequential = WebResearchAgent(use_mock=True, max_results=5)
+        results = sequential.web_search.search(query, num_results=5)
+        random.seed(7)
+        expected, _ = sequential._process_results(results, query)
+        random.seed(7)
+        actual, _ = self.agent._process_results(results, query)
+        self.assertEqual([source for _, source in actual], [source for _, source in expected])
+    
+    def test_slow_url_is_dropped_after_timeout(self):
+        self.agent.url_timeout = 0.2
+        original_scrape = self.agent.scraper.scrape_url
+        
+        def slow_scrape(url):
+            if url.endswith("page2"):
+                time.sleep(1)
+            return original_scrape(url)
+        
+        results = self.agent.web_search.search("lemon tree", num_results=3)
+        with mock.patch.object(self.agent.scraper, "scrape_url", side_effect=slow_scrape):
+            started = time.monotonic()
+            processed, _ = self.agent._process_results(results, "lemon tree")
+            elapsed = time.monotonic() - started
+        
+        self.assertLess(elapsed, 0.9)
+        self.assertEqual([analysis["url"] for _, analysis in processed],
+                         [results[0].url, results[2].url])
+    
+    def test_concurrent_research_report(self):
+        report = self.agent.research("latest lemon tree news")
+        self.assertIn("key_findings", report)
+        self.assertGreater(len(report["sources"]), 0)
+
+class _LocalHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    pages = {}
+    requests = []
+    
+    def do_GET(self):
+        self.requests.append((self.path, dict(self.headers)))
+        status, headers, body = self.pages.get(self.path.split("?")[0], (404, {}, b"not found"))
+        if callable(status):
+            status = status(self)
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        if status == 304:
+            body = b""
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def log_message(self, *args):
+        pass
+
+class LocalServerTestCase(unittest.TestCase):
+    """Runs a keep-alive HTTP server on localhost for transport-level tests."""
+    
+    def setUp(self):
+        _LocalHandler.pages = {}
+        _LocalHandler.requests = []
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _LocalHandler)
+        self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True).start()
+    
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+    
+    def serve(self, path, body, status=200, headers=None):
+        _LocalHandler.pages[path] = (status, headers or {"Content-Type": "text/html"}, body)
+
+class TestHttpClient(LocalServerTestCase):
+    def test_connections_are_reused(self):
+        self.serve("/page", b"<html><title>Pooled</title><body><article><p>Hello</p></article></body></html>")
+        client = HttpClient(backoff_factor=0)
+        scraper = WebScraper(use_mock=False, http_client=client)
+        for _ in range(3):
+            content = scraper.scrape_url(self.base_url + "/page")
+            self.assertEqual(content.title, "Pooled")
+        self.assertEqual(client.pool_stats()["misses"], 1)
+        self.assertEqual(client.pool_stats()["hits"], 2)
+    
+    def test_retries_server_errors(self):
+        attempts = []
+        
+        def flaky_status(request):
+            attempts.append(1)
+            return 503 if len(attempts) < 3 else 200
+        
+        self.serve("/flaky", b"ok", status=flaky_status)
+        client = HttpClient(max_retries=3, backoff_factor=0)
+        response = client.get(self.base_url + "/flaky")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(attempts), 3)
+
+class TestAsyncResearch(LocalServerTestCase):
+    def test_many_jobs_share_one_event_loop(self):
+        agent = WebResearchAgent(use_mock=True, max_results=3)
+        
+        async def run_all():
+            return await asyncio.gather(*(agent.aresearch(f"recent news about topic {i}") for i in range(200)))
+        
+        reports = asyncio.run(run_all())
+        self.assertEqual(len(reports), 200)
+        for report in reports:
+            self.assertEqual(len(report["sources"]), 3)
+            self.assertGreater(len(report["news"]), 0)
+    
+    @unittest.skipUnless(aiohttp, "aiohttp is not installed")
+    def test_ascrape_url_matches_scrape_url(self):
+        self.serve("/page", b"<html><title>Async</title><body><article><p>First paragraph.</p></article>"
+                            b"<a href='/next'>Next</a></body></html>")
+        client = AsyncHttpClient(backoff_factor=0)
+        scraper = WebScraper(use_mock=False, async_http_client=client)
+        
+        async def scrape():
+            try:
+                return await scraper.ascrape_url(self.base_url + "/page")
+            finally:
+                await client.close()
+        
+        async_content = asyncio.run(scrape())
+        sync_content = scraper.scrape_url(self.base_url + "/page")
+        self.assertEqual(async_content.to_dict(), sync_content.to_dict())
+    
+    @unittest.skipUnless(aiohttp, "aiohttp is not installed")
+    def test_session_closed_when_loop_shuts_down(self):
+        self.serve("/page", b"ok")
+        client = AsyncHttpClient(backoff_factor=0)
+        sessions = []
+        
+        async def fetch():
+            _, _, text = await client.get_text(self.base_url + "/page")
+            sessions.append(client._sessions[asyncio.get_running_loop()][0])
+            return text
+        
+        for _ in range(3):
+            self.assertEqual(asyncio.run(fetch()), "ok")
+        self.assertEqual(len(sessions), 3)
+        self.assertTrue(all(session.closed for session in sessions))
+        self.assertEqual(len(client._sessions), 0)
+    
+    @unittest.skipUnless(aiohttp, "aiohttp is not installed")
+    def test_retry_after_is_capped(self):
+        attempts = []
+        
+        def throttled(request):
+            attempts.append(time.monotonic())
+            return 429 if len(attempts) < 2 else 200
+        
+        self.serve("/slow", b"ok", status=throttled, headers={"Content-Type": "text/plain", "Retry-After": "3600"})
+        client = AsyncHttpClient(max_retry_after=0.1)
+        status, _, _ = asyncio.run(client.get_text(self.base_url + "/slow"))
+        self.assertEqual(status, 200)
+        self.assertLess(attempts[1] - attempts[0], 5)
+
+class TestSearchResultCache(LocalServerTestCase):
+    def setUp(self):
+        super().setUp()
+        body = json.dumps({"organic_results": [
+            {"title": "Lemon trees", "link": "https://lemons.example/1", "snippet": "All about lemons"}
+        ]}).encode()
+        self.serve("/search", body, headers={"Content-Type": "application/json"})
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmpdir.name, "search.db")
+    
+    def tearDown(self):
+        super().tearDown()
+        self.tmpdir.cleanup()
+    
+    def make_tool(self, cache):
+        return WebSearchTool(providers=[SerpApiProvider("test-key", base_url=self.base_url + "/search")], cache=cache)
+    
+    def api_calls(self):
+        return len([path for path, _ in _LocalHandler.requests if path.startswith("/search")])
+    
+    def test_identical_queries_hit_api_once(self):
+        tool = self.make_tool(SearchResultCache(path=self.db_path))
+        first = tool.search("Lemon  Tree", num_results=5)
+        second = tool.search("lemon tree", num_results=5)
+        self.assertEqual(self.api_calls(), 1)
+        self.assertEqual([r.to_dict() for r in first], [r.to_dict() for r in second])
+        
+        # A new process with a cold memory tier is served from SQLite
+        restarted = self.make_tool(SearchResultCache(path=self.db_path))
+        self.assertEqual(restarted.search("lemon tree", num_results=5)[0].url, "https://lemons.example/1")
+        self.assertEqual(self.api_calls(), 1)
+    
+    def test_stale_entries_are_served_while_revalidating(self):
+        cache = SearchResultCache(ttls={"day": 0.05}, stale_factor=100)
+        tool = self.make_tool(cache)
+        tool.search("lemon tree", time_range="day")
+        time.sleep(0.1)
+        results = tool.search("lemon tree", time_range="day")
+        self.assertEqual(results[0].title, "Lemon trees")
+        self.assertEqual(cache.stats()["stale_hits"], 1)
+        for _ in range(50):
+            if self.api_calls() == 2:
+                break
+            time.sleep(0.02)
+        self.assertEqual(self.api_calls(), 2)
+
+class TestPageCache(LocalServerTestCase):
+    PAGE = (b"<html><head><title>Cached</title></head><body><article><p>Lemon trees need sun.</p>"
+            b"</article></body></html>")
+    
+    def setUp(self):
+        super().setUp()
+        self.cache = PageCache()
+        self.scraper = WebScraper(use_mock=False, page_cache=self.cache)
+    
+    def test_not_modified_skips_download_and_parse(self):
+        def etag_status(request):
+            return 304 if request.headers.get("If-None-Match") == '"v1"' else 200
+        
+        self.serve("/page", self.PAGE, status=etag_status, headers={"Content-Type": "text/html", "ETag": '"v1"'})
+        first = self.scraper.scrape_url(self.base_url + "/page")
+        with mock.patch.object(self.scraper, "_parse_html", side_effect=AssertionError("parsed again")):
+            second = self.scraper.scrape_url(self.base_url + "/page")
+        self.assertEqual(second.to_dict(), first.to_dict())
+        self.assertEqual(_LocalHandler.requests[-1][1].get("If-None-Match"), '"v1"')
+        self.assertEqual(self.cache.stats()["revalidated"], 1)
+    
+    def test_identical_body_reuses_parse(self):
+        self.serve("/a", self.PAGE)
+        self.serve("/mirror", self.PAGE)
+        self.scraper.scrape_url(self.base_url + "/a")
+        with mock.patch.object(self.scraper, "_parse_html", side_effect=AssertionError("parsed again")):
+            mirror = self.scraper.scrape_url(self.base_url + "/mirror")
+        self.assertEqual(mirror.url, self.base_url + "/mirror")
+        self.assertEqual(mirror.title, "Cached")
+        self.assertEqual(self.cache.stats()["parsed"], 1)
+    
+    def test_fresh_pages_are_served_without_a_request(self):
+        self.serve("/fresh", self.PAGE, headers={"Content-Type": "text/html", "Cache-Control": "max-age=60"})
+        self.scraper.scrape_url(self.base_url + "/fresh")
+        self.scraper.scrape_url(self.base_url + "/fresh")
+        self.assertEqual(len([path for path, _ in _LocalHandler.requests if path == "/fresh"]), 1)
+        self.assertEqual(self.cache.stats()["fresh"], 1)
+    
+    def test_least_recently_used_pages_are_evicted(self):
+        cache = PageCache(max_pages=2)
+        headers = {"Content-Type": "text/html"}
+        cache.store("https://a.example/", b"a", "utf-8", headers)
+        cache.store("https://b.example/", b"b", "utf-8", headers)
+        cache.lookup("https://a.example/")
+        cache.store("https://c.example/", b"c", "utf-8", headers)
+        self.assertIsNone(cache.lookup("https://b.example/"))
+        self.assertIsNotNone(cache.lookup("https://a.example/"))
+        self.assertEqual(cache.stats()["evictions"], 1)
+        self.assertEqual(cache.stats()["pages"], 2)
+    
+    def test_replaced_and_evicted_bodies_are_deleted(self):
+        cache = PageCache(max_bytes=None)
+        headers = {"Content-Type": "text/html"}
+        old = cache.store("https://a.example/", b"version one" * 100, "utf-8", headers)
+        new = cache.store("https://a.example/", b"version two" * 100, "utf-8", headers)
+        self.assertIsNone(cache.load_body(old))
+        self.assertEqual(cache.load_body(new), b"version two" * 100)
+        
+        cache.store("https://mirror.example/", b"version two" * 100, "utf-8", headers)
+        cache.max_pages = 2
+        cache.store("https://b.example/", b"b", "utf-8", headers)
+        # Evicting the oldest page keeps the body its mirror still refers to
+        self.assertIsNone(cache.lookup("https://a.example/"))
+        self.assertEqual(cache.load_body(new), b"version two" * 100)
+        
+        cache.max_bytes = cache.stats()["body_bytes"] - 1
+        cache.store("https://c.example/", b"c", "utf-8", headers)
+        self.assertIsNone(cache.load_body(new))
+        self.assertLessEqual(cache.stats()["body_bytes"], cache.max_bytes)
+
+class TestStreamingDownload(LocalServerTestCase):
+    def test_unsupported_content_type_is_rejected(self):
+        self.serve("/image.png", b"\x89PNG" + b"\0" * 1024, headers={"Content-Type": "image/png"})
+        scraper = WebScraper(use_mock=False)
+        with mock.patch.object(scraper, "_parse_html", side_effect=AssertionError("parsed")):
+            self.assertIsNone(scraper.scrape_url(self.base_url + "/image.png"))
+    
+    def test_declared_length_over_cap_is_rejected(self):
+        self.serve("/big", b"<html><body><p>" + b"x" * 4096 + b"</p></body></html>")
+        self.assertIsNone(WebScraper(use_mock=False, max_bytes=1024).scrape_url(self.base_url + "/big"))
+    
+    def test_reader_truncates_at_cap(self):
+        reader = PageReader("utf-8", max_bytes=10)
+        self.assertTrue(reader.feed(b"<p>caf\xc3"))
+        self.assertFalse(reader.feed(b"\xa9 au lait</p>"))
+        body, text, complete = reader.finish()
+        self.assertEqual(body, b"<p>caf\xc3\xa9 a")
+        self.assertEqual(text, "<p>caf\u00e9 a")
+        self.assertFalse(complete)
+    
+    def test_stops_after_main_content(self):
+        page = (b"<html><head><title>Long</title></head><body><article><p>Tea is brewed from leaves.</p>"
+                b"</article>" + b"<p>footer</p>" * 5000 + b"<a href='/late'>Late link</a></body></html>")
+        self.serve("/long", page)
+        scraper = WebScraper(use_mock=False, stop_after_main_content=True, chunk_size=1024)
+        content = scraper.scrape_url(self.base_url + "/long")
+        self.assertEqual(content.main_content, "Tea is brewed from leaves.\n")
+        self.assertEqual(content.links, [])
+        full = WebScraper(use_mock=False).scrape_url(self.base_url + "/long")
+        self.assertEqual(full.links, [{"text": "Late link", "url": "/late"}])
+
+class TestRobots(LocalServerTestCase):
+    def setUp(self):
+        super().setUp()
+        self.robots = RobotsCache()
+        self.scraper = WebScraper(use_mock=False, robots=self.robots)
+    
+    def test_longest_match_wins(self):
+        rules = parse_robots_txt(
+            "User-agent: *\nDisallow: /\n\n"
+            "User-agent: WebResearchAgent\nDisallow: /private\nAllow: /private/open\n"
+            "Disallow: /*.pdf$\nAllow: /docs/*.pdf$\nCrawl-delay: 2\n"
+        )
+        self.assertTrue(rules.is_allowed("/public"))
+        self.assertFalse(rules.is_allowed("/private/secret"))
+        self.assertTrue(rules.is_allowed("/private/open/page"))
+        self.assertFalse(rules.is_allowed("/files/report.pdf"))
+        self.assertTrue(rules.is_allowed("/files/report.pdf?download=1"))
+        self.assertTrue(rules.is_allowed("/docs/guide.pdf"))
+        self.assertEqual(rules.crawl_delay, 2)
+        self.assertFalse(parse_robots_txt("User-agent: *\nDisallow: /\n").is_allowed("/page"))
+    
+    def test_groups_match_the_whole_product_token(self):
+        for agent in ("a", "web", "research", ""):
+            rules = parse_robots_txt(f"User-agent: *\nDisallow: /\n\nUser-agent: {agent}\nAllow: /x\n")
+            self.assertFalse(rules.is_allowed("/x"), agent)
+        rules = parse_robots_txt("User-agent: *\nDisallow: /\n\nUser-agent: webresearchagent/2.0\nAllow: /x\n",
+                                 user_agent="WebResearchAgent/1.0 (+https://example.com/bot)")
+        self.assertTrue(rules.is_allowed("/x"))
+    
+    def test_pages_and_robots_txt_are_requested_with_our_user_agent(self):
+        self.serve("/robots.txt", b"User-agent: *\nAllow: /\n", headers={"Content-Type": "text/plain"})
+        self.serve("/page", b"<html><body><p>Hello</p></body></html>")
+        self.scraper.scrape_url(self.base_url + "/page")
+        agents = {path: headers.get("User-Agent") for path, headers in _LocalHandler.requests}
+        self.assertEqual(agents, {"/robots.txt": self.robots.user_agent, "/page": self.robots.user_agent})
+    
+    def test_robots_txt_is_fetched_once_per_host(self):
+        self.serve("/robots.txt", b"User-agent: *\nDisallow: /admin\n", headers={"Content-Type": "text/plain"})
+        self.serve("/page", b"<html><body><p>Hello</p></body></html>")
+        self.assertIsNotNone(self.scraper.scrape_url(self.base_url + "/page"))
+        self.assertIsNone(self.scraper.scrape_url(self.base_url + "/admin/users"))
+        asyncio.run(self.scraper.ascrape_url(self.base_url + "/page"))
+        robots_requests = [path for path, _ in _LocalHandler.requests if path == "/robots.txt"]
+        self.assertEqual(len(robots_requests), 1)
+        self.assertNotIn("/admin/users", [path for path, _ in _LocalHandler.requests])
+    
+    def test_missing_and_unreachable_robots_txt(self):
+        self.robots = RobotsCache(http_client=HttpClient(max_retries=0))
+        self.assertTrue(self.robots.is_allowed(self.base_url + "/anything"))
+        self.assertFalse(self.robots.is_allowed("http://127.0.0.1:9/page"))
+        self.robots.is_allowed("http://127.0.0.1:9/other")
+        self.assertEqual(self.robots.fetches, 2)
+    
+    def test_crawl_delay_spaces_out_requests(self):
+        self.serve("/robots.txt", b"User-agent: *\nCrawl-delay: 0.2\n", headers={"Content-Type": "text/plain"})
+        for i in range(3):
+            self.serve(f"/page{i}", b"<html><body><p>Hello</p></body></html>")
+        started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            results = list(executor.map(self.scraper.scrape_url, [f"{self.base_url}/page{i}" for i in range(3)]))
+        self.assertTrue(all(results))
+        self.assertGreaterEqual(time.monotonic() - started, 0.4)
+
+class TestAnalysisPool(LocalServerTestCase):
+    PAGE = (b"<html><head><title>Tea</title><meta name='author' content='Ann Lee'></head><body><article>"
+            b"<p>Green tea research from the University of Tokyo.</p><ul><li>Sencha</li><li>Matcha</li></ul>"
+            b"</article></body></html>")
+    
+    @classmethod
+    def setUpClass(cls):
+        cls.pool = AnalysisPool(max_workers=2)
+    
+    @classmethod
+    def tearDownClass(cls):
+        cls.pool.close()
+    
+    def test_pool_matches_in_process_scrape(self):
+        self.serve("/tea", self.PAGE)
+        scraper = WebScraper(use_mock=False)
+        html = scraper.fetch_html(self.base_url + "/tea")
+        content, analysis = self.pool.analyze(self.base_url + "/tea", html, "green tea")
+        self.assertEqual(content.to_dict(), scraper.scrape_url(self.base_url + "/tea").to_dict())
+        self.assertEqual(set(analysis), {"relevance", "key_information", "reliability", "summary", "categories"})
+        self.assertEqual(analysis["key_information"]["key_points"], ["Green tea research from the University of Tokyo"])
+        async_content, _ = asyncio.run(self.pool.aanalyze(self.base_url + "/tea", html, "green tea"))
+        self.assertEqual(async_content.to_dict(), content.to_dict())
+    
+    def test_pool_and_in_process_relevance_agree(self):
+        pages = {
+            "/tea": self.PAGE,
+            "/coffee": b"<html><head><title>Coffee</title></head><body><article><p>Coffee and green tea both "
+                       b"contain caffeine.</p></article></body></html>",
+            "/bread": b"<html><head><title>Bread</title></head><body><article><p>Sourdough bread needs a "
+                      b"starter.</p></article></body></html>"
+        }
+        for path, page in pages.items():
+            self.serve(path, page)
+        scraper = WebScraper(use_mock=False)
+        analyzer = ContentAnalyzer(use_mock=True, ranking_index=BM25Index())
+        with mock.patch.object(self.pool, "ranking_index", BM25Index()):
+            for path in pages:
+                url = self.base_url + path
+                _, pooled = self.pool.analyze(url, scraper.fetch_html(url), "green tea")
+                in_process = analyzer.analyze_content(scraper.scrape_url(url), "green tea")
+                self.assertAlmostEqual(pooled["relevance"], in_process["relevance"])
+                self.assertAlmostEqual(pooled["key_information"]["topic_relevance"],
+                                       in_process["key_information"]["topic_relevance"])
+    
+    def test_mock_agent_uses_a_pool_it_is_given(self):
+        agent = WebResearchAgent(use_mock=True, max_results=3, analysis_pool=self.pool)
+        with mock.patch.object(self.pool, "submit", wraps=self.pool.submit) as submit:
+            result = agent.research("green tea")
+        self.assertIs(agent.analysis_pool, self.pool)
+        self.assertIs(agent.analyzer.ranking_index, self.pool.ranking_index)
+        self.assertEqual(submit.call_count, 3)
+        self.assertEqual(len(result["sources"]), 3)
+        expected = WebResearchAgent(use_mock=True, max_results=3).research("green tea")
+        self.assertEqual([source["url"] for source in result["sources"]],
+                         [source["url"] for source in expected["sources"]])
+
+class TestHtmlExtractor(unittest.TestCase):
+    def setUp(self):
+        self.scraper = WebScraper(use_mock=False)
+    
+    def test_content_container_and_ranking_table(self):
+        html = """<html><head><title>Top Universities</title>
+            <meta name="author" content="Alex"><meta property="og:type" content="article"></head>
+            <body><article><p>Ignored generic article.</p></article>
+            <div class="x article-body"><p> Intro paragraph. </p><p>  </p>
+            <table><tr><th>Rank</th><th>Name</th></tr><tr><td>1</td><td>MIT</td></tr>
+            <tr><th>2</th><td>Stanford</td></tr></table></div>
+            <ul><li>Main page</li></ul><ol><li>First</li><li>Second <ul><li>Nested</li></ul></li></ol>
+            <a href="#top">Skip</a><a href="/login">Log in</a><a href="/about"> About </a></body></html>"""
+        content = self.scraper._parse_html(html, "https://example.com")
+        self.assertEqual(content.title, "Top Universities")
+        self.assertEqual(content.metadata, {"author": "Alex", "og:type": "article"})
+        self.assertEqual(content.main_content,
+                         "Intro paragraph.\n\nRanking Table:\nHeaders: ['Rank', 'Name', '2']\n"
+                         "Rank 1: 1, MIT\nRank 2: 2, Stanford\n")
+        self.assertEqual(content.tables, [{"headers": ["Rank", "Name", "2"], "rows": [["1", "MIT"], ["Stanford"]]}])
+        self.assertEqual(content.lists, [{"type": "ol", "items": ["First", "Second Nested", "Nested"]},
+                                         {"type": "ul", "items": ["Nested"]}])
+        self.assertEqual(content.links, [{"text": "About", "url": "/about"}])
+    
+    def test_fallback_prefers_keyword_block(self):
+        filler = "Lemon trees need sun and water. " * 5
+        html = (f"<html><body><div><p>{filler}</p><div>  {filler} Top picks inside.  </div></div>"
+                f"<p>{filler}</p></body></html>")
+        content = self.scraper._parse_html(html, "https://example.com")
+        self.assertEqual(content.title, "No title")
+        self.assertTrue(content.main_content.startswith(filler.strip()))
+        self.assertIn("Top picks inside.", content.main_content)
+        self.assertTrue(content.main_content.endswith("\n"))
+
+class TestContentAnalyzer(unittest.TestCase):
+    def test_document_is_normalized_once(self):
+        content = {"title": "Tea Guide", "url": "https://example.com/tea",
+                   "main_content": "Green tea comes from Japan. Jane Doe founded Leaf Tea Company on Jan 5, 2020! "
+                                   "Tea research continues. Brewing matters"}
+        analyzer = ContentAnalyzer(use_mock=True)
+        analysis = analyzer.analyze_content(content, "green tea")
+        document = get_document(content["main_content"], content["title"])
+        with mock.patch("tools.text_analysis.SENTENCE_BOUNDARY") as boundary, \
+                mock.patch("tools.text_analysis.WORD") as word:
+            again = analyzer.extract_key_information(content, "green tea")
+            analyzer.summarize_content(content)
+        boundary.split.assert_not_called()
+        word.findall.assert_not_called()
+        self.assertEqual(again["key_points"], analysis["key_information"]["key_points"])
+        self.assertEqual(analysis["key_information"]["key_points"],
+                         ["Green tea comes from Japan", "Jane Doe founded Leaf Tea Company on Jan 5, 2020",
+                          "Tea research continues"])
+        self.assertEqual(sorted(analysis["key_information"]["mentions"]["people"]), ["Jane Doe", "Leaf Tea"])
+        self.assertEqual(analysis["summary"], "Tea Guide. Green tea comes from Japan. "
+                                              "Jane Doe founded Leaf Tea Company on Jan 5, 2020. "
+                                              "Tea research continues. Brewing matters.")
+        self.assertIs(get_document(content["main_content"], content["title"]), document)
+    
+    def test_analyze_batch_matches_single_analyses(self):
+        analyzer = ContentAnalyzer(use_mock=True, ranking_index=BM25Index())
+        scraper = WebScraper(use_mock=True)
+        contents = [scraper.scrape_url(f"https://site{i}.example.com/market-research") for i in range(8)]
+        contents.append({"title": "Markets", "main_content": "Market research. Shares rose.", "url": "https://blog.example.org"})
+        # Relevance depends on the corpus, so single analyses must see the whole batch in the index too
+        analyzer.index_documents(contents)
+        random.seed(7)
+        single = [analyzer.analyze_content(content, "market research") for content in contents]
+        random.seed(7)
+        self.assertEqual(analyzer.analyze_batch(contents, "market research"), single)
+        self.assertEqual(analyzer.analyze_batch([], "market research"), [])
+    
+    def test_relevance_does_not_depend_on_other_analyzers(self):
+        page = {"title": "Green tea", "main_content": "Green tea is brewed from tea leaves.", "url": "https://a.example"}
+        before = ContentAnalyzer(use_mock=True).analyze_relevance(page, "green tea")
+        busy = ContentAnalyzer(use_mock=True)
+        busy.analyze_batch([{"title": f"Tea {i}", "main_content": "green tea " * i, "url": f"https://b{i}.example"}
+                            for i in range(1, 20)], "green tea")
+        self.assertEqual(ContentAnalyzer(use_mock=True).analyze_relevance(page, "green tea"), before)
+        self.assertIsNot(busy.ranking_index, ContentAnalyzer(use_mock=True).ranking_index)
+    
+    def test_analyze_batch_makes_one_model_call(self):
+        model = mock.Mock()
+        model.analyze_batch.return_value = [{"relevance": 0.9}, {"relevance": 0.4}]
+        analyzer = ContentAnalyzer(ai_model=model)
+        contents = [{"title": "A", "main_content": "one", "url": "https://a.example"},
+                    {"title": "B", "main_content": "two", "url": "https://b.example"}]
+        self.assertEqual(analyzer.analyze_batch(contents, "q"), [{"relevance": 0.9}, {"relevance": 0.4}])
+        model.analyze_batch.assert_called_once_with(
+            [{"url": "https://a.example", "title": "A", "text": "one"},
+             {"url": "https://b.example", "title": "B", "text": "two"}], "q")
+
+class TestBM25Index(unittest.TestCase):
+    def reference_scores(self, docs, query, k1=1.2, b=0.75):
+        tokenized = [BM25Index.tokenize(doc) for doc in docs]
+        average = sum(len(tokens) for tokens in tokenized) / len(docs)
+        terms = list(dict.fromkeys(BM25Index.tokenize(query)))
+        idf = {term: math.log(1 + (len(docs) - sum(term in tokens for tokens in tokenized) + 0.5)
+                              / (sum(term in tokens for tokens in tokenized) + 0.5)) for term in terms}
+        best = sum(idf[term] * (k1 + 1) for term in terms)
+        scores = []
+        for tokens in tokenized:
+            score = 0.0
+            for term in terms:
+                tf = tokens.count(term)
+                score += idf[term] * tf * (k1 + 1) / (tf + k1 * (1 - b + b * len(tokens) / average))
+            scores.append(score / best)
+        return scores
+    
+    def test_scores_match_reference_bm25(self):
+        docs = ["green tea and black tea", "coffee beans roasted dark", "tea ceremony in japan with green tea",
+                "the market for tea", "unrelated words only here"]
+        index = BM25Index()
+        for i, doc in enumerate(docs):
+            index.add(str(i), Counter(BM25Index.tokenize(doc)))
+        scores = index.score("green tea", [str(i) for i in range(len(docs))] + ["missing"])
+        for score, expected in zip(scores, self.reference_scores(docs, "green tea") + [0.0]):
+            self.assertAlmostEqual(score, expected)
+        self.assertEqual(scores[1], 0.0)
+    
+    def test_statistics_are_updated_incrementally(self):
+        index = BM25Index(max_documents=2)
+        index.add("a", {"tea": 1})
+        self.assertFalse(index.add("a", {"tea": 1}))
+        index.add("b", {"coffee": 1})
+        index.add("c", {"coffee": 2})
+        self.assertEqual(len(index), 2)
+        self.assertNotIn("a", index)
+        self.assertEqual(index.score("tea", ["b", "c"]).tolist(), [0.0, 0.0])
+    
+    def test_relevance_is_deterministic_and_ranks_matching_pages_first(self):
+        analyzer = ContentAnalyzer(use_mock=True, ranking_index=BM25Index())
+        on_topic = {"title": "Green tea", "main_content": "Green tea is brewed at low temperature.", "url": "a"}
+        off_topic = {"title": "Coffee", "main_content": "Espresso is brewed under pressure.", "url": "b"}
+        analyses = analyzer.analyze_batch([off_topic, on_topic], "green tea")
+        self.assertGreater(analyses[1]["relevance"], analyses[0]["relevance"])
+        self.assertEqual(analyses[0]["relevance"], 0.0)
+        self.assertEqual(analyzer.analyze_relevance(on_topic, "green tea"), analyses[1]["relevance"])
+
+class TestKeywordMatcher(unittest.TestCase):
+    def test_overlapping_matches(self):
+        matcher = KeywordMatcher(["he", "she", "his", "hers"])
+        self.assertEqual(matcher.matched_keywords("USHERS"), ["he", "she", "hers"])
+    
+    def test_labels_follow_keyword_priority(self):
+        keywords = {f"term{i}x": f"Category {i % 40}" for i in range(3000)}
+        text = "Notes on TERM7x, term2999x and term12xy; nothing on term3000x."
+        matcher = KeywordMatcher(keywords)
+        expected = [label for keyword, label in keywords.items() if keyword in text.lower()]
+        self.assertEqual(matcher.matched_labels(text), list(dict.fromkeys(expected)))
+        self.assertEqual(matcher.matched_labels(text, limit=1), ["Category 7"])
+    
+    def test_custom_taxonomy(self):
+        analyzer = ContentAnalyzer(use_mock=True, taxonomy={"espresso": "Coffee", "oolong": "Tea", "cup": "Coffee"})
+        content = {"title": "Oolong or espresso?", "main_content": "A cup of either."}
+        self.assertEqual(analyzer.categorize_content(content), ["Coffee", "Tea"])
+
+class TestContradictionDetector(unittest.TestCase):
+    SOURCES = [
+        {"url": "https://a.example/", "main_content": "The population of Tokyo is 14 million. Acme Corp was founded "
+                                                      "in 1998. Jane Doe is the chief executive of Acme Corp."},
+        {"url": "https://b.example/", "main_content": "Tokyo has a population of 14.02 million. Acme Corp was "
+                                                      "founded in 2001. John Smith is the chief executive of Acme Corp."},
+        {"url": "https://c.example/", "main_content": "Acme Corp reported revenue of $5.2 billion."},
+        {"url": "https://d.example/", "main_content": "Acme Corp reported revenue of $4.1 billion."}
+    ]
+    
+    def test_extracts_claims(self):
+        claims = ContradictionDetector().extract_claims(self.SOURCES[0])
+        self.assertEqual({(claim.key, claim.value) for claim in claims}, {
+            (("tokyo", "population", "number"), 14e6),
+            (("acme corp", "founded", "year"), 1998),
+            (("acme corp", "chief executive", "role"), "Jane Doe")
+        })
+    
+    def test_finds_colliding_claims_only(self):
+        contradictions = ContradictionDetector().find(self.SOURCES)
+        topics = {item["topic"]: {source["url"] for source in item["sources"]} for item in contradictions}
+        # 14 and 14.02 million agree within the tolerance
+        self.assertEqual(topics, {
+            "founded of Acme Corp": {"https://a.example/", "https://b.example/"},
+            "chief executive of Acme Corp": {"https://a.example/", "https://b.example/"},
+            "revenue of Acme Corp": {"https://c.example/", "https://d.example/"}
+        })
+    
+    def test_analyzer_is_deterministic(self):
+        analyzer = ContentAnalyzer(use_mock=True)
+        self.assertEqual(analyzer.find_contradictions(self.SOURCES[:1]), [])
+        self.assertEqual(analyzer.find_contradictions(self.SOURCES), analyzer.find_contradictions(self.SOURCES))
+        self.assertEqual(len(analyzer.find_contradictions(self.SOURCES)), 3)
+
+class TestNearDuplicates(unittest.TestCase):
+    ARTICLE = " ".join(f"Sentence {i} about orchard yields and lemon prices in the valley." for i in range(40))
+    
+    def page(self, url: str, text: str) -> ScrapedContent:
+        return ScrapedContent(title=url, url=url, main_content=text, metadata={}, tables=[], lists=[], links=[])
+    
+    def test_collapses_mirrors(self):
+        pages = [
+            self.page("https://origin.example/", self.ARTICLE),
+            self.page("https://other.example/", "An unrelated article on tennis rankings. " * 20),
+            self.page("https://mirror.example/", self.ARTICLE + " Syndicated from origin."),
+            self.page("https://empty.example/", "")
+        ]
+        kept, report = NearDuplicateDetector().deduplicate(pages)
+        self.assertEqual(kept, [0, 1, 3])
+        self.assertEqual(report[0]["url"], "https://origin.example/")
+        self.assertEqual([entry["url"] for entry in report[0]["merged"]], ["https://mirror.example/"])
+        self.assertGreaterEqual(report[0]["merged"][0]["similarity"], 0.9)
+    
+    def test_threshold(self):
+        # Last quarter rewritten: shingle similarity of about 0.72
+        variant = self.ARTICLE.rsplit("Sentence 30", 1)[0] + "Tennis rankings were updated this week. " * 10
+        pages = [self.page("https://a.example/", self.ARTICLE), self.page("https://b.example/", variant)]
+        self.assertEqual(NearDuplicateDetector().deduplicate(pages)[0], [0, 1])
+        self.assertEqual(NearDuplicateDetector(threshold=0.7).deduplicate(pages)[0], [0])
+    
+    def test_agent_merges_before_analysis(self):
+        pages = {"https://example-lemon.com/page1": self.ARTICLE, "https://example-lemon.com/page2": self.ARTICLE,
+                 "https://example-lemon.com/page3": "Tennis rankings were updated this week. " * 20}
+        
+        async def ascrape(url):
+            return self.page(url, pages[url])
+        
+        for mode in ("sequential", "concurrent", "async"):
+            with self.subTest(mode=mode):
+                agent = WebResearchAgent(use_mock=True, max_results=3, concurrent=mode == "concurrent")
+                with mock.patch.object(agent.scraper, "scrape_url", side_effect=lambda url: self.page(url, pages[url])), \
+                        mock.patch.object(agent.scraper, "ascrape_url", side_effect=ascrape), \
+                        mock.patch.object(agent.analyzer, "analyze_content") as analyze_content, \
+                        mock.patch.object(agent.analyzer, "analyze_batch", wraps=agent.analyzer.analyze_batch) as batch:
+                    report = asyncio.run(agent.aresearch("lemon")) if mode == "async" else agent.research("lemon")
+                analyze_content.assert_not_called()
+                self.assertEqual(len(batch.call_args[0][0]), 2)
+                self.assertEqual(report["duplicates"][0]["merged"][0]["url"], "https://example-lemon.com/page2")
+
+class TestStreamingResearch(unittest.TestCase):
+    def setUp(self):
+        self.agent = WebResearchAgent(use_mock=True, max_results=4)
+    
+    def test_incremental_report_matches_generate_report(self):
+        analyses = [{"url": f"https://example.com/{i}", "title": str(i), "analysis": {
+            "relevance": relevance, "summary": f"Summary {i}.", "key_information": {"key_points": [f"Point {i}"]},
+            "reliability": {"reliability_score": 0.5}}} for i, relevance in enumerate([0.2, 0.9, 0.2, 0.5])]
+        report = IncrementalReport("query")
+        for analysis in analyses:
+            report.add_analysis(analysis)
+        self.assertEqual(report.to_dict(), generate_report("query", analyses, [], []))
+        self.assertEqual([source["url"] for source in report.to_dict()["sources"]],
+                         ["https://example.com/1", "https://example.com/3", "https://example.com/0"])
+    
+    def test_event_order(self):
+        events = list(self.agent.iter_research("latest lemon tree news"))
+        names = [event["event"] for event in events]
+        self.assertEqual(names[:2], ["query", "search"])
+        self.assertEqual(names[-2:], ["contradictions", "report"])
+        self.assertEqual(sorted(names[2:-2]), ["news"] + ["source"] * 4)
+        report = events[-1]["data"]
+        self.assertEqual(len(report["sources"]), 3)
+        self.assertGreater(len(report["news"]), 0)
+    
+    def test_slow_url_is_dropped_after_timeout(self):
+        self.agent.url_timeout = 0.2
+        original_fetch = self.agent._fetch_for_stream
+        release = threading.Event()
+        
+        def slow_fetch(result, query):
+            if result.url.endswith("page2"):
+                release.wait(5)
+            return original_fetch(result, query)
+        
+        with mock.patch.object(self.agent, "_fetch_for_stream", side_effect=slow_fetch):
+            started = time.monotonic()
+            events = list(self.agent.iter_research("lemon tree"))
+            elapsed = time.monotonic() - started
+        release.set()
+        
+        self.assertLess(elapsed, 2)
+        self.assertEqual(events[-1]["event"], "report")
+        sources = [event["data"]["url"] for event in events if event["event"] == "source"]
+        self.assertEqual(len(sources), 3)
+        self.assertFalse(any(url.endswith("page2") for url in sources))
+    
+    def test_async_events(self):
+        async def collect():
+            return [event async for event in self.agent.aiter_research("lemon tree")]
+        events = asyncio.run(collect())
+        self.assertEqual([event["event"] for event in events],
+                         ["query", "search"] + ["source"] * 4 + ["contradictions", "report"])
+    
+    def test_sse_endpoint(self):
+        import app
+        with mock.patch.object(app, "create_research_agent", return_value=self.agent):
+            response = app.app.test_client().get("/research/stream?query=lemon")
+            body = response.get_data(as_text=True)
+        self.assertEqual(response.mimetype, "text/event-stream")
+        messages = [message for message in body.split("\n\n") if message]
+        self.assertTrue(messages[0].startswith("event: query\ndata: "))
+        self.assertTrue(messages[-1].startswith("event: report\ndata: "))
+        self.assertEqual(json.loads(messages[-1].split("data: ", 1)[1])["query"], "lemon")
+
+class TestToolRegistry(unittest.TestCase):
+    def test_shared_instances(self):
+        registry = ToolRegistry(use_mock=True)
+        self.assertIs(registry.scraper.http, registry.http)
+        self.assertIs(registry.web_search.cache, registry.search_cache)
+        self.assertIs(registry.scraper.page_cache, registry.page_cache)
+        self.assertIs(registry.agent.analyzer, registry.analyzer)
+    
+    def test_readiness(self):
+        registry = ToolRegistry(use_mock=True)
+        self.assertFalse(registry.readiness()["ready"])
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            list(executor.map(lambda _: registry.warm(), range(8)))
+        self.assertTrue(registry.readiness()["ready"])
+    
+    def test_concurrent_requests_share_tools(self):
+        registry = ToolRegistry(use_mock=True)
+        registry.warm()
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            reports = list(executor.map(lambda i: registry.agent.research(f"lemon tree {i % 2}"), range(16)))
+        self.assertTrue(all(report.get("sources") for report in reports))
+    
+    def test_app_routes_use_registry(self):
+        import app
+        registry = ToolRegistry(use_mock=True)
+        with mock.patch.object(app, "_registry", registry):
+            client = app.app.test_client()
+            response = client.get("/ready")
+            self.assertEqual(response.status_code, 200)
+            self.assertTrue(response.get_json()["ready"])
+            self.assertIs(app.create_research_agent(), registry.agent)
+    
+    def test_news_aggregator_does_not_reload_env(self):
+        with mock.patch.dict(os.environ, {"NEWSAPI_KEY": "from-env"}):
+            self.assertEqual(NewsAggregator(use_mock=True).api_key, "from-env")
+            self.assertEqual(NewsAggregator(use_mock=True, api_key="explicit").api_key, "explicit")
+
+class TestJobQueue(unittest.TestCase):
+    def setUp(self):
+        self.release = threading.Event()
+        self.runs = Counter()
+        
+        def slow(job):
+            self.runs[job.params["query"]] += 1
+            while not self.release.wait(0.01):
+                job.check()
+            job.emit({"event": "step", "data": 1})
+            return job.params["query"].upper()
+        
+        self.queue = JobQueue({"slow": slow}, max_workers=1, max_queued=2)
+        self.addCleanup(self.queue.close)
+        self.addCleanup(self.release.set)
+    
+    def test_deduplicates_inflight_jobs(self):
+        first = self.queue.submit("slow", {"query": "Lemon  tree"})
+        second = self.queue.submit("slow", {"query": "lemon tree"})
+        self.assertIs(first, second)
+        self.release.set()
+        self.assertTrue(first.wait(5))
+        self.assertEqual((first.status, first.result), ("succeeded", "LEMON  TREE"))
+        self.assertEqual(self.runs["Lemon  tree"], 1)
+        self.assertIsNot(self.queue.submit("slow", {"query": "lemon tree"}), first)
+    
+    def test_bounded_queue(self):
+        running = self.queue.submit("slow", {"query": "a"})
+        while running.status == "queued":
+            time.sleep(0.005)
+        self.queue.submit("slow", {"query": "b"})
+        self.queue.submit("slow", {"query": "c"})
+        with self.assertRaises(JobQueueFull):
+            self.queue.submit("slow", {"query": "d"})
+    
+    def test_resubmit_after_cancel_starts_a_new_job(self):
+        running = self.queue.submit("slow", {"query": "a"})
+        while running.status == "queued":
+            time.sleep(0.005)
+        self.queue.cancel(running.id)
+        resubmitted = self.queue.submit("slow", {"query": "a"})
+        self.assertIsNot(resubmitted, running)
+        self.assertTrue(running.wait(5))
+        self.assertEqual(running.status, "cancelled")
+        self.release.set()
+        self.assertTrue(resubmitted.wait(5))
+        self.assertEqual((resubmitted.status, resubmitted.result), ("succeeded", "A"))
+    
+    def test_cancelled_jobs_free_queue_capacity(self):
+        running = self.queue.submit("slow", {"query": "a"})
+        while running.status == "queued":
+            time.sleep(0.005)
+        for query in "bcdef":
+            self.queue.cancel(self.queue.submit("slow", {"query": query}).id)
+        self.queue.submit("slow", {"query": "g"})
+        self.queue.submit("slow", {"query": "h"})
+        with self.assertRaises(JobQueueFull):
+            self.queue.submit("slow", {"query": "i"})
+    
+    def test_expired_job_is_not_shared(self):
+        expired = self.queue.submit("slow", {"query": "a"}, deadline=0)
+        self.assertIsNot(self.queue.submit("slow", {"query": "a"}), expired)
+    
+    def test_cancel_and_deadline(self):
+        running = self.queue.submit("slow", {"query": "a"})
+        queued = self.queue.submit("slow", {"query": "b"}, deadline=0.05)
+        self.assertTrue(self.queue.cancel(running.id))
+        self.assertTrue(running.wait(5))
+        self.assertEqual(running.status, "cancelled")
+        self.assertTrue(queued.wait(5))
+        self.assertEqual(queued.status, "expired")
+        self.assertFalse(self.queue.cancel(running.id))
+    
+    def test_events_and_store(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "jobs.db")
+            queue = JobQueue({"echo": lambda job: job.emit({"event": "step", "data": 1}) or "ok"},
+                             store=JobStore(path))
+            job = queue.submit("echo", {"query": "x"})
+            self.assertEqual(list(job.iter_events(timeout=5)), [{"event": "step", "data": 1}])
+            queue.close()
+            self.assertEqual(queue.store.get(job.id)["result"], "ok")
+            queue.store.close()
+            
+            stalled = JobStore(path)
+            record = stalled.get(job.id)
+            stalled._conn.execute("UPDATE jobs SET status = 'running' WHERE id = ?", (job.id,))
+            stalled._conn.commit()
+            stalled.close()
+            restarted = JobStore(path)
+            self.assertEqual(restarted.get(job.id)["status"], "failed")
+            self.assertEqual(record["status"], "succeeded")
+            restarted.close()
+    
+    def test_job_endpoints(self):
+        import app
+        queue = JobQueue({"research": app.run_research_job, "scrape": app.run_scrape_job}, max_workers=2)
+        self.addCleanup(queue.close)
+        agent = WebResearchAgent(use_mock=True, max_results=3)
+        with mock.patch.object(app, "_job_queue", queue), \
+                mock.patch.object(app, "create_research_agent", return_value=agent):
+            client = app.app.test_client()
+            response = client.post("/jobs", json={"kind": "research", "query": "lemon tree"})
+            self.assertEqual(response.status_code, 202)
+            job_id = response.get_json()["id"]
+            body = client.get(f"/jobs/{job_id}/events").get_data(as_text=True)
+            self.assertIn("event: source", body)
+            status = client.get(f"/jobs/{job_id}").get_json()
+            self.assertEqual(status["status"], "succeeded")
+            self.assertEqual(status["result"]["query"], "lemon tree")
+            self.assertEqual(client.get("/jobs/unknown").status_code, 404)
+            self.assertEqual(client.post("/jobs", json={"kind": "scrape"}).status_code, 400)
+
+class TestSingleFlight(LocalServerTestCase):
+    def test_concurrent_calls_share_one_execution(self):
+        flights = SingleFlight()
+        release = threading.Event()
+        runs = []
+        
+        def fetch():
+            runs.append(1)
+            release.wait(5)
+            return ["result"]
+        
+        with ThreadPoolExecutor(max_workers=5) as executor:
+            futures = [executor.submit(flights.do, "key", fetch) for _ in range(5)]
+            while flights.stats()["calls"] < 5:
+                time.sleep(0.005)
+            release.set()
+            results = [future.result() for future in futures]
+        self.assertEqual(len(runs), 1)
+        self.assertTrue(all(result is results[0] for result in results))
+        self.assertEqual(flights.stats(), {"calls": 5, "executions": 1, "coalesced": 4, "in_flight": 0})
+        self.assertEqual(flights.do("key", lambda: "again"), "again")
+    
+    def test_errors_are_shared(self):
+        flights = SingleFlight()
+        
+        def fail():
+            time.sleep(0.05)
+            raise ValueError("boom")
+        
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            futures = [executor.submit(flights.do, "key", fail) for _ in range(3)]
+            for future in futures:
+                self.assertRaises(ValueError, future.result)
+        self.assertEqual(flights.stats()["in_flight"], 0)
+    
+    def test_async_calls_share_one_task(self):
+        flights = SingleFlight()
+        runs = []
+        
+        async def fetch():
+            runs.append(1)
+            await asyncio.sleep(0.05)
+            return "result"
+        
+        async def run_all():
+            return await asyncio.gather(*(flights.ado("key", fetch) for _ in range(10)))
+        
+        self.assertEqual(asyncio.run(run_all()), ["result"] * 10)
+        self.assertEqual(len(runs), 1)
+        self.assertEqual(flights.stats()["coalesced"], 9)
+    
+    def test_scraper_coalesces_identical_scrapes(self):
+        def slow_status(request):
+            time.sleep(0.2)
+            return 200
+        
+        self.serve("/page", b"<html><title>Shared</title><body><p>Hello</p></body></html>", status=slow_status)
+        flights = SingleFlight()
+        scraper = WebScraper(use_mock=False, respect_robots_txt=False, singleflight=flights)
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            results = list(executor.map(scraper.scrape_url, [self.base_url + "/page"] * 4))
+        self.assertTrue(all(result.title == "Shared" for result in results))
+        self.assertEqual(len([path for path, _ in _LocalHandler.requests if path == "/page"]), 1)
+        self.assertEqual(flights.stats()["coalesced"], 3)
+
+class TestCorpus(unittest.TestCase):
+    def setUp(self):
+        self.corpus = Corpus()
+        self.addCleanup(self.corpus.close)
+        self.pages = [
+            self.page("https://a.example/lemons", "Growing lemon trees",
+                      "Lemon trees need full sun and well drained soil. Water the tree deeply once a week."),
+            self.page("https://b.example/oranges", "Orange harvest",
+                      "Orange trees are harvested in winter. The fruit keeps for weeks."),
+            self.page("https://c.example/cars", "Car repair", "Change the oil every five thousand miles.")
+        ]
+        self.pages[0].metadata["author"] = "Ann"
+    
+    def page(self, url: str, title: str, text: str) -> ScrapedContent:
+        return ScrapedContent(title=title, url=url, main_content=text, metadata={}, tables=[], lists=[], links=[])
+    
+    def test_add_get_and_search(self):
+        for page in self.pages:
+            self.corpus.add(page)
+        stored = self.corpus.get("https://a.example/lemons")
+        self.assertEqual((stored.title, stored.main_content, stored.metadata),
+                         (self.pages[0].title, self.pages[0].main_content, {"author": "Ann"}))
+        self.assertIsNone(self.corpus.get("https://unknown.example/"))
+        self.assertEqual(self.corpus.stats(), {"pages": 3, "hits": 1, "misses": 1})
+        
+        hits = self.corpus.search("lemon tree watering")
+        self.assertEqual([hit.url for hit in hits], ["https://a.example/lemons"])
+        self.assertEqual(hits[0].coverage, 2 / 3)
+        self.assertEqual([hit.url for hit in self.corpus.search("orange fruit")], ["https://b.example/oranges"])
+        self.assertEqual(self.corpus.search("the and of"), [])
+        
+        self.corpus.add(self.page("https://c.example/cars", "Car repair", "Rotate the tyres of your lemon."))
+        self.assertEqual(len(self.corpus), 3)
+        self.assertEqual(len(self.corpus.search("lemon")), 2)
+        self.corpus.set_analysis("https://a.example/lemons", {"relevance_score": 0.9}, "lemon tree")
+        self.assertEqual(self.corpus.search("lemon trees")[0].analysis, {"relevance_score": 0.9})
+    
+    def test_stale_pages_are_not_reused(self):
+        corpus = Corpus(max_age=60)
+        self.addCleanup(corpus.close)
+        corpus.add(self.pages[0])
+        with mock.patch("tools.corpus.time.time", return_value=time.time() + 120):
+            self.assertIsNone(corpus.get(self.pages[0].url))
+            self.assertEqual(corpus.search("lemon"), [])
+            self.assertEqual(corpus.purge(), 1)
+        self.assertEqual(len(corpus), 0)
+    
+    def test_research_reuses_stored_pages(self):
+        agent = WebResearchAgent(use_mock=True, max_results=3, corpus=self.corpus)
+        first = agent.research("lemon tree")
+        self.assertEqual(len(self.corpus), 3)
+        with mock.patch.object(agent.scraper, "scrape_url", side_effect=AssertionError("scraped again")), \
+                mock.patch.object(agent.scraper, "ascrape_url", side_effect=AssertionError("scraped again")):
+            second = agent.research("lemon tree")
+            third = asyncio.run(agent.aresearch("lemon tree"))
+        self.assertEqual([source["url"] for source in second["sources"]],
+                         [source["url"] for source in first["sources"]])
+        self.assertEqual(len(third["sources"]), 3)
+    
+    def test_research_reuses_stored_analyses_for_the_same_query(self):
+        agent = WebResearchAgent(use_mock=True, max_results=3, corpus=self.corpus)
+        first = agent.research("lemon tree")
+        for concurrent in (False, True):
+            agent.concurrent = concurrent
+            with mock.patch.object(agent.analyzer, "analyze_batch", wraps=agent.analyzer.analyze_batch) as batch, \
+                    mock.patch.object(agent.analyzer, "analyze_content", side_effect=AssertionError("analyzed again")):
+                second = agent.research("lemon tree")
+                events = list(agent.iter_research("lemon tree"))
+            batch.assert_called_once_with([], "lemon tree")
+            self.assertEqual(second["sources"], first["sources"])
+            self.assertEqual(sorted(events[-1]["data"]["sources"], key=lambda source: source["url"]),
+                             sorted(first["sources"], key=lambda source: source["url"]))
+        
+        with mock.patch.object(agent.analyzer, "analyze_batch", wraps=agent.analyzer.analyze_batch) as batch:
+            agent.research("lemon tree price")
+        self.assertEqual(len(batch.call_args[0][0]), 3)
+    
+    def test_local_pages_augment_or_replace_web_search(self):
+        for page in self.pages:
+            self.corpus.add(page)
+        agent = WebResearchAgent(use_mock=True, max_results=2, corpus=self.corpus)
+        report = agent.research("lemon trees")
+        urls = {source["url"] for source in report["sources"]}
+        self.assertEqual(len(urls), 3)
+        self.assertIn("https://a.example/lemons", urls)
+        
+        agent = WebResearchAgent(use_mock=True, max_results=2, corpus=self.corpus, corpus_mode="prefer")
+        with mock.patch.object(agent.web_search, "search", side_effect=AssertionError("searched the web")):
+            report = agent.research("trees")
+        self.assertEqual({source["url"] for source in report["sources"]},
+                         {"https://a.example/lemons", "https://b.example/oranges"})
+        with self.assertRaises(ValueError):
+            WebResearchAgent(use_mock=True, corpus_mode="only")
+
+class TestSerialization(unittest.TestCase):
+    def setUp(self):
+        self.content = ScrapedContent("Tea", "https://example.com/tea", "Green tea — 3% caffeine.",
+                                      metadata={"author": "Ann"}, tables=[{"headers": ["a"], "rows": [["1"]]}],
+                                      lists=[{"type": "ul", "items": ["x"]}], links=[{"text": "t", "url": "/t"}])
+    
+    def test_models_round_trip(self):
+        search_result = SearchResult("Tea", "https://example.com/tea", "snippet", "2024-01-01")
+        article = NewsArticle("Tea news", "Source", "https://example.com/news", "2024-01-02")
+        for model in (self.content, search_result, article):
+            self.assertFalse(hasattr(model, "__dict__"))
+            restored = type(model).from_dict(serialization.loads(serialization.dumps(model)))
+            self.assertEqual(restored.to_dict(), model.to_dict())
+    
+    def test_nested_values(self):
+        payload = {"sources": [self.content], "tags": {"tea"}, 1: "int key", "when": datetime.date(2024, 1, 2)}
+        data = serialization.loads(serialization.dumps(payload))
+        self.assertEqual(data["sources"][0]["main_content"], "Green tea — 3% caffeine.")
+        self.assertEqual((data["tags"], data["1"], data["when"]), (["tea"], "int key", "2024-01-02"))
+        self.assertEqual(serialization.dumps({"b": 1, "a": 2}, sort_keys=True), b'{"a":2,"b":1}')
+    
+    def test_standard_library_fallback(self):
+        payload = {"sources": [self.content], "count": 2}
+        expected = serialization.dumps(payload)
+        with mock.patch.object(serialization, "orjson", None):
+            self.assertEqual(serialization.dumps(payload), expected)
+            self.assertEqual(serialization.loads(expected), serialization.loads(serialization.dumps_text(payload)))
+        self.assertEqual(serialization.dumps([2 ** 70]), b"[1180591620717411303424]")
+    
+    def test_scraped_content_defaults(self):
+        content = ScrapedContent("Title", "https://example.com/", "Body")
+        self.assertEqual((content.metadata, content.tables, content.lists, content.links), ({}, [], [], []))
+
+class _FakeProvider(SearchProvider):
+    def __init__(self, name: str, delay: float = 0.0, results=None, error: Exception = None):
+        self.name = name
+        self.delay = delay
+        self.results = results if results is not None else [SearchResult(name, f"https://{name}.example/", "")]
+        self.error = error
+        self.calls = 0
+    
+    def search(self, query, num_results, time_range=None, language="en", offset=0):
+        self.calls += 1
+        time.sleep(self.delay)
+        if self.error:
+            raise self.error
+        return self.results
+    
+    async def asearch(self, query, num_results, time_range=None, language="en", offset=0):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.error:
+            raise self.error
+        return self.results
+
+class TestHedgedSearch(unittest.TestCase):
+    def test_slow_primary_is_hedged(self):
+        primary, backup = _FakeProvider("primary", delay=1.0), _FakeProvider("backup", delay=0.01)
+        search = HedgedSearch([primary, backup], hedge_after=0.05)
+        self.addCleanup(search.close)
+        started = time.monotonic()
+        self.assertEqual(search.search("lemon", 5)[0].title, "backup")
+        self.assertLess(time.monotonic() - started, 0.5)
+        self.assertEqual((search.stats()["hedged"], search.stats()["wins"]), (1, {"backup": 1}))
+    
+    def test_stalled_primary_does_not_delay_hedges_under_load(self):
+        release = threading.Event()
+        
+        class Stalled(_FakeProvider):
+            def search(self, query, num_results, time_range=None, language="en", offset=0):
+                release.wait(5)
+                return super().search(query, num_results, time_range, language, offset)
+        
+        search = HedgedSearch([Stalled("primary"), _FakeProvider("backup", delay=0.01)], hedge_after=0.1,
+                              max_workers=2)
+        self.addCleanup(search.close)
+        self.addCleanup(release.set)
+        
+        def timed_search(_):
+            started = time.monotonic()
+            self.assertEqual(search.search("lemon", 5)[0].title, "backup")
+            return time.monotonic() - started
+        
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            latencies = list(executor.map(timed_search, range(4)))
+        self.assertLess(max(latencies), 0.5)
+        stats = search.stats()
+        self.assertEqual(stats["wins"], {"backup": 4})
+        self.assertEqual(stats["in_flight"]["primary"], 2)
+        self.assertEqual(stats["hedged"] + stats["skipped"], 4)
+    
+    def test_fast_primary_is_not_hedged(self):
+        primary, backup = _FakeProvider("primary"), _FakeProvider("backup")
+        search = HedgedSearch([primary, backup], hedge_after=0.5)
+        self.addCleanup(search.close)
+        self.assertEqual(search.search("lemon", 5)[0].title, "primary")
+        self.assertEqual((backup.calls, search.stats()["hedged"]), (0, 0))
+    
+    def test_failures_and_empty_answers_hedge_immediately(self):
+        broken = _FakeProvider("broken", error=RuntimeError("HTTP 500"))
+        empty = _FakeProvider("empty", results=[])
+        backup = _FakeProvider("backup")
+        search = HedgedSearch([broken, empty, backup], hedge_after=5)
+        self.addCleanup(search.close)
+        started = time.monotonic()
+        with mock.patch("builtins.print"):
+            self.assertEqual(search.search("lemon", 5)[0].title, "backup")
+            self.assertLess(time.monotonic() - started, 1)
+            self.assertEqual(HedgedSearch([broken, empty]).search("lemon", 5), [])
+    
+    def test_timeout_bounds_the_wait(self):
+        search = HedgedSearch([_FakeProvider("a", delay=1.0), _FakeProvider("b", delay=1.0)],
+                              hedge_after=0.02, timeout=0.1)
+        self.addCleanup(search.close)
+        started = time.monotonic()
+        with mock.patch("builtins.print"):
+            self.assertEqual(search.search("lemon", 5), [])
+        self.assertLess(time.monotonic() - started, 0.5)
+        self.assertEqual(search.stats()["timeouts"], 1)
+    
+    def test_hedge_delay_follows_latency_quantile(self):
+        primary = _FakeProvider("primary")
+        search = HedgedSearch([primary], initial_hedge_delay=2.0, min_samples=20)
+        self.addCleanup(search.close)
+        self.assertEqual(search.hedge_delay(primary), 2.0)
+        for i in range(100):
+            search.histograms["primary"].record(0.5 if i >= 95 else 0.1)
+        self.assertAlmostEqual(search.hedge_delay(primary), 0.1, delta=0.025)
+        
+        histogram = LatencyHistogram()
+        self.assertIsNone(histogram.quantile(0.5))
+        for value in (0.01, 0.02, 0.03, 5.0):
+            histogram.record(value)
+        snapshot = histogram.snapshot()
+        self.assertEqual((snapshot["count"], snapshot["max"], snapshot["p99"]), (4, 5.0, 5.0))
+        self.assertAlmostEqual(snapshot["p50"], 0.02, delta=0.005)
+    
+    def test_async_hedge_cancels_the_loser(self):
+        primary, backup = _FakeProvider("primary", delay=1.0), _FakeProvider("backup", delay=0.01)
+        search = HedgedSearch([primary, backup], hedge_after=0.05)
+        self.addCleanup(search.close)
+        started = time.monotonic()
+        results = asyncio.run(search.asearch("lemon", 5))
+        self.assertEqual(results[0].title, "backup")
+        self.assertLess(time.monotonic() - started, 0.5)
+        # The cancelled call still counts towards the primary's latency tail
+        self.assertEqual(search.stats()["latency"]["primary"]["count"], 1)
+    
+    def test_web_search_tool_uses_providers(self):
+        corpus = Corpus()
+        self.addCleanup(corpus.close)
+        corpus.add(ScrapedContent("Lemon care", "https://a.example/lemons", "Lemon trees need sun."))
+        tool = WebSearchTool(providers=[_FakeProvider("slow", delay=1.0), CorpusSearchProvider(corpus)],
+                             hedge_after=0.05, singleflight=SingleFlight())
+        self.assertFalse(tool.use_mock)
+        self.assertEqual([result.url for result in tool.search("lemon trees", 5)], ["https://a.example/lemons"])
+        self.assertEqual(tool.stats()["wins"], {"corpus": 1})
+
+class _PagedProvider(SearchProvider):
+    """Serves `total` ranked results; each page also repeats the last URL of the previous page."""
+    
+    name = "paged"
+    
+    def __init__(self, total: int, delay: float = 0.0):
+        self.total = total
+        self.delay = delay
+        self.offsets = []
+    
+    def search(self, query, num_results, time_range=None, language="en", offset=0):
+        self.offsets.append(offset)
+        time.sleep(self.delay)
+        ranks = range(max(0, offset - 1) if offset else 0, min(offset + num_results, self.total))
+        return [SearchResult(f"Result {rank}", f"https://paged.example/{rank}", "") for rank in ranks]
+
+class TestSearchPagination(unittest.TestCase):
+    def make_tool(self, provider: SearchProvider) -> WebSearchTool:
+        return WebSearchTool(providers=[provider], singleflight=SingleFlight())
+    
+    def test_pages_are_deduplicated_and_capped(self):
+        tool = self.make_tool(_PagedProvider(total=100))
+        results = list(tool.iter_search("lemon", num_results=35, page_size=10))
+        self.assertEqual([result.url for result in results], [f"https://paged.example/{rank}" for rank in range(35)])
+    
+    def test_empty_page_ends_paging(self):
+        provider = _PagedProvider(total=23)
+        tool = self.make_tool(provider)
+        pages = list(tool.iter_search_pages("lemon", num_results=100, page_size=10, max_concurrent_pages=1))
+        self.assertEqual([len(page) for page in pages], [10, 10, 3])
+        self.assertEqual(provider.offsets, [0, 10, 20, 30])
+    
+    def test_short_page_does_not_end_paging(self):
+        class ShortFirstPage(_PagedProvider):
+            def search(self, query, num_results, time_range=None, language="en", offset=0):
+                page = super().search(query, num_results, time_range, language, offset)
+                return page[:9] if offset == 0 else page
+        
+        tool = self.make_tool(ShortFirstPage(total=100))
+        results = list(tool.iter_search("lemon", num_results=30, page_size=10))
+        self.assertEqual(len(results), 30)
+        self.assertEqual(results[8].url, "https://paged.example/8")
+    
+    def test_failed_page_is_retried_then_skipped(self):
+        class Flaky(_PagedProvider):
+            def search(self, query, num_results, time_range=None, language="en", offset=0):
+                page = super().search(query, num_results, time_range, language, offset)
+                if offset == 10 or (offset == 20 and self.offsets.count(20) == 1):
+                    raise RuntimeError("HTTP 500")
+                return page
+        
+        provider = Flaky(total=40)
+        tool = self.make_tool(provider)
+        with mock.patch("builtins.print"):
+            pages = list(tool.iter_search_pages("lemon", num_results=100, page_size=10, max_concurrent_pages=1))
+        self.assertEqual([len(page) for page in pages], [10, 11, 10])
+        self.assertEqual(provider.offsets, [0, 10, 10, 20, 20, 30, 40, 50])
+    
+    def test_first_page_arrives_before_later_pages_finish(self):
+        tool = self.make_tool(_PagedProvider(total=100, delay=0.2))
+        started = time.monotonic()
+        pages = tool.iter_search_pages("lemon", num_results=60, page_size=10, max_concurrent_pages=3)
+        next(pages)
+        first_page_at = time.monotonic() - started
+        self.assertEqual(sum(len(page) for page in pages) + 10, 60)
+        elapsed = time.monotonic() - started
+        self.assertLess(first_page_at, 0.35)
+        # Six pages three at a time take two rounds, not six
+        self.assertLess(elapsed, 0.8)
+    
+    def test_serpapi_errors_are_not_empty_pages(self):
+        provider = SerpApiProvider("test-key")
+        with self.assertRaises(RuntimeError):
+            provider._parse_results({"error": "Invalid API key."})
+        self.assertEqual(provider._parse_results({"error": "Google hasn't returned any results for this query."}), [])
+    
+    def test_async_pages(self):
+        tool = self.make_tool(_PagedProvider(total=100))
+        
+        async def collect():
+            return [page async for page in tool.aiter_search_pages("lemon", num_results=25, page_size=10)]
+        
+        self.assertEqual([len(page) for page in asyncio.run(collect())], [10, 10, 5])
+    
+    def test_mock_search_pages(self):
+        tool = WebSearchTool(use_mock=True)
+        self.assertEqual(len(list(tool.iter_search("lemon", num_results=30))), 30)
+        self.assertEqual(tool.search("lemon", num_results=5, offset=98)[-1].url, "https://example-lemon.com/page100")
+    
+    def test_streaming_research_starts_on_first_page(self):
+        agent = WebResearchAgent(use_mock=True, max_results=15)
+        events = list(agent.iter_research("lemon tree"))
+        searches = [event["data"] for event in events if event["event"] == "search"]
+        self.assertEqual([len(page) for page in searches], [10, 5])
+        self.assertEqual(len([event for event in events if event["event"] == "source"]), 15)
+        self.assertEqual(len(agent._search("lemon tree")), 15)
+        self.assertEqual(len(asyncio.run(agent._asearch("lemon tree"))), 15)
+
+class TestHostScheduler(LocalServerTestCase):
+    def test_concurrency_is_capped_per_host(self):
+        scheduler = AdaptiveHostScheduler(initial_limit=2, max_limit=2)
+        active = Counter()
+        peak = Counter()
+        lock = threading.Lock()
+        
+        def fetch(url):
+            host = url.split("/")[2]
+            with scheduler.slot(url):
+                with lock:
+                    active[host] += 1
+                    peak[host] = max(peak[host], active[host])
+                time.sleep(0.02)
+                with lock:
+                    active[host] -= 1
+        
+        urls = ["https://a.example/%d" % i for i in range(6)] + ["https://b.example/%d" % i for i in range(6)]
+        with ThreadPoolExecutor(max_workers=12) as executor:
+            list(executor.map(fetch, urls))
+        self.assertEqual(peak, {"a.example": 2, "b.example": 2})
+        stats = scheduler.stats()
+        self.assertEqual(stats["https://a.example"]["requests"], 6)
+        self.assertEqual(stats["https://a.example"]["in_flight"], 0)
+        self.assertGreater(stats["https://a.example"]["queued_seconds"], 0)
+    
+    def test_limit_grows_only_while_saturated_and_halves_on_throttle(self):
+        scheduler = AdaptiveHostScheduler(initial_limit=1, max_limit=4)
+        with scheduler.slot("https://fast.example/page"):
+            pass
+        self.assertEqual(scheduler.limit("https://fast.example/"), 2)
+        # One request at a time never fills two slots, so the limit stays put
+        for _ in range(10):
+            with scheduler.slot("https://fast.example/page"):
+                pass
+        self.assertEqual(scheduler.limit("https://fast.example/"), 2)
+        
+        with scheduler.slot("https://fast.example/page") as slot:
+            slot.observe(429, {"Retry-After": "0"})
+        self.assertEqual(scheduler.limit("https://fast.example/"), 1)
+        self.assertEqual(scheduler.stats()["https://fast.example"]["throttled"], 1)
+    
+    def test_retry_after_pauses_the_host(self):
+        scheduler = AdaptiveHostScheduler(max_pause=0.2)
+        with scheduler.slot("https://busy.example/") as slot:
+            slot.observe(503, {"Retry-After": "120"})
+        self.assertGreater(scheduler.stats()["https://busy.example"]["paused_for"], 0)
+        started = time.monotonic()
+        with scheduler.slot("https://busy.example/"):
+            pass
+        self.assertGreaterEqual(time.monotonic() - started, 0.1)
+    
+    def test_async_slots_wait_for_release(self):
+        scheduler = AdaptiveHostScheduler(initial_limit=1, max_limit=1)
+        order = []
+        
+        async def fetch(name):
+            async with scheduler.slot("https://one.example/"):
+                order.append(name + " start")
+                await asyncio.sleep(0.02)
+                order.append(name + " end")
+        
+        async def run_all():
+            await asyncio.gather(fetch("a"), fetch("b"))
+        
+        asyncio.run(run_all())
+        self.assertEqual(order, ["a start", "a end", "b start", "b end"])
+    
+    def test_scraper_reports_throttling(self):
+        self.serve("/limited", b"slow down", status=429, headers={"Content-Type": "text/html", "Retry-After": "0"})
+        scheduler = AdaptiveHostScheduler(initial_limit=4)
+        scraper = WebScraper(use_mock=False, http_client=HttpClient(max_retries=0), respect_robots_txt=False,
+                             scheduler=scheduler)
+        self.assertIsNone(scraper.scrape_url(self.base_url + "/limited"))
+        stats = scheduler.stats()[self.base_url]
+        self.assertEqual(stats["throttled"], 1)
+        self.assertEqual(stats["limit"], 2)
+    
+    def serve_throttled_once(self, path):
+        attempts = []
+        
+        def throttled(request):
+            attempts.append(time.monotonic())
+            return 429 if len(attempts) == 1 else 200
+        
+        self.serve(path, b"<html><title>Back</title><body><article><p>Served.</p></article></body></html>",
+                   status=throttled, headers={"Content-Type": "text/html", "Retry-After": "30"})
+        return attempts
+    
+    def test_retrying_client_still_reports_throttling(self):
+        attempts = self.serve_throttled_once("/limited")
+        scheduler = AdaptiveHostScheduler(initial_limit=4, max_pause=0.2)
+        scraper = WebScraper(use_mock=False, http_client=HttpClient(), respect_robots_txt=False, scheduler=scheduler)
+        self.assertEqual(scraper.scrape_url(self.base_url + "/limited").title, "Back")
+        stats = scheduler.stats()[self.base_url]
+        self.assertEqual((stats["throttled"], stats["limit"], stats["requests"]), (1, 2, 2))
+        # The retry waited out the host's pause (Retry-After capped by max_pause), not the client's backoff
+        self.assertGreaterEqual(attempts[1] - attempts[0], 0.15)
+        self.assertLess(attempts[1] - attempts[0], 5)
+    
+    @unittest.skipUnless(aiohttp, "aiohttp is not installed")
+    def test_async_retrying_client_still_reports_throttling(self):
+        attempts = self.serve_throttled_once("/limited")
+        scheduler = AdaptiveHostScheduler(initial_limit=4, max_pause=0.2)
+        client = AsyncHttpClient()
+        scraper = WebScraper(use_mock=False, async_http_client=client, respect_robots_txt=False, scheduler=scheduler)
+        content = asyncio.run(scraper.ascrape_url(self.base_url + "/limited"))
+        self.assertEqual(content.title, "Back")
+        stats = scheduler.stats()[self.base_url]
+        self.assertEqual((stats["throttled"], stats["limit"], stats["requests"]), (1, 2, 2))
+        self.assertGreaterEqual(attempts[1] - attempts[0], 0.15)
+    
+    def test_latency_is_measured_to_the_response_headers(self):
+        scheduler = AdaptiveHostScheduler()
+        with scheduler.slot("https://big.example/file") as slot:
+            slot.observe(200, {})
+            time.sleep(0.1)  # Reading a large body
+        self.assertLess(scheduler.stats()["https://big.example"]["latency"], 0.05)
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,129 @@
+# tools/analysis_pool.py
+
+import asyncio
+import os
+import random
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Dict, Optional, Tuple
+from tools.content_analyzer import ContentAnalyzer
+from tools.html_extractor import extract_content
+from tools.parser_backends import ParserBackend, get_backend
+from tools.ranking import BM25Index
+from tools.text_analysis import get_document
+from tools.web_scraper import ScrapedContent
+from utils import serialization
+
+# Small document parsed and analyzed by each worker at start-up so imports and lazy setup are paid before real work
+_WARMUP_HTML = ("<html><head><title>Warm up</title></head><body><article><p>Research study on the market.</p>"
+                "<ul><li>One</li></ul></article></body></html>")
+
+# Per-process state, created by _init_worker
+_worker_backend: Optional[ParserBackend] = None
+_worker_analyzer: Optional[ContentAnalyzer] = None
+
+def _init_worker(parser: str):
+    """Process initializer: build the parser backend and analyzer once per worker and warm them up."""
+    global _worker_backend, _worker_analyzer
+    random.seed()  # Forked workers would otherwise share the parent's random state
+    _worker_backend = get_backend(parser)
+    # Relevance is rescored in the parent against shared corpus statistics, so workers keep no corpus of their own
+    _worker_analyzer = ContentAnalyzer(use_mock=True, ranking_index=BM25Index(max_documents=1))
+    parse_and_analyze("http://warmup.invalid/", _WARMUP_HTML, "market research")
+
+def _ping() -> int:
+    return os.getpid()
+
+def parse_and_analyze(url: str, html: str, query: str) -> bytes:
+    """
+    Parse raw HTML and analyze it; runs inside a worker process.
+    
+    Args:
+        url: URL the HTML was downloaded from
+        html: Decoded page HTML
+        query: Original research query
+    
+    Returns:
+        Compact JSON encoding of the scraped fields, the analysis and the
+        document's term counts (for scoring relevance in the parent)
+    """
+    if _worker_backend is None:
+        _init_worker("html.parser")
+    fields = extract_content(_worker_backend.build_index(html))
+    content = ScrapedContent(url=url, **fields)
+    analysis = _worker_analyzer.analyze_content(content, query)
+    document = get_document(content.main_content or "", content.title or "")
+    return serialization.dumps({"content": fields, "analysis": analysis, "fingerprint": document.fingerprint,
+                                "terms": document.index_terms})
+
+class AnalysisPool:
+    """
+    Process pool for the CPU-bound part of research: HTML parsing and content analysis.
+    
+    Parsing and the analyzer's regex work hold the GIL, so running them on
+    threads serializes the whole process. The pool moves the raw HTML →
+    ScrapedContent → analysis stage into worker processes; only the HTML
+    goes in and a compact JSON payload (utils.serialization) comes back.
+    BM25 relevance depends on corpus statistics, so workers send back each
+    page's term counts and relevance is scored here against the pool's
+    ranking index, which an agent shares with its in-process analyzer.
+    """
+    
+    def __init__(self, max_workers: Optional[int] = None, parser: str = "html.parser", warm_start: bool = True,
+                 mp_context=None, ranking_index: Optional[BM25Index] = None):
+        """
+        Initialize the AnalysisPool.
+        
+        Args:
+            max_workers: Number of worker processes (defaults to the number of CPUs)
+            parser: HTML parser backend used by the workers
+            warm_start: Start every worker process now instead of on first use
+            mp_context: Optional multiprocessing context (e.g. multiprocessing.get_context("spawn"))
+            ranking_index: BM25 corpus statistics relevance is scored against; pass the in-process analyzer's
+                index so both paths score alike (a pool keeps its own by default)
+        """
+        get_backend(parser)  # Fail fast on an unknown or unavailable backend
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.parser = parser
+        self.ranking_index = ranking_index if ranking_index is not None else BM25Index()
+        self._executor = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=mp_context,
+                                             initializer=_init_worker, initargs=(parser,))
+        if warm_start:
+            self.warm()
+    
+    def warm(self):
+        """Start the worker processes and wait until they have run their initializer."""
+        for future in [self._executor.submit(_ping) for _ in range(self.max_workers)]:
+            future.result()
+    
+    def submit(self, url: str, html: str, query: str) -> Future:
+        """Queue a page for parsing and analysis; the future resolves to the serialized payload."""
+        return self._executor.submit(parse_and_analyze, url, html, query)
+    
+    def decode(self, payload: bytes, url: str, query: str) -> Tuple[ScrapedContent, Dict[str, Any]]:
+        """Turn a worker payload back into (ScrapedContent, analysis), scoring relevance against the shared index."""
+        data = serialization.loads(payload)
+        self.ranking_index.add(data["fingerprint"], data["terms"])
+        relevance = float(self.ranking_index.score(query, [data["fingerprint"]])[0])
+        analysis = data["analysis"]
+        analysis["relevance"] = relevance
+        analysis["key_information"]["topic_relevance"] = relevance
+        return ScrapedContent(url=url, **data["content"]), analysis
+    
+    def analyze(self, url: str, html: str, query: str,
+                timeout: Optional[float] = None) -> Tuple[ScrapedContent, Dict[str, Any]]:
+        """Parse and analyze a page in a worker process and wait for the result."""
+        return self.decode(self.submit(url, html, query).result(timeout=timeout), url, query)
+    
+    async def aanalyze(self, url: str, html: str, query: str) -> Tuple[ScrapedContent, Dict[str, Any]]:
+        """Asynchronous version of analyze()."""
+        payload = await asyncio.wrap_future(self.submit(url, html, query))
+        return self.decode(payload, url, query)
+    
+    def close(self):
+        self._executor.shutdown(wait=True, cancel_futures=True)
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
@@ -1,23 +1,69 @@
 # tools/content_analyzer.py
 
 from typing import Dict, List, Any, Optional, Tuple
-import re
 import random
-from collections import Counter
 import json
+from tools.text_analysis import STOPWORDS, Document, get_document
+from tools.contradictions import ContradictionDetector
+from tools.ranking import BM25Index
+from utils.keyword_matcher import KeywordMatcher
+
+# List of potential categories
+CATEGORIES = [
+    "Technology", "Business", "Finance", "Science", "Health", "Politics", 
+    "Education", "Entertainment", "Sports", "Travel", "Food", "Art", 
+    "Environment", "History", "Literature", "Social Media", "News"
+]
+
+# Keywords that suggest each category, in priority order
+CATEGORY_KEYWORDS = {
+    "tech": "Technology", "software": "Technology", "app": "Technology", "computer": "Technology",
+    "business": "Business", "company": "Business", "market": "Business", "industry": "Business",
+    "money": "Finance", "invest": "Finance", "bank": "Finance", "stock": "Finance",
+    "research": "Science", "scientist": "Science", "study": "Science", "experiment": "Science",
+    "health": "Health", "medical": "Health", "doctor": "Health", "patient": "Health",
+    "government": "Politics", "election": "Politics", "policy": "Politics", "president": "Politics",
+    "school": "Education", "learn": "Education", "student": "Education", "teacher": "Education",
+    "movie": "Entertainment", "music": "Entertainment", "celebrity": "Entertainment", "game": "Entertainment",
+    "team": "Sports", "player": "Sports", "match": "Sports", "tournament": "Sports",
+    "trip": "Travel", "destination": "Travel", "hotel": "Travel", "vacation": "Travel",
+    "recipe": "Food", "restaurant": "Food", "cook": "Food", "ingredient": "Food",
+    "painting": "Art", "museum": "Art", "artist": "Art", "gallery": "Art",
+    "climate": "Environment", "pollution": "Environment", "sustainable": "Environment", "nature": "Environment",
+    "historical": "History", "century": "History", "ancient": "History", "heritage": "History",
+    "book": "Literature", "author": "Literature", "novel": "Literature", "poem": "Literature",
+    "social": "Social Media", "platform": "Social Media", "online": "Social Media", "profile": "Social Media",
+    "report": "News", "headline": "News", "journalist": "News", "media": "News"
+}
+
+# Built once at import time and shared by every analyzer using the default taxonomy
+DEFAULT_CATEGORY_MATCHER = KeywordMatcher(CATEGORY_KEYWORDS)
 
 class ContentAnalyzer:
     """Tool for analyzing and extracting relevant information from scraped content."""
     
-    def __init__(self, ai_model=None, use_mock: bool = False):
+    def __init__(self, ai_model=None, use_mock: bool = False, taxonomy: Optional[Dict[str, str]] = None,
+                 ranking_index: Optional[BM25Index] = None):
         """
         Initialize the ContentAnalyzer.
         
         Args:
             ai_model: Optional AI model for advanced analysis (e.g., OpenAI, Claude)
             use_mock: Whether to use mock responses for testing
+            taxonomy: Optional {keyword: category} mapping, in priority order, replacing CATEGORY_KEYWORDS
+            ranking_index: BM25 corpus statistics used for relevance; each analyzer keeps its own unless one
+                is passed (get_default_ranking_index() shares one across the process)
         """
         self.ai_model = ai_model
+        self.ranking_index = ranking_index if ranking_index is not None else BM25Index()
+        self.contradiction_detector = ContradictionDetector()
+        if taxonomy:
+            self.category_matcher = KeywordMatcher(taxonomy)
+            labels = list(dict.fromkeys(taxonomy.values()))
+            self.categories = labels if len(labels) >= 2 else CATEGORIES
+        else:
+            self.category_matcher = DEFAULT_CATEGORY_MATCHER
+            self.categories = CATEGORIES
         self.use_mock = use_mock or not ai_model
         
         if not self.use_mock and not ai_model:
@@ -31,7 +77,7 @@ class ContentAnalyzer:
         Args:
             content: Scraped content (can be dict or ScrapedContent object)
             query: Original search query
-            
+        
         Returns:
             Relevance score between 0.0 and 1.0
         """
@@ -50,19 +96,12 @@ class ContentAnalyzer:
         Args:
             content: Scraped content (can be dict or ScrapedContent object)
             query: Original search query
-            
+        
         Returns:
             Dictionary of extracted information
         """
         if self.use_mock:
-            extracted_info = self._mock_extract_information(content, query)
-            # Ensure the return value is a plain dictionary with accessible attributes
-            return {
-                "key_points": extracted_info["key_points"],  # List of strings
-                "relevant_terms": extracted_info["relevant_terms"],  # List of strings
-                "mentions": extracted_info["mentions"],  # Dict of lists
-                "topic_relevance": extracted_info["topic_relevance"]  # Float
-            }
+            return self._key_information_dict(self._mock_extract_information(content, query))
         
         # Implement real AI-based information extraction here
         pass
@@ -74,7 +113,7 @@ class ContentAnalyzer:
         Args:
             content: Scraped content (can be dict or ScrapedContent object)
             source_url: URL of the content source
-            
+        
         Returns:
             Dictionary with reliability score and factors
         """
@@ -96,7 +135,7 @@ class ContentAnalyzer:
         
         Args:
             contents: List of scraped content from different sources
-            
+        
         Returns:
             List of identified contradictions
         """
@@ -113,7 +152,7 @@ class ContentAnalyzer:
         Args:
             content: Scraped content to summarize
             max_length: Maximum length of summary in characters
-            
+        
         Returns:
             Summary string
         """
@@ -129,7 +168,7 @@ class ContentAnalyzer:
         
         Args:
             content: Scraped content to categorize
-            
+        
         Returns:
             List of categories/topics
         """
@@ -139,6 +178,88 @@ class ContentAnalyzer:
         # Implement real AI-based categorization here
         pass
     
+    def analyze_content(self, content: Dict[str, Any], query: str) -> Dict[str, Any]:
+        """
+        Run the full analysis used by research reports on a single document.
+        
+        Args:
+            content: Scraped content (can be dict or ScrapedContent object)
+            query: Original search query
+        
+        Returns:
+            Dictionary with relevance, key information, reliability, summary and categories
+        """
+        return {
+            "relevance": self.analyze_relevance(content, query),
+            "key_information": self.extract_key_information(content, query),
+            "reliability": self.assess_reliability(content, self._get_content_url(content)),
+            "summary": self.summarize_content(content),
+            "categories": self.categorize_content(content)
+        }
+    
+    def analyze_batch(self, contents: List[Any], query: str) -> List[Dict[str, Any]]:
+        """
+        Run analyze_content() over many documents at once.
+        
+        All documents are added to the ranking index first and then scored
+        against the query with a single BM25Index.score() call, and with a
+        real AI model the whole batch goes out in a single call when the
+        model provides analyze_batch(documents, query).
+        
+        Args:
+            contents: Scraped contents (dicts or ScrapedContent objects)
+            query: Original search query
+        
+        Returns:
+            One analysis dictionary per content, in input order
+        """
+        if not contents:
+            return []
+        if not self.use_mock:
+            batch_call = getattr(self.ai_model, "analyze_batch", None)
+            if batch_call is None:
+                return [self.analyze_content(content, query) for content in contents]
+            return batch_call([{
+                "url": self._get_content_url(content),
+                "title": self._get_content_title(content),
+                "text": self._get_content_text(content)
+            } for content in contents], query)
+        
+        documents = self.index_documents(contents)
+        scores = self.ranking_index.score(query, [document.fingerprint for document in documents]).tolist()
+        
+        analyses = []
+        for content, relevance in zip(contents, scores):
+            key_information = self._mock_extract_information(content, query, topic_relevance=relevance)
+            analyses.append({
+                "relevance": relevance,
+                "key_information": self._key_information_dict(key_information),
+                "reliability": self.assess_reliability(content, self._get_content_url(content)),
+                "summary": self.summarize_content(content),
+                "categories": self.categorize_content(content)
+            })
+        return analyses
+    
+    def index_documents(self, contents: List[Any]) -> List[Document]:
+        """Add documents to the ranking index's corpus statistics without scoring them."""
+        documents = [self._get_document(content) for content in contents]
+        for document in documents:
+            self.ranking_index.add(document.fingerprint, document.index_terms)
+        return documents
+    
+    def _key_information_dict(self, extracted_info: Dict[str, Any]) -> Dict[str, Any]:
+        # Ensure the return value is a plain dictionary with accessible attributes
+        return {
+            "key_points": extracted_info["key_points"],  # List of strings
+            "relevant_terms": extracted_info["relevant_terms"],  # List of strings
+            "mentions": extracted_info["mentions"],  # Dict of lists
+            "topic_relevance": extracted_info["topic_relevance"]  # Float
+        }
+    
+    def _get_document(self, content) -> Document:
+        """Shared, lazily normalized view of a content object's text and title."""
+        return get_document(self._get_content_text(content) or "", self._get_content_title(content) or "")
+    
     def _get_content_text(self, content) -> str:
         """Extract the main text from content object or dict."""
         if hasattr(content, 'main_content'):
@@ -159,43 +280,29 @@ class ContentAnalyzer:
         
         return ''
     
-    def _mock_relevance_score(self, content: Any, query: str) -> float:
-        """Generate a mock relevance score based on simple text matching."""
-        content_text = self._get_content_text(content)
-        content_title = self._get_content_title(content)
-        
-        # Count query terms in content
-        query_terms = query.lower().split()
-        content_lower = content_text.lower() + " " + content_title.lower()
-        
-        # Count occurrences of query terms
-        term_counts = 0
-        for term in query_terms:
-            term_counts += content_lower.count(term)
-        
-        # Calculate a score based on term frequency
-        score = min(1.0, 0.5 + (term_counts / (len(query_terms) * 2)))
+    def _get_content_url(self, content) -> str:
+        """Extract the source URL from content object or dict."""
+        if hasattr(content, 'url'):
+            return content.url
         
-        # Add some randomness for testing
-        score = min(1.0, max(0.0, score + random.uniform(-0.1, 0.1)))
+        if isinstance(content, dict):
+            return content.get('url', '')
         
-        return score
+        return ''
     
-    def _mock_extract_information(self, content: Any, query: str) -> Dict[str, Any]:
+    def _mock_relevance_score(self, content: Any, query: str) -> float:
+        """Score relevance with BM25 against everything analyzed so far (normalized to 0.0-1.0)."""
+        document = self.index_documents([content])[0]
+        return float(self.ranking_index.score(query, [document.fingerprint])[0])
+    
+    def _mock_extract_information(self, content: Any, query: str,
+                                  topic_relevance: Optional[float] = None) -> Dict[str, Any]:
         """Generate mock extracted information based on content and query."""
-        content_text = self._get_content_text(content)
-        content_title = self._get_content_title(content)
-        
-        # Extract sentences that might contain relevant information
-        sentences = re.split(r'[.!?]+', content_text)
+        document = self._get_document(content)
         query_terms = query.lower().split()
         
         # Find sentences containing query terms
-        relevant_sentences = []
-        for sentence in sentences:
-            sentence = sentence.strip()
-            if sentence and any(term in sentence.lower() for term in query_terms):
-                relevant_sentences.append(sentence)
+        relevant_sentences = document.sentences_matching(query_terms)
         
         # For mock purposes, create key points
         key_points = []
@@ -213,49 +320,35 @@ class ContentAnalyzer:
         # Create a structured response
         extracted_info = {
             "key_points": key_points,
-            "relevant_terms": self._extract_relevant_terms(content_text, query),
-            "mentions": self._extract_entity_mentions(content_text),
-            "topic_relevance": self._mock_relevance_score(content, query)
+            "relevant_terms": self._relevant_terms(document, query_terms),
+            "mentions": self._entity_mentions(document),
+            "topic_relevance": (topic_relevance if topic_relevance is not None
+                                else self._mock_relevance_score(content, query))
         }
         
         return extracted_info
     
     def _extract_relevant_terms(self, text: str, query: str) -> List[str]:
         """Extract terms from text that seem relevant to the query."""
+        return self._relevant_terms(get_document(text), query.lower().split())
+    
+    def _relevant_terms(self, document: Document, query_terms: List[str]) -> List[str]:
         # This is a simplified version - real implementation would use NLP techniques
-        words = re.findall(r'\b\w+\b', text.lower())
-        query_terms = query.lower().split()
-        
-        # Count word frequencies
-        word_freq = Counter(words)
-        
         # Remove common stopwords, short words, and query terms themselves
-        stopwords = {'the', 'and', 'is', 'in', 'to', 'of', 'a', 'for', 'with', 'on', 'by', 'that', 'this', 'are', 'or'}
-        relevant_terms = [(word, freq) for word, freq in word_freq.most_common(20) 
-                         if word not in stopwords and word not in query_terms and len(word) > 3]
+        relevant_terms = [(word, freq) for word, freq in document.top_words
+                         if word not in STOPWORDS and word not in query_terms and len(word) > 3]
         
         # Return just the words without frequencies
         return [word for word, _ in relevant_terms[:10]]
     
     def _extract_entity_mentions(self, text: str) -> Dict[str, List[str]]:
         """Extract potential named entities from text."""
+        return self._entity_mentions(get_document(text))
+    
+    def _entity_mentions(self, document: Document) -> Dict[str, List[str]]:
         # This is a very simplified mock version - real implementation would use NER
-        
-        # Look for patterns that might indicate different entity types
-        # People: capitalized words followed by capitalized words
-        people = re.findall(r'\b[A-Z][a-z]+ [A-Z][a-z]+\b', text)
-        
-        # Organizations: sequences of capitalized words
-        orgs = re.findall(r'\b([A-Z][a-z]+ ){1,3}(Corporation|Inc|Ltd|LLC|Company)\b', text)
-        
-        # Dates: simple date patterns
-        dates = re.findall(r'\b\d{1,2}[/-]\d{1,2}[/-]\d{2,4}\b|\b(Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]* \d{1,2},? \d{4}\b', text)
-        
-        return {
-            "people": list(set(people))[:5],  # Limit to 5 unique names
-            "organizations": [" ".join(org) for org in orgs][:5],
-            "dates": list(set(dates))[:5]
-        }
+        # Copy the lists so callers can't modify the shared document
+        return {kind: list(values) for kind, values in document.entity_mentions.items()}
     
     def _mock_reliability_assessment(self, content: Any, source_url: str) -> Dict[str, Any]:
         """Generate a mock reliability assessment of the content and source."""
@@ -308,44 +401,18 @@ class ContentAnalyzer:
         }
     
     def _mock_find_contradictions(self, contents: List[Any]) -> List[Dict[str, Any]]:
-        """Generate mock contradictions between multiple content sources."""
-        # For mock purposes, sometimes generate contradictions
-        if random.random() < 0.7 or len(contents) < 2:  # 70% chance of no contradictions, or not enough content
+        """Find conflicting numeric, date and role claims across content sources."""
+        if len(contents) < 2:
             return []
-        
-        # Generate 1-2 mock contradictions
-        contradictions = []
-        
-        # Topics that could have contradictions
-        potential_topics = ["date", "number", "statistic", "person involved", "sequence of events", "cause", "effect"]
-        
-        for _ in range(random.randint(1, 2)):
-            topic = random.choice(potential_topics)
-            contradiction = {
-                "topic": topic,
-                "contradiction": f"Sources disagree about {topic}",
-                "sources": [
-                    {
-                        "url": getattr(contents[0], 'url', "unknown source 1") if len(contents) > 0 else "unknown source 1",
-                        "claim": f"First claim about {topic}"
-                    },
-                    {
-                        "url": getattr(contents[1], 'url', "unknown source 2") if len(contents) > 1 else "unknown source 2",
-                        "claim": f"Contradictory claim about {topic}"
-                    }
-                ]
-            }
-            contradictions.append(contradiction)
-        
-        return contradictions
+        return self.contradiction_detector.find(contents)
     
     def _mock_summarize(self, content: Any, max_length: int = 200) -> str:
         """Generate a mock summary of the content."""
-        content_text = self._get_content_text(content)
-        title = self._get_content_title(content)
+        document = self._get_document(content)
+        title = document.title
         
         # For mock purposes, just take the first few sentences
-        sentences = re.split(r'[.!?]+', content_text)
+        sentences = document.sentences
         summary_sentences = []
         current_length = 0
         
@@ -359,7 +426,7 @@ class ContentAnalyzer:
             sentence = sentence.strip()
             if not sentence:
                 continue
-                
+            
             sentence_length = len(sentence) + 1  # +1 for the period
             if current_length + sentence_length <= max_length:
                 summary_sentences.append(sentence + ".")
@@ -377,50 +444,12 @@ class ContentAnalyzer:
     
     def _mock_categorize(self, content: Any) -> List[str]:
         """Generate mock categories/topics for the content."""
-        content_text = self._get_content_text(content)
-        title = self._get_content_title(content)
-        
-        # Combine title and text for analysis
-        full_text = title + " " + content_text
-        
-        # List of potential categories
-        categories = [
-            "Technology", "Business", "Finance", "Science", "Health", "Politics", 
-            "Education", "Entertainment", "Sports", "Travel", "Food", "Art", 
-            "Environment", "History", "Literature", "Social Media", "News"
-        ]
+        document = self._get_document(content)
         
         # For mock purposes, select 2-3 categories somewhat deterministically based on content
-        selected = []
-        
         # Simple keyword matching (in real implementation, this would use NLP classification)
-        keyword_to_category = {
-            "tech": "Technology", "software": "Technology", "app": "Technology", "computer": "Technology",
-            "business": "Business", "company": "Business", "market": "Business", "industry": "Business",
-            "money": "Finance", "invest": "Finance", "bank": "Finance", "stock": "Finance",
-            "research": "Science", "scientist": "Science", "study": "Science", "experiment": "Science",
-            "health": "Health", "medical": "Health", "doctor": "Health", "patient": "Health",
-            "government": "Politics", "election": "Politics", "policy": "Politics", "president": "Politics",
-            "school": "Education", "learn": "Education", "student": "Education", "teacher": "Education",
-            "movie": "Entertainment", "music": "Entertainment", "celebrity": "Entertainment", "game": "Entertainment",
-            "team": "Sports", "player": "Sports", "match": "Sports", "tournament": "Sports",
-            "trip": "Travel", "destination": "Travel", "hotel": "Travel", "vacation": "Travel",
-            "recipe": "Food", "restaurant": "Food", "cook": "Food", "ingredient": "Food",
-            "painting": "Art", "museum": "Art", "artist": "Art", "gallery": "Art",
-            "climate": "Environment", "pollution": "Environment", "sustainable": "Environment", "nature": "Environment",
-            "historical": "History", "century": "History", "ancient": "History", "heritage": "History",
-            "book": "Literature", "author": "Literature", "novel": "Literature", "poem": "Literature",
-            "social": "Social Media", "platform": "Social Media", "online": "Social Media", "profile": "Social Media",
-            "report": "News", "headline": "News", "journalist": "News", "media": "News"
-        }
-        
-        # Check for keywords in the text
-        text_lower = full_text.lower()
-        for keyword, category in keyword_to_category.items():
-            if keyword in text_lower and category not in selected:
-                selected.append(category)
-                if len(selected) >= 3:  # Limit to 3 categories
-                    break
+        selected = self.category_matcher.matched_labels(document.category_text, limit=3)
+        categories = self.categories
         
         # If we found fewer than 2 categories, add some random ones
         while len(selected) < 2:
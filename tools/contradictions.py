@@ -0,0 +1,221 @@
+# tools/contradictions.py
+
+import re
+from collections import defaultdict
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from tools.text_analysis import DATE, WORD
+
+# Sentence ends; unlike text_analysis.SENTENCE_BOUNDARY this keeps decimals like 14.5 intact
+CLAIM_SENTENCE_BOUNDARY = re.compile(r"[.!?]+(?=\s|$)")
+
+# Capitalized phrases treated as entities ("New York", "Acme Corp", "World Health Organization")
+ENTITY = re.compile(r"\b[A-Z][\w&'-]*(?:\s+(?:of|de|the|and|for)\s+[A-Z][\w&'-]*|\s+[A-Z][\w&'-]*)*")
+
+# Numbers with optional thousands separators, decimals, percent sign and scale word
+NUMBER = re.compile(r"(?<![\w.,])(\d{1,3}(?:,\d{3})+|\d+(?:\.\d+)?)(?![\w/-])(\s*(?:%|percent\b|per cent\b))?"
+                    r"(?:\s+(thousand|million|billion|trillion)\b)?", re.IGNORECASE)
+
+# "<Person> is the <role> of <Organization>"
+ROLE = re.compile(r"(?P<holder>[A-Z][\w'-]*(?:\s+[A-Z][\w'-]*)*)\s+(?:is|was|became)\s+(?:the\s+)?"
+                  r"(?P<role>(?:[a-z]+\s+){0,2}[a-z]+)\s+of\s+(?P<subject>[A-Z][\w&'-]*(?:\s+[A-Z][\w&'-]*)*)")
+
+SCALES = {"thousand": 1e3, "million": 1e6, "billion": 1e9, "trillion": 1e12}
+
+# Capitalized words that start sentences or name months rather than entities
+NON_ENTITY_WORDS = {"The", "A", "An", "In", "On", "At", "By", "For", "According", "As", "It", "Its", "This", "That",
+                    "These", "Those", "There", "Since", "After", "Before", "During", "Today", "Yesterday", "Last",
+                    "Jan", "January", "Feb", "February", "Mar", "March", "Apr", "April", "May", "Jun", "June",
+                    "Jul", "July", "Aug", "August", "Sep", "Sept", "September", "Oct", "October", "Nov",
+                    "November", "Dec", "December"}
+
+# Words that never name an attribute
+FILLER_WORDS = {"the", "a", "an", "is", "was", "are", "were", "be", "been", "has", "had", "have", "of", "in", "on",
+                "at", "by", "to", "with", "for", "from", "than", "about", "around", "approximately", "nearly",
+                "over", "under", "roughly", "some", "its", "their", "his", "her", "it", "and", "or", "that",
+                "this", "which", "who", "as", "reached", "totaled", "totalled", "stood", "stands", "now", "only",
+                "more", "less", "almost", "just", "still", "also", "be", "will", "would", "per", "cent", "percent"}
+
+class Claim:
+    """One value a source states for an (entity, attribute) pair."""
+    
+    def __init__(self, source: int, entity: str, attribute: str, kind: str, value: Any, sentence: str):
+        self.source = source
+        self.entity = entity
+        self.attribute = attribute
+        self.kind = kind
+        self.value = value
+        self.sentence = sentence
+    
+    @property
+    def key(self) -> Tuple[str, str, str]:
+        return self.entity.lower(), self.attribute, self.kind
+
+class ContradictionDetector:
+    """
+    Finds sources that state different values for the same fact.
+    
+    Numeric, date and role claims are extracted from each source's sentences
+    and indexed by (entity, attribute, kind). Only claims that land in the
+    same index bucket are compared, and each bucket is resolved by sorting
+    its values into groups of agreeing values rather than comparing every
+    pair, so the work grows roughly linearly with the number of sources.
+    """
+    
+    def __init__(self, tolerance: float = 0.05, max_sources_per_side: int = 2):
+        """
+        Initialize the ContradictionDetector.
+        
+        Args:
+            tolerance: Relative difference under which two numbers are considered to agree
+            max_sources_per_side: Sources quoted for each conflicting value in a report entry
+        """
+        self.tolerance = tolerance
+        self.max_sources_per_side = max_sources_per_side
+    
+    def extract_claims(self, content: Any, source: int = 0) -> List[Claim]:
+        """Extract numeric, date and role claims from a content object or dict."""
+        text = content.main_content if hasattr(content, "main_content") else (
+            content.get("main_content", "") if isinstance(content, dict) else str(content))
+        claims = []
+        for sentence in CLAIM_SENTENCE_BOUNDARY.split(text or ""):
+            sentence = sentence.strip()
+            if sentence:
+                claims.extend(self._sentence_claims(sentence, source))
+        return claims
+    
+    def _sentence_claims(self, sentence: str, source: int) -> Iterator[Claim]:
+        entities = [(match.start(), match.end(), entity) for match in ENTITY.finditer(sentence)
+                    for entity in [self._clean_entity(match.group(0))] if entity]
+        if not entities:
+            return
+        
+        dates = [(match.start(), match.end()) for match in DATE.finditer(sentence)]
+        for start, end in dates:
+            claim = self._value_claim(sentence, source, entities, start, end, "date",
+                                      " ".join(sentence[start:end].lower().replace(",", "").split()))
+            if claim is not None:
+                yield claim
+        
+        for match in NUMBER.finditer(sentence):
+            if any(start <= match.start() < end for start, end in dates):
+                continue
+            kind, value = self._number_value(match)
+            claim = self._value_claim(sentence, source, entities, match.start(), match.end(), kind, value)
+            if claim is not None:
+                yield claim
+        
+        for match in ROLE.finditer(sentence):
+            holder, subject = self._clean_entity(match.group("holder")), self._clean_entity(match.group("subject"))
+            if holder and subject:
+                yield Claim(source, subject, match.group("role").lower(), "role", holder, sentence)
+    
+    def _clean_entity(self, phrase: str) -> Optional[str]:
+        words = phrase.split()
+        while words and words[0] in NON_ENTITY_WORDS:
+            words.pop(0)
+        while words and words[-1] in NON_ENTITY_WORDS:
+            words.pop()
+        return " ".join(words) or None
+    
+    def _number_value(self, match) -> Tuple[str, float]:
+        number, percent, scale = match.groups()
+        value = float(number.replace(",", ""))
+        if percent:
+            return "percent", value
+        if scale:
+            return "number", value * SCALES[scale.lower()]
+        if "," not in number and "." not in number and len(number) == 4 and 1000 <= value <= 2100:
+            return "year", value
+        return "number", value
+    
+    def _value_claim(self, sentence: str, source: int, entities, start: int, end: int,
+                     kind: str, value: Any) -> Optional[Claim]:
+        """Attach a value to the nearest preceding entity and the attribute word around it."""
+        preceding = [entity for entity in entities if entity[1] <= start]
+        if not preceding:
+            return None
+        entity_start, entity_end, entity = preceding[-1]
+        attribute = (self._attribute_word(sentence[entity_end:start], last=True)
+                     or self._attribute_word(" ".join(sentence[end:].split()[:2]), last=False)
+                     or self._attribute_word(sentence[:entity_start], last=True))
+        if attribute is None:
+            return None
+        return Claim(source, entity, attribute, kind, value, sentence)
+    
+    def _attribute_word(self, text: str, last: bool) -> Optional[str]:
+        words = [word for word in WORD.findall(text.lower()) if word not in FILLER_WORDS and not word.isdigit()]
+        if not words:
+            return None
+        return words[-1] if last else words[0]
+    
+    def _value_groups(self, claims: List[Claim]) -> List[List[Claim]]:
+        """Split a bucket's claims into groups whose values agree."""
+        if claims[0].kind not in ("number", "percent"):
+            groups: Dict[Any, List[Claim]] = defaultdict(list)
+            for claim in claims:
+                groups[claim.value].append(claim)
+            return list(groups.values())
+        ordered = sorted(claims, key=lambda claim: claim.value)
+        groups = [[ordered[0]]]
+        for claim in ordered[1:]:
+            anchor = groups[-1][0].value
+            if abs(claim.value - anchor) <= self.tolerance * max(abs(claim.value), abs(anchor)):
+                groups[-1].append(claim)
+            else:
+                groups.append([claim])
+        return groups
+    
+    def find(self, contents: List[Any]) -> List[Dict[str, Any]]:
+        """
+        Find contradictions across sources.
+        
+        Args:
+            contents: Scraped contents (dicts or ScrapedContent objects), one per source
+        
+        Returns:
+            List of contradictions with the topic and the conflicting sources' claims
+        """
+        index: Dict[Tuple[str, str, str], List[Claim]] = defaultdict(list)
+        for source, content in enumerate(contents):
+            for claim in self.extract_claims(content, source):
+                index[claim.key].append(claim)
+        
+        contradictions = []
+        for claims in index.values():
+            if len({claim.source for claim in claims}) < 2:
+                continue
+            groups = self._value_groups(claims)
+            if len(groups) < 2:
+                continue
+            # The two values backed by the most sources are reported against each other
+            groups.sort(key=lambda group: len({claim.source for claim in group}), reverse=True)
+            first, second = groups[0], groups[1]
+            if {claim.source for claim in first} == {claim.source for claim in second}:
+                continue  # A source contradicting itself is not a cross-source conflict
+            topic = f"{claims[0].attribute} of {claims[0].entity}"
+            contradictions.append({
+                "topic": topic,
+                "contradiction": f"Sources disagree about {topic}",
+                "sources": [
+                    {"url": self._url(contents[claim.source]), "claim": claim.sentence}
+                    for group in (first, second) for claim in self._one_claim_per_source(group)
+                ]
+            })
+        return contradictions
+    
+    def _one_claim_per_source(self, group: List[Claim]) -> List[Claim]:
+        seen, selected = set(), []
+        for claim in group:
+            if claim.source not in seen:
+                seen.add(claim.source)
+                selected.append(claim)
+                if len(selected) >= self.max_sources_per_side:
+                    break
+        return selected
+    
+    def _url(self, content: Any) -> str:
+        if hasattr(content, "url"):
+            return content.url
+        if isinstance(content, dict):
+            return content.get("url", "unknown source")
+        return "unknown source"
@@ -0,0 +1,196 @@
+# tools/corpus.py
+
+import math
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional
+from tools.text_analysis import STOPWORDS, WORD, get_document
+from tools.web_scraper import ScrapedContent
+from utils import serialization
+
+# Pages older than this are neither reused nor returned by searches (they stay stored until purged)
+DEFAULT_MAX_AGE = 7 * 24 * 3600
+
+class CorpusHit:
+    """A stored page matching a corpus search."""
+    
+    def __init__(self, content: ScrapedContent, analysis: Optional[Dict[str, Any]], query: Optional[str],
+                 stored_at: float, score: float, coverage: float):
+        self.content = content
+        self.analysis = analysis
+        self.query = query
+        self.stored_at = stored_at
+        self.score = score
+        self.coverage = coverage
+    
+    @property
+    def url(self) -> str:
+        return self.content.url
+    
+    @property
+    def title(self) -> str:
+        return self.content.title
+
+class Corpus:
+    """
+    Persistent local corpus of scraped pages and their analyses.
+    
+    Pages live in SQLite with an FTS5 full-text index over title and main
+    content, so later research on the same or an adjacent topic can be
+    answered (or topped up) from disk with a ranked BM25 lookup instead of
+    a web search plus one HTTP fetch per page.
+    """
+    
+    def __init__(self, path: str = ":memory:", max_age: Optional[float] = DEFAULT_MAX_AGE,
+                 min_coverage: float = 0.5):
+        """
+        Initialize the Corpus.
+        
+        Args:
+            path: SQLite file holding the corpus (":memory:" for a private in-memory database)
+            max_age: Seconds a stored page may be reused, or None to reuse pages indefinitely
+            min_coverage: Fraction of the query's terms a page must contain to be returned by search()
+        """
+        self.path = path
+        self.max_age = max_age
+        self.min_coverage = min_coverage
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS pages ("
+                "id INTEGER PRIMARY KEY, url TEXT NOT NULL UNIQUE, title TEXT NOT NULL, main_content TEXT NOT NULL, "
+                "extras TEXT NOT NULL, analysis TEXT, query TEXT, stored_at REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS pages_fts USING fts5("
+                "title, main_content, tokenize='porter unicode61')"
+            )
+    
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+    
+    def _fresh_after(self) -> float:
+        return time.time() - self.max_age if self.max_age is not None else float("-inf")
+    
+    def add(self, content: ScrapedContent, analysis: Optional[Dict[str, Any]] = None, query: Optional[str] = None):
+        """
+        Store (or replace) a scraped page and optionally its analysis.
+        
+        Args:
+            content: Scraped page
+            analysis: Analysis of the page for query
+            query: Query the analysis was made for
+        """
+        extras = serialization.dumps_text({"metadata": content.metadata, "tables": content.tables,
+                                           "lists": content.lists, "links": content.links})
+        with self._lock, self._conn:
+            row = self._conn.execute("SELECT id FROM pages WHERE url = ?", (content.url,)).fetchone()
+            if row is not None:
+                self._conn.execute("DELETE FROM pages_fts WHERE rowid = ?", (row[0],))
+            cursor = self._conn.execute(
+                "INSERT OR REPLACE INTO pages (id, url, title, main_content, extras, analysis, query, stored_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (row[0] if row else None, content.url, content.title or "", content.main_content or "", extras,
+                 serialization.dumps_text(analysis) if analysis is not None else None, query, time.time())
+            )
+            self._conn.execute("INSERT INTO pages_fts (rowid, title, main_content) VALUES (?, ?, ?)",
+                               (cursor.lastrowid, content.title or "", content.main_content or ""))
+    
+    def set_analysis(self, url: str, analysis: Dict[str, Any], query: str):
+        """Record the latest analysis of a stored page without changing when it was fetched."""
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE pages SET analysis = ?, query = ? WHERE url = ?",
+                               (serialization.dumps_text(analysis), query, url))
+    
+    def get_analysis(self, url: str, query: str) -> Optional[Dict[str, Any]]:
+        """Stored analysis of a page if it was made for exactly this query and the page is not older than max_age."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT analysis FROM pages WHERE url = ? AND query = ? AND analysis IS NOT NULL AND stored_at >= ?",
+                (url, query, self._fresh_after())
+            ).fetchone()
+        return serialization.loads(row[0]) if row else None
+    
+    def get(self, url: str) -> Optional[ScrapedContent]:
+        """Stored page for a URL, or None if it is unknown or older than max_age."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT url, title, main_content, extras FROM pages WHERE url = ? AND stored_at >= ?",
+                (url, self._fresh_after())
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return self._content(*row)
+    
+    def search(self, query: str, limit: int = 10) -> List[CorpusHit]:
+        """
+        Find stored pages relevant to a query.
+        
+        Candidates come from the full-text index (any query term, ranked by
+        BM25); pages containing fewer than min_coverage of the query's terms
+        are dropped, so loosely related pages do not crowd out the web.
+        
+        Args:
+            query: Research query
+            limit: Maximum number of pages to return
+        
+        Returns:
+            Matching pages, best first
+        """
+        terms = list(dict.fromkeys(term for term in WORD.findall(query.lower()) if term not in STOPWORDS))
+        if not terms or limit <= 0:
+            return []
+        match = " OR ".join(f'"{term}"' for term in terms)
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT p.url, p.title, p.main_content, p.extras, p.analysis, p.query, p.stored_at, "
+                "bm25(pages_fts) AS rank FROM pages_fts JOIN pages p ON p.id = pages_fts.rowid "
+                "WHERE pages_fts MATCH ? AND p.stored_at >= ? ORDER BY rank LIMIT ?",
+                (match, self._fresh_after(), limit * 4)
+            ).fetchall()
+        
+        required = max(1, math.ceil(len(terms) * self.min_coverage))
+        hits = []
+        for url, title, main_content, extras, analysis, stored_query, stored_at, rank in rows:
+            # Coverage counts whole words (or their plural); the index itself also matches porter stems
+            words = get_document(main_content, title).index_terms
+            found = sum(1 for term in terms
+                        if term in words or term + "s" in words or (term.endswith("s") and term[:-1] in words))
+            if found < required:
+                continue
+            hits.append(CorpusHit(self._content(url, title, main_content, extras),
+                                  serialization.loads(analysis) if analysis else None, stored_query, stored_at,
+                                  score=-rank, coverage=found / len(terms)))
+            if len(hits) >= limit:
+                break
+        return hits
+    
+    def _content(self, url: str, title: str, main_content: str, extras: str) -> ScrapedContent:
+        return ScrapedContent(title=title, url=url, main_content=main_content, **serialization.loads(extras))
+    
+    def purge(self, older_than: Optional[float] = None) -> int:
+        """Delete pages stored more than older_than seconds ago (default max_age), returning how many were removed."""
+        age = older_than if older_than is not None else self.max_age
+        if age is None:
+            return 0
+        with self._lock, self._conn:
+            cutoff = time.time() - age
+            self._conn.execute(
+                "DELETE FROM pages_fts WHERE rowid IN (SELECT id FROM pages WHERE stored_at < ?)", (cutoff,)
+            )
+            return self._conn.execute("DELETE FROM pages WHERE stored_at < ?", (cutoff,)).rowcount
+    
+    def stats(self) -> Dict[str, int]:
+        return {"pages": len(self), "hits": self.hits, "misses": self.misses}
+    
+    def close(self):
+        with self._lock:
+            self._conn.close()
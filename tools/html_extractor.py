@@ -0,0 +1,307 @@
+# tools/html_extractor.py
+
+import re
+from bisect import bisect_left
+from typing import Any, Dict, List, Optional, Tuple
+from bs4 import BeautifulSoup, CData, NavigableString, Tag
+
+# Common containers for article content, in priority order
+CONTENT_SELECTORS = [
+    {"tag": "div", "attrs": {"class": ["article-body", "content-body", "story-body"]}},
+    {"tag": "section", "attrs": {"class": ["article", "content", "main-content"]}},
+    {"tag": "div", "attrs": {"class": "field--body"}},
+    {"tag": "div", "attrs": {"id": "mw-content-text"}},
+    {"tag": "article", "attrs": {}},  # Generic <article> tag
+    {"tag": "div", "attrs": {"class": ["entry-content", "post-content"]}},
+]
+
+# Ranked entries inside a content container's first block-level child
+RANK_ITEM_SELECTOR = {"tag": "div", "attrs": {"class": ["rank-item", "list-item"]}}
+
+# Words that mark a text block as the likely main content when no container matches
+FALLBACK_KEYWORDS = ["university", "college", "ranking", "top"]
+
+# Lists whose items include any of these are treated as site navigation
+NAVIGATION_ITEMS = {"Main page", "Contents", "Jobs", "Employers"}
+
+# String node types that count towards an element's text (matches Tag.get_text)
+TEXT_STRING_TYPES = (NavigableString, CData)
+
+_NON_WHITESPACE = re.compile(r"\S")
+
+def _selector_matches(selector: Dict[str, Any], name: str, attrs: Dict[str, Any]) -> bool:
+    """Check one CONTENT_SELECTORS entry against an element, using BeautifulSoup's attribute semantics."""
+    if name != selector["tag"]:
+        return False
+    for attr, wanted in selector.get("attrs", {}).items():
+        value = attrs.get(attr)
+        if value is None:
+            return False
+        wanted_values = [wanted] if isinstance(wanted, str) else wanted
+        values = value if isinstance(value, list) else [value]
+        if not any(v in wanted_values for v in values) and " ".join(values) not in wanted_values:
+            return False
+    return True
+
+class DocumentIndex:
+    """
+    Flat, document-order index of an HTML tree.
+    
+    Built in a single traversal from start/data/end events. Every element
+    records its name, attributes, the index just past its last descendant
+    and the span of its text inside one concatenated document string, so
+    "find all X inside Y" becomes a bisect over per-tag position lists and
+    an element's text is a slice instead of a walk over its subtree.
+    """
+    
+    def __init__(self, selectors: Optional[List[Dict[str, Any]]] = None):
+        self.selectors = selectors if selectors is not None else CONTENT_SELECTORS
+        self.names: List[str] = []
+        self.attrs: List[Dict[str, Any]] = []
+        self.ends: List[int] = []
+        self.text_starts: List[int] = []
+        self.text_ends: List[int] = []
+        self.by_name: Dict[str, List[int]] = {}
+        self.selector_matches: List[Optional[int]] = [None] * len(self.selectors)
+        self.text = ""
+        self._selector_tags = {selector["tag"] for selector in self.selectors}
+        self._parts: List[str] = []
+        self._length = 0
+        self._open: List[int] = []
+    
+    def start(self, name: str, attrs: Dict[str, Any]):
+        index = len(self.names)
+        self.names.append(name)
+        self.attrs.append(attrs)
+        self.ends.append(index + 1)
+        self.text_starts.append(self._length)
+        self.text_ends.append(self._length)
+        self.by_name.setdefault(name, []).append(index)
+        if name in self._selector_tags:
+            for i, selector in enumerate(self.selectors):
+                if self.selector_matches[i] is None and _selector_matches(selector, name, attrs):
+                    self.selector_matches[i] = index
+        self._open.append(index)
+    
+    def data(self, text: str):
+        self._parts.append(text)
+        self._length += len(text)
+    
+    def end(self):
+        index = self._open.pop()
+        self.ends[index] = len(self.names)
+        self.text_ends[index] = self._length
+    
+    def finish(self) -> "DocumentIndex":
+        while self._open:
+            self.end()
+        self.text = "".join(self._parts)
+        self._parts = []
+        return self
+    
+    def element_text(self, index: int) -> str:
+        return self.text[self.text_starts[index]:self.text_ends[index]]
+    
+    def find_all(self, names, within: Optional[int] = None) -> List[int]:
+        """Indices of elements with the given name(s), optionally restricted to descendants of one element."""
+        if isinstance(names, str):
+            names = [names]
+        lo, hi = (within + 1, self.ends[within]) if within is not None else (0, len(self.names))
+        found = []
+        for name in names:
+            positions = self.by_name.get(name, [])
+            found.extend(positions[bisect_left(positions, lo):bisect_left(positions, hi)])
+        if len(names) > 1:
+            found.sort()
+        return found
+    
+    def find(self, names, within: Optional[int] = None) -> Optional[int]:
+        """Index of the first element with the given name(s) in document order."""
+        if isinstance(names, str):
+            names = [names]
+        lo, hi = (within + 1, self.ends[within]) if within is not None else (0, len(self.names))
+        best = None
+        for name in names:
+            positions = self.by_name.get(name, [])
+            i = bisect_left(positions, lo)
+            if i < len(positions) and positions[i] < hi and (best is None or positions[i] < best):
+                best = positions[i]
+        return best
+
+def index_soup(soup: BeautifulSoup, selectors: Optional[List[Dict[str, Any]]] = None) -> DocumentIndex:
+    """Build a DocumentIndex from a BeautifulSoup tree in one traversal."""
+    index = DocumentIndex(selectors)
+    stack = [iter(soup.contents)]
+    while stack:
+        node = next(stack[-1], None)
+        if node is None:
+            stack.pop()
+            if stack:
+                index.end()
+        elif isinstance(node, Tag):
+            index.start(node.name, node.attrs)
+            stack.append(iter(node.contents))
+        elif type(node) in TEXT_STRING_TYPES:
+            index.data(node)
+    return index.finish()
+
+class _FallbackBlockFinder:
+    """Finds the first large p/div/article block, optionally containing a keyword, without re-reading subtrees."""
+    
+    def __init__(self, index: DocumentIndex, keywords: List[str]):
+        self.index = index
+        self.text = index.text
+        self.reversed_text = None
+        lowered = self.text.lower()
+        # Lowercasing may change the length of exotic characters; positions are only comparable if it does not
+        self.keyword_positions = None
+        if len(lowered) == len(self.text):
+            self.keyword_positions = {}
+            for keyword in keywords:
+                keyword = keyword.lower()
+                pattern = re.compile("(?=" + re.escape(keyword) + ")")
+                self.keyword_positions[keyword] = [m.start() for m in pattern.finditer(lowered)]
+        self.keywords = [keyword.lower() for keyword in keywords]
+    
+    def stripped_span(self, element: int) -> Tuple[int, int]:
+        """Start and end offsets of an element's text with surrounding whitespace removed."""
+        start, end = self.index.text_starts[element], self.index.text_ends[element]
+        match = _NON_WHITESPACE.search(self.text, start, end)
+        if match is None:
+            return start, start
+        if self.reversed_text is None:
+            self.reversed_text = self.text[::-1]
+        size = len(self.text)
+        last = _NON_WHITESPACE.search(self.reversed_text, size - end, size - start)
+        return match.start(), size - last.start()
+    
+    def contains_keyword(self, start: int, end: int) -> bool:
+        if self.keyword_positions is None:
+            block = self.text[start:end].lower()
+            return any(keyword in block for keyword in self.keywords)
+        for keyword, positions in self.keyword_positions.items():
+            i = bisect_left(positions, start)
+            if i < len(positions) and positions[i] + len(keyword) <= end:
+                return True
+        return False
+    
+    def find(self, candidates: List[int]) -> Optional[str]:
+        first_large = None
+        for element in candidates:
+            if self.index.text_ends[element] - self.index.text_starts[element] <= 100:
+                continue
+            start, end = self.stripped_span(element)
+            if end - start > 100:
+                if self.contains_keyword(start, end):
+                    return self.text[start:end]
+                if first_large is None:
+                    first_large = (start, end)
+        if first_large is not None:
+            return self.text[first_large[0]:first_large[1]]
+        return None
+
+def _extract_main_content(index: DocumentIndex) -> str:
+    """Build the main content text from the best content container or the fallback block."""
+    main_content = ""
+    content_div = next((match for match in index.selector_matches if match is not None), None)
+    
+    if content_div is not None:
+        # Extract paragraphs
+        for p in index.find_all("p", within=content_div):
+            text = index.element_text(p).strip()
+            if text:
+                main_content += text + "\n"
+        
+        # Try to extract rankings from a table, list, or div with ranked items
+        ranking_list = index.find(["table", "ul", "ol", "div"], within=content_div)
+        if ranking_list is not None:
+            name = index.names[ranking_list]
+            if name == "table":
+                main_content += "\nRanking Table:\n"
+                headers = [index.element_text(th).strip() for th in index.find_all("th", within=ranking_list)]
+                if headers:
+                    main_content += f"Headers: {headers}\n"
+                for i, row in enumerate(index.find_all("tr", within=ranking_list)[1:6], 1):  # Top 5 rows
+                    cols = index.find_all(["td", "th"], within=row)
+                    if cols:
+                        row_text = [index.element_text(col).strip() for col in cols]
+                        main_content += f"Rank {i}: {', '.join(row_text)}\n"
+            elif name in ["ul", "ol"]:
+                main_content += "\nList of Rankings:\n"
+                for li in index.find_all("li", within=ranking_list)[:5]:
+                    main_content += f"- {index.element_text(li).strip()}\n"
+            else:  # div, try to find ranked items (e.g., <div> with class 'rank-item')
+                rank_items = [
+                    div for div in index.find_all("div", within=ranking_list)
+                    if _selector_matches(RANK_ITEM_SELECTOR, "div", index.attrs[div])
+                ][:5]
+                if rank_items:
+                    main_content += "\nRanked Items:\n"
+                    for i, item in enumerate(rank_items, 1):
+                        main_content += f"Rank {i}: {index.element_text(item).strip()}\n"
+    else:
+        # Fallback: a significant text block mentioning a keyword, else the first significant block
+        block = _FallbackBlockFinder(index, FALLBACK_KEYWORDS).find(index.find_all(["p", "div", "article"]))
+        if block:
+            main_content += block + "\n"
+    
+    return main_content
+
+def extract_content(index: DocumentIndex) -> Dict[str, Any]:
+    """
+    Extract scraped fields from a DocumentIndex.
+    
+    Returns:
+        Dictionary with title, main_content, metadata, tables, lists and links
+    """
+    title_element = index.find("title")
+    title = index.element_text(title_element) if title_element is not None else "No title"
+    
+    # Extract metadata
+    metadata = {}
+    for tag in index.find_all("meta"):
+        attrs = index.attrs[tag]
+        if attrs.get("name") and attrs.get("content"):
+            metadata[attrs.get("name")] = attrs.get("content")
+        elif attrs.get("property") and attrs.get("content"):
+            metadata[attrs.get("property")] = attrs.get("content")
+    
+    # Extract tables (capture the top rows of the first table)
+    tables = []
+    for table in index.find_all("table")[:1]:
+        headers = [index.element_text(th).strip() for th in index.find_all("th", within=table)]
+        rows = []
+        for row in index.find_all("tr", within=table)[1:6]:  # Skip header row
+            cols = index.find_all("td", within=row)
+            if cols:
+                rows.append([index.element_text(col).strip() for col in cols])
+        if headers and rows:
+            tables.append({"headers": headers, "rows": rows})
+    
+    # Extract lists (excluding navigation)
+    lists = []
+    for ul in index.find_all(["ul", "ol"])[:3]:
+        items = [index.element_text(li).strip() for li in index.find_all("li", within=ul)]
+        if items and not NAVIGATION_ITEMS.intersection(items):
+            lists.append({"type": index.names[ul], "items": items[:10]})
+    
+    # Extract links (limited to the first 5 relevant links)
+    links = []
+    for a in index.find_all("a"):
+        link_url = index.attrs[a].get("href")
+        if link_url is None:
+            continue
+        link_text = index.element_text(a).strip()
+        if link_text and link_url and not link_url.startswith("#") and "signup" not in link_url and "login" not in link_url:
+            links.append({"text": link_text, "url": link_url})
+            if len(links) >= 5:
+                break
+    
+    return {
+        "title": title,
+        "main_content": _extract_main_content(index),
+        "metadata": metadata,
+        "tables": tables,
+        "lists": lists,
+        "links": links
+    }
@@ -0,0 +1,154 @@
+# tools/near_duplicates.py
+
+import zlib
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Set, Tuple
+import numpy as np
+from tools.text_analysis import WORD
+
+_MASK_32 = np.uint64(0xFFFFFFFF)
+
+def _choose_bands(num_perm: int, threshold: float) -> Tuple[int, int]:
+    """
+    Split num_perm into (bands, rows) for LSH.
+    
+    Pages whose similarity is near the band threshold (1/bands)^(1/rows)
+    collide only about half the time, so the split is aimed somewhat below
+    the requested threshold; candidates are verified exactly afterwards.
+    """
+    target = max(threshold - 0.15, threshold / 2)
+    options = [(bands, num_perm // bands) for bands in range(1, num_perm + 1) if num_perm % bands == 0]
+    return min(options, key=lambda option: abs((1 / option[0]) ** (1 / option[1]) - target))
+
+class NearDuplicateDetector:
+    """
+    Collapses mirrors, syndicated copies and pagination variants of the same page.
+    
+    Each page's main content is reduced to a set of word shingles and a
+    MinHash signature. Signatures are split into bands and hashed into
+    locality-sensitive buckets, so a page is only compared (by exact
+    Jaccard similarity of its shingles) with earlier pages that share a
+    bucket rather than with every page seen so far.
+    """
+    
+    def __init__(self, threshold: float = 0.9, num_perm: int = 128, shingle_size: int = 3, seed: int = 1):
+        """
+        Initialize the NearDuplicateDetector.
+        
+        Args:
+            threshold: Jaccard similarity of word shingles at or above which two pages are duplicates
+            num_perm: Number of MinHash permutations in a signature
+            shingle_size: Words per shingle
+            seed: Seed for the MinHash permutations, so signatures are reproducible
+        """
+        if not 0.0 < threshold <= 1.0:
+            raise ValueError("threshold must be in (0, 1]")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self.bands, self.rows = _choose_bands(num_perm, threshold)
+        rng = np.random.default_rng(seed)
+        # Multiply-shift hash family over 32-bit shingle hashes; odd multipliers, arithmetic wraps mod 2**64
+        self._multipliers = rng.integers(1, 2 ** 63, size=num_perm, dtype=np.uint64) | np.uint64(1)
+        self._offsets = rng.integers(0, 2 ** 63, size=num_perm, dtype=np.uint64)
+    
+    def shingles(self, text: str) -> Set[int]:
+        """32-bit hashes of the text's lowercased word shingles."""
+        words = WORD.findall(text.lower())
+        if not words:
+            return set()
+        size = min(self.shingle_size, len(words))
+        return {zlib.crc32(" ".join(words[i:i + size]).encode("utf-8")) for i in range(len(words) - size + 1)}
+    
+    def signature(self, shingles: Set[int]) -> np.ndarray:
+        """MinHash signature of a shingle set."""
+        values = np.fromiter(shingles, dtype=np.uint64, count=len(shingles))
+        hashed = (values[:, None] * self._multipliers + self._offsets) >> np.uint64(32)
+        return (hashed & _MASK_32).min(axis=0)
+    
+    def index(self) -> "DuplicateIndex":
+        """Empty index for checking pages one at a time as they arrive."""
+        return DuplicateIndex(self)
+    
+    def deduplicate(self, contents: List[Any]) -> Tuple[List[int], List[Dict[str, Any]]]:
+        """
+        Find the pages to keep and the near-duplicates to merge into them.
+        
+        The first page of each duplicate group (in the order given, e.g.
+        search rank) is kept. Pages without text are always kept.
+        
+        Args:
+            contents: Scraped contents (dicts or ScrapedContent objects)
+        
+        Returns:
+            Tuple of (indices of kept pages, merge report entries of the form
+            {"url", "merged": [{"url", "similarity"}]})
+        """
+        index = self.index()
+        kept: List[int] = []
+        merged: Dict[int, List[Dict[str, Any]]] = defaultdict(list)
+        for position, content in enumerate(contents):
+            match = index.add(position, content)
+            if match is None:
+                kept.append(position)
+            else:
+                merged[match[0]].append({"url": self._url(content), "similarity": match[1]})
+        
+        report = [{"url": self._url(contents[position]), "merged": merged[position]}
+                  for position in kept if position in merged]
+        return kept, report
+    
+    def _text(self, content: Any) -> str:
+        if hasattr(content, "main_content"):
+            return content.main_content or ""
+        if isinstance(content, dict):
+            return content.get("main_content", "") or ""
+        return str(content)
+    
+    def _url(self, content: Any) -> str:
+        if hasattr(content, "url"):
+            return content.url
+        if isinstance(content, dict):
+            return content.get("url", "unknown source")
+        return "unknown source"
+
+class DuplicateIndex:
+    """LSH buckets of the distinct pages seen so far."""
+    
+    def __init__(self, detector: NearDuplicateDetector):
+        self.detector = detector
+        self._buckets: Dict[Tuple[int, bytes], List[Any]] = defaultdict(list)
+        self._shingles: Dict[Any, Set[int]] = {}
+    
+    def add(self, key: Any, content: Any) -> Optional[Tuple[Any, float]]:
+        """
+        Check a page against the pages already added.
+        
+        Args:
+            key: Identifier reported when later pages duplicate this one
+            content: Scraped content (dict or ScrapedContent object)
+        
+        Returns:
+            (key of the most similar earlier page, rounded similarity) if the
+            page is a near-duplicate, otherwise None after adding the page
+        """
+        detector = self.detector
+        shingles = detector.shingles(detector._text(content))
+        if not shingles:
+            return None
+        bands = detector.signature(shingles).reshape(detector.bands, detector.rows)
+        keys = [(band, bands[band].tobytes()) for band in range(detector.bands)]
+        
+        best: Optional[Tuple[float, Any]] = None
+        for candidate in dict.fromkeys(other for bucket in keys for other in self._buckets.get(bucket, ())):
+            other = self._shingles[candidate]
+            similarity = len(shingles & other) / len(shingles | other)
+            if similarity >= detector.threshold and (best is None or similarity > best[0]):
+                best = (similarity, candidate)
+        if best is not None:
+            return best[1], round(best[0], 3)
+        
+        self._shingles[key] = shingles
+        for bucket in keys:
+            self._buckets[bucket].append(key)
+        return None
@@ -1,41 +1,85 @@
 # tools/news_aggregator.py
 import os
-from dotenv import load_dotenv
-import requests
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
+from utils.http_client import HttpClient, get_default_client
+from utils.async_http_client import AsyncHttpClient, get_default_async_client
+from utils.singleflight import SingleFlight, get_default_singleflight
 
 class NewsArticle:
+    __slots__ = ("title", "source", "url", "published_date")
+    
     def __init__(self, title: str, source: str, url: str, published_date: str):
         self.title = title
         self.source = source
         self.url = url
         self.published_date = published_date
+    
+    def to_dict(self):
+        return {
+            "title": self.title,
+            "source": self.source,
+            "url": self.url,
+            "published_date": self.published_date
+        }
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "NewsArticle":
+        return cls(**data)
 
 class NewsAggregator:
-    def __init__(self, use_mock: bool = True):
+    def __init__(self, use_mock: bool = True, http_client: Optional[HttpClient] = None,
+                 async_http_client: Optional[AsyncHttpClient] = None, api_key: Optional[str] = None,
+                 singleflight: Optional[SingleFlight] = None):
         self.use_mock = use_mock
-        load_dotenv()
-        self.api_key = os.environ.get("NEWSAPI_KEY")
-
+        self.http = http_client or get_default_client()
+        self.async_http = async_http_client or get_default_async_client()
+        self.flights = singleflight or get_default_singleflight()
+        self.base_url = "https://newsapi.org/v2/everything"
+        # .env is loaded once by the entry points (main.py, app.py), not per instance
+        self.api_key = api_key or os.environ.get("NEWSAPI_KEY")
+    
     def _mock_fetch_news(self, query: str, num_articles: int) -> List[NewsArticle]:
         return [NewsArticle(f"Mock Article {i}", "Mock Source", f"http://mock{i}.com", "2025-04-24") for i in range(num_articles)]
-
+    
     def fetch_news(self, query: str, num_articles: int) -> Optional[List[NewsArticle]]:
         if self.use_mock or not self.api_key:
             return self._mock_fetch_news(query, num_articles)
-        
-        url = f"https://newsapi.org/v2/everything?q={query}&apiKey={self.api_key}&language=en&pageSize={num_articles}"
+        return self.flights.do(self._flight_key(query, num_articles), self._fetch_news, query, num_articles)
+    
+    def _flight_key(self, query: str, num_articles: int):
+        return ("news", self.base_url, self.api_key, query, num_articles)
+    
+    def _fetch_news(self, query: str, num_articles: int) -> Optional[List[NewsArticle]]:
         try:
-            response = requests.get(url)
+            response = self.http.get(self.base_url, params=self._build_params(query, num_articles))
             response.raise_for_status()
-            data = response.json()
-            articles = data.get("articles", [])
-            return [NewsArticle(
-                article.get("title", "No title"),
-                article.get("source", {}).get("name", "Unknown"),
-                article.get("url", ""),
-                article.get("publishedAt", "No date")
-            ) for article in articles[:num_articles]]
+            return self._parse_articles(response.json(), num_articles)
+        except Exception as e:
+            print(f"Error fetching news: {e}")
+            return None
+    
+    async def afetch_news(self, query: str, num_articles: int) -> Optional[List[NewsArticle]]:
+        if self.use_mock or not self.api_key:
+            return self._mock_fetch_news(query, num_articles)
+        return await self.flights.ado(self._flight_key(query, num_articles),
+                                      lambda: self._afetch_news(query, num_articles))
+    
+    async def _afetch_news(self, query: str, num_articles: int) -> Optional[List[NewsArticle]]:
+        try:
+            data = await self.async_http.get_json(self.base_url, params=self._build_params(query, num_articles))
+            return self._parse_articles(data, num_articles)
         except Exception as e:
             print(f"Error fetching news: {e}")
-            return None
\ No newline at end of file
+            return None
+    
+    def _build_params(self, query: str, num_articles: int) -> Dict[str, Any]:
+        return {"q": query, "apiKey": self.api_key, "language": "en", "pageSize": num_articles}
+    
+    def _parse_articles(self, data: Dict[str, Any], num_articles: int) -> List[NewsArticle]:
+        articles = data.get("articles", [])
+        return [NewsArticle(
+            article.get("title", "No title"),
+            article.get("source", {}).get("name", "Unknown"),
+            article.get("url", ""),
+            article.get("publishedAt", "No date")
+        ) for article in articles[:num_articles]]
@@ -0,0 +1,209 @@
+# tools/page_cache.py
+
+import copy
+import hashlib
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Any, Dict, Optional
+from utils.cache import CacheEntry, MemoryCache
+
+class PageRecord:
+    """Validators and body reference stored for one URL."""
+    
+    def __init__(self, url: str, body_hash: str, encoding: Optional[str], etag: Optional[str],
+                 last_modified: Optional[str], fetched_at: float, fresh_until: float):
+        self.url = url
+        self.body_hash = body_hash
+        self.encoding = encoding
+        self.etag = etag
+        self.last_modified = last_modified
+        self.fetched_at = fetched_at
+        self.fresh_until = fresh_until
+    
+    def is_fresh(self, now: Optional[float] = None) -> bool:
+        return (now if now is not None else time.time()) < self.fresh_until
+
+def freshness_lifetime(headers: Any) -> Optional[float]:
+    """
+    Seconds a response may be reused without revalidation, from Cache-Control.
+    
+    Returns:
+        0 when the response must be revalidated, None when it must not be stored
+    """
+    cache_control = (headers.get("Cache-Control") or "").lower()
+    if "no-store" in cache_control:
+        return None
+    if "no-cache" in cache_control:
+        return 0
+    match = re.search(r"max-age=(\d+)", cache_control)
+    return float(match.group(1)) if match else 0
+
+class PageCache:
+    """
+    HTTP-aware cache for WebScraper.
+    
+    Raw bodies are stored zlib-compressed and addressed by their SHA-256,
+    alongside each URL's ETag/Last-Modified validators so pages can be
+    revalidated with If-None-Match/If-Modified-Since. Parsed ScrapedContent
+    objects are kept in an LRU keyed by body hash, so a 304 response or an
+    unchanged body skips the HTML parse. Once max_pages or max_bytes is
+    exceeded the least recently used pages are evicted, and bodies no page
+    refers to any more are deleted.
+    """
+    
+    def __init__(self, path: str = ":memory:", max_parsed: int = 256, compression_level: int = 6,
+                 max_pages: Optional[int] = 10000, max_bytes: Optional[int] = 256 * 1024 * 1024):
+        """
+        Initialize the PageCache.
+        
+        Args:
+            path: SQLite file holding page validators and compressed bodies
+            max_parsed: Number of parsed ScrapedContent objects kept in memory
+            compression_level: zlib compression level for stored bodies
+            max_pages: Maximum number of URLs kept, or None for no limit
+            max_bytes: Maximum total size of the compressed bodies kept, or None for no limit
+        """
+        self.compression_level = compression_level
+        self.max_pages = max_pages
+        self.max_bytes = max_bytes
+        self.parsed = MemoryCache(max_entries=max_parsed)
+        self.hits = {"fresh": 0, "revalidated": 0, "parsed": 0}
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS pages (url TEXT PRIMARY KEY, body_hash TEXT NOT NULL, "
+                "encoding TEXT, etag TEXT, last_modified TEXT, fetched_at REAL NOT NULL, fresh_until REAL NOT NULL, "
+                "used_at REAL NOT NULL DEFAULT 0)"
+            )
+            if "used_at" not in {row[1] for row in self._conn.execute("PRAGMA table_info(pages)")}:
+                # Caches created before eviction existed
+                self._conn.execute("ALTER TABLE pages ADD COLUMN used_at REAL NOT NULL DEFAULT 0")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS pages_used_at ON pages (used_at)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS pages_body_hash ON pages (body_hash)")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS bodies (body_hash TEXT PRIMARY KEY, body BLOB NOT NULL)")
+            self._page_count = self._conn.execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+            self._body_bytes = self._conn.execute("SELECT COALESCE(SUM(LENGTH(body)), 0) FROM bodies").fetchone()[0]
+    
+    def lookup(self, url: str) -> Optional[PageRecord]:
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT url, body_hash, encoding, etag, last_modified, fetched_at, fresh_until FROM pages WHERE url = ?",
+                (url,)
+            ).fetchone()
+            if row is not None:
+                self._conn.execute("UPDATE pages SET used_at = ? WHERE url = ?", (time.time(), url))
+        return PageRecord(*row) if row else None
+    
+    def conditional_headers(self, record: Optional[PageRecord]) -> Dict[str, str]:
+        """Revalidation headers for a previously stored page."""
+        headers = {}
+        if record is not None:
+            if record.etag:
+                headers["If-None-Match"] = record.etag
+            if record.last_modified:
+                headers["If-Modified-Since"] = record.last_modified
+        return headers
+    
+    def store(self, url: str, body: bytes, encoding: Optional[str], headers: Any) -> Optional[str]:
+        """
+        Store a freshly downloaded body and the URL's validators.
+        
+        Returns:
+            The body hash, or None if the response forbids storing
+        """
+        lifetime = freshness_lifetime(headers)
+        if lifetime is None:
+            return None
+        body_hash = hashlib.sha256(body).hexdigest()
+        compressed = zlib.compress(body, self.compression_level)
+        now = time.time()
+        with self._lock, self._conn:
+            previous = self._conn.execute("SELECT body_hash FROM pages WHERE url = ?", (url,)).fetchone()
+            if self._conn.execute("INSERT OR IGNORE INTO bodies (body_hash, body) VALUES (?, ?)",
+                                  (body_hash, compressed)).rowcount:
+                self._body_bytes += len(compressed)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO pages (url, body_hash, encoding, etag, last_modified, fetched_at, fresh_until, "
+                "used_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (url, body_hash, encoding, headers.get("ETag"), headers.get("Last-Modified"), now, now + lifetime, now)
+            )
+            if previous is None:
+                self._page_count += 1
+            elif previous[0] != body_hash:
+                self._drop_body_if_unused(previous[0])
+            self._evict()
+        return body_hash
+    
+    def _drop_body_if_unused(self, body_hash: str):
+        """Delete a body no page refers to any more. Called with the lock held, inside a transaction."""
+        if self._conn.execute("SELECT 1 FROM pages WHERE body_hash = ? LIMIT 1", (body_hash,)).fetchone():
+            return
+        row = self._conn.execute("SELECT LENGTH(body) FROM bodies WHERE body_hash = ?", (body_hash,)).fetchone()
+        if row is not None:
+            self._conn.execute("DELETE FROM bodies WHERE body_hash = ?", (body_hash,))
+            self._body_bytes -= row[0]
+        self.parsed.delete(body_hash)
+    
+    def _evict(self):
+        """Remove least recently used pages until both limits hold. Called with the lock held, inside a transaction."""
+        while ((self.max_pages is not None and self._page_count > self.max_pages)
+               or (self.max_bytes is not None and self._body_bytes > self.max_bytes)):
+            row = self._conn.execute("SELECT url, body_hash FROM pages ORDER BY used_at, rowid LIMIT 1").fetchone()
+            if row is None:
+                break
+            self._conn.execute("DELETE FROM pages WHERE url = ?", (row[0],))
+            self._page_count -= 1
+            self.evictions += 1
+            self._drop_body_if_unused(row[1])
+    
+    def refresh(self, url: str, headers: Any):
+        """Extend a page's freshness after a 304 Not Modified response."""
+        lifetime = freshness_lifetime(headers) or 0
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE pages SET fetched_at = ?, fresh_until = ? WHERE url = ?",
+                               (now, now + lifetime, url))
+    
+    def load_body(self, body_hash: str) -> Optional[bytes]:
+        with self._lock:
+            row = self._conn.execute("SELECT body FROM bodies WHERE body_hash = ?", (body_hash,)).fetchone()
+        return zlib.decompress(row[0]) if row else None
+    
+    def get_parsed(self, body_hash: str, url: str):
+        """Return the parsed content for a body hash, re-labelled with the requested URL."""
+        entry = self.parsed.get(body_hash)
+        if entry is None:
+            return None
+        content = copy.copy(entry.value)
+        content.url = url
+        return content
+    
+    def set_parsed(self, body_hash: str, content):
+        self.parsed.set(body_hash, CacheEntry(content, expires_at=float("inf")))
+    
+    def record_hit(self, kind: str):
+        with self._lock:
+            self.hits[kind] += 1
+    
+    def record_miss(self):
+        with self._lock:
+            self.misses += 1
+    
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            stats = dict(self.hits)
+            stats["misses"] = self.misses
+            stats["evictions"] = self.evictions
+            stats["pages"] = self._page_count
+            stats["body_bytes"] = self._body_bytes
+            return stats
+    
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,143 @@
+# tools/page_stream.py
+
+import codecs
+import re
+from html.parser import HTMLParser
+from typing import Any, Dict, List, Optional, Tuple
+from tools.html_extractor import CONTENT_SELECTORS, _selector_matches
+
+# Content types the scraper is willing to download and parse
+ALLOWED_CONTENT_TYPES = ("text/html", "application/xhtml+xml", "text/plain")
+
+# Default cap on the number of (decompressed) body bytes read per page
+DEFAULT_MAX_BYTES = 5 * 1024 * 1024
+
+# Elements without an end tag, which never stay open
+VOID_ELEMENTS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta",
+                 "param", "source", "track", "wbr"}
+
+_META_CHARSET = re.compile(rb"""<meta[^>]+charset\s*=\s*["']?\s*([a-zA-Z0-9_.:-]+)""", re.IGNORECASE)
+
+class PageRejected(Exception):
+    """Raised when a response is not worth downloading (wrong content type or too large)."""
+
+def check_response_headers(headers: Any, max_bytes: Optional[int],
+                           allowed_content_types=ALLOWED_CONTENT_TYPES):
+    """
+    Reject a response from its headers alone, before reading the body.
+    
+    Args:
+        headers: Response headers
+        max_bytes: Maximum accepted body size, or None for no limit
+        allowed_content_types: Accepted media types; responses without a Content-Type are accepted
+    """
+    content_type = (headers.get("Content-Type") or "").split(";")[0].strip().lower()
+    if content_type and allowed_content_types and content_type not in allowed_content_types:
+        raise PageRejected(f"Unsupported content type: {content_type}")
+    content_length = headers.get("Content-Length")
+    if max_bytes is not None and content_length and content_length.isdigit() and int(content_length) > max_bytes:
+        raise PageRejected(f"Page too large: {content_length} bytes (limit {max_bytes})")
+
+class MainContentWatcher(HTMLParser):
+    """Incremental tokenizer that notices when the first main content container has been closed."""
+    
+    def __init__(self, selectors: Optional[List[Dict[str, Any]]] = None):
+        super().__init__(convert_charrefs=False)
+        self.selectors = selectors if selectors is not None else CONTENT_SELECTORS
+        self.open_tags: List[str] = []
+        self.container_depth: Optional[int] = None
+        self.closed = False
+    
+    def handle_starttag(self, tag, attrs):
+        if tag in VOID_ELEMENTS:
+            return
+        if self.container_depth is None:
+            attributes = {name: (value or "") for name, value in attrs}
+            if "class" in attributes:
+                attributes["class"] = attributes["class"].split()
+            if any(_selector_matches(selector, tag, attributes) for selector in self.selectors):
+                self.container_depth = len(self.open_tags)
+        self.open_tags.append(tag)
+    
+    def handle_endtag(self, tag):
+        if tag not in self.open_tags:
+            return
+        while self.open_tags:
+            if self.open_tags.pop() == tag:
+                break
+        if self.container_depth is not None and len(self.open_tags) <= self.container_depth:
+            self.closed = True
+
+class PageReader:
+    """
+    Accumulates a streamed response body under a byte cap.
+    
+    Chunks are decoded incrementally as they arrive. With
+    stop_after_main_content, reading stops as soon as the first element
+    matching a content selector is closed, which skips the rest of long
+    pages at the cost of metadata, lists and links that appear after it.
+    """
+    
+    def __init__(self, encoding: Optional[str], max_bytes: Optional[int] = DEFAULT_MAX_BYTES,
+                 stop_after_main_content: bool = False):
+        """
+        Initialize the PageReader.
+        
+        Args:
+            encoding: Encoding from the response headers; sniffed from the first chunk if None
+            max_bytes: Maximum number of body bytes to keep, or None for no limit
+            stop_after_main_content: Stop reading once the main content container is closed
+        """
+        self.encoding = encoding
+        self.max_bytes = max_bytes
+        self.watcher = MainContentWatcher() if stop_after_main_content else None
+        self.truncated = False
+        self.size = 0
+        self._chunks: List[bytes] = []
+        self._text: List[str] = []
+        self._decoder = None
+    
+    def _start_decoder(self, first_chunk: bytes):
+        if self.encoding is None:
+            match = _META_CHARSET.search(first_chunk[:4096])
+            self.encoding = match.group(1).decode("ascii") if match else "utf-8"
+        try:
+            self._decoder = codecs.getincrementaldecoder(self.encoding)(errors="replace")
+        except LookupError:
+            self.encoding = "utf-8"
+            self._decoder = codecs.getincrementaldecoder(self.encoding)(errors="replace")
+    
+    def feed(self, chunk: bytes) -> bool:
+        """
+        Add a chunk of the body.
+        
+        Returns:
+            False once no more chunks should be read
+        """
+        if not chunk:
+            return True
+        if self._decoder is None:
+            self._start_decoder(chunk)
+        if self.max_bytes is not None and self.size + len(chunk) > self.max_bytes:
+            chunk = chunk[:self.max_bytes - self.size]
+            self.truncated = True
+        self.size += len(chunk)
+        self._chunks.append(chunk)
+        text = self._decoder.decode(chunk)
+        self._text.append(text)
+        if self.watcher is not None:
+            self.watcher.feed(text)
+            if self.watcher.closed:
+                self.truncated = True
+        return not self.truncated
+    
+    def finish(self) -> Tuple[bytes, str, bool]:
+        """
+        Finish reading.
+        
+        Returns:
+            (raw body, decoded text, whether the body is complete)
+        """
+        if self._decoder is not None:
+            self._text.append(self._decoder.decode(b"", final=True))
+        return b"".join(self._chunks), "".join(self._text), not self.truncated
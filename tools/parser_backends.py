@@ -0,0 +1,155 @@
+# tools/parser_backends.py
+
+from typing import Any, Dict, List, Optional
+from bs4 import BeautifulSoup
+from tools.html_extractor import DocumentIndex, index_soup
+
+try:
+    import lxml.html
+except ImportError:  # lxml is an optional, faster parser
+    lxml = None
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:  # selectolax is an optional, faster parser
+    LexborHTMLParser = None
+
+# Elements whose text BeautifulSoup stores as special string types that get_text() skips
+EXCLUDED_TEXT_CONTAINERS = {"script", "style", "template", "rt", "rp"}
+
+# Attributes BeautifulSoup splits into lists of values
+MULTI_VALUED_ATTRIBUTES = {"class", "rel", "rev", "accept-charset", "headers", "accesskey", "dropzone"}
+
+def _normalize_attrs(attrs) -> Dict[str, Any]:
+    """Convert parser-specific attributes to BeautifulSoup's representation."""
+    normalized = {}
+    for name, value in attrs.items():
+        value = "" if value is None else value
+        normalized[name] = value.split() if name in MULTI_VALUED_ATTRIBUTES else value
+    return normalized
+
+class ParserBackend:
+    """Turns an HTML string into the DocumentIndex the extraction logic works on."""
+    
+    name = ""
+    
+    def build_index(self, html: str, selectors: Optional[List[Dict[str, Any]]] = None) -> DocumentIndex:
+        raise NotImplementedError
+
+class HtmlParserBackend(ParserBackend):
+    """BeautifulSoup with Python's built-in html.parser (pure Python, no extra dependencies)."""
+    
+    name = "html.parser"
+    
+    def build_index(self, html: str, selectors: Optional[List[Dict[str, Any]]] = None) -> DocumentIndex:
+        return index_soup(BeautifulSoup(html, "html.parser"), selectors)
+
+class LxmlBackend(ParserBackend):
+    """libxml2's HTML parser through lxml, walked directly without building a BeautifulSoup tree."""
+    
+    name = "lxml"
+    
+    def __init__(self):
+        if lxml is None:
+            raise ImportError("The lxml parser backend requires lxml (pip install lxml)")
+    
+    def build_index(self, html: str, selectors: Optional[List[Dict[str, Any]]] = None) -> DocumentIndex:
+        index = DocumentIndex(selectors)
+        if not html.strip():
+            return index.finish()
+        try:
+            root = lxml.html.document_fromstring(html)
+        except ValueError:
+            # Unicode input with an XML encoding declaration must be handed over as bytes
+            root = lxml.html.document_fromstring(html.encode("utf-8"),
+                                                 parser=lxml.html.HTMLParser(encoding="utf-8"))
+        
+        stack = [(root, False, False)]
+        while stack:
+            element, closing, excluded = stack.pop()
+            if closing:
+                index.end()
+                if element.tail and not excluded:
+                    index.data(element.tail)
+                continue
+            if not isinstance(element.tag, str):  # Comments and processing instructions
+                if element.tail and not excluded:
+                    index.data(element.tail)
+                continue
+            inner_excluded = excluded or element.tag in EXCLUDED_TEXT_CONTAINERS
+            index.start(element.tag, _normalize_attrs(element.attrib))
+            stack.append((element, True, excluded))
+            if element.text and not inner_excluded:
+                index.data(element.text)
+            for child in reversed(element):
+                stack.append((child, False, inner_excluded))
+        return index.finish()
+
+class SelectolaxBackend(ParserBackend):
+    """The lexbor HTML5 parser through selectolax."""
+    
+    name = "selectolax"
+    
+    def __init__(self):
+        if LexborHTMLParser is None:
+            raise ImportError("The selectolax parser backend requires selectolax (pip install selectolax)")
+    
+    def build_index(self, html: str, selectors: Optional[List[Dict[str, Any]]] = None) -> DocumentIndex:
+        index = DocumentIndex(selectors)
+        root = LexborHTMLParser(html).root
+        if root is None:
+            return index.finish()
+        
+        stack = [(root, False, False)]
+        while stack:
+            node, closing, excluded = stack.pop()
+            if closing:
+                index.end()
+                continue
+            tag = node.tag
+            if tag == "-text":
+                if not excluded:
+                    index.data(node.text(deep=False))
+                continue
+            if tag.startswith("-") or tag.startswith("_"):  # Comments, doctype and other non-elements
+                continue
+            inner_excluded = excluded or tag in EXCLUDED_TEXT_CONTAINERS
+            index.start(tag, _normalize_attrs(node.attributes))
+            stack.append((node, True, excluded))
+            children = []
+            child = node.child
+            while child is not None:
+                children.append(child)
+                child = child.next
+            for child in reversed(children):
+                stack.append((child, False, inner_excluded))
+        return index.finish()
+
+BACKENDS = {
+    HtmlParserBackend.name: HtmlParserBackend,
+    LxmlBackend.name: LxmlBackend,
+    SelectolaxBackend.name: SelectolaxBackend
+}
+
+def get_backend(name: str) -> ParserBackend:
+    """
+    Create a parser backend by name.
+    
+    Args:
+        name: One of "html.parser", "lxml" or "selectolax"
+    
+    Returns:
+        ParserBackend instance
+    """
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown parser backend '{name}'. Choose from: {', '.join(BACKENDS)}")
+    return BACKENDS[name]()
+
+def available_backends() -> List[str]:
+    """Names of the parser backends whose dependencies are installed."""
+    names = [HtmlParserBackend.name]
+    if lxml is not None:
+        names.append(LxmlBackend.name)
+    if LexborHTMLParser is not None:
+        names.append(SelectolaxBackend.name)
+    return names
@@ -0,0 +1,173 @@
+# tools/ranking.py
+
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from tools.text_analysis import WORD
+
+class BM25Index:
+    """
+    Okapi BM25 scoring over every document the analyzer has seen.
+    
+    Documents are added once, keyed by a content fingerprint, into per-term
+    postings; document frequencies and the average document length are
+    updated incrementally as documents are added or evicted. Scoring a query
+    reads only the postings of the query terms into a sparse (candidate,
+    term, frequency) matrix and evaluates BM25 for every candidate with a
+    handful of vectorized NumPy operations, so its cost depends on the
+    number of hits rather than on document sizes.
+    """
+    
+    def __init__(self, k1: float = 1.2, b: float = 0.75, max_documents: int = 10000):
+        """
+        Initialize the BM25Index.
+        
+        Args:
+            k1: Term frequency saturation
+            b: Strength of document length normalization
+            max_documents: Documents kept before the least recently used is evicted from the statistics
+        """
+        self.k1 = k1
+        self.b = b
+        self.max_documents = max_documents
+        self._vocabulary: Dict[str, int] = {}
+        self._doc_freq = np.zeros(1024, dtype=np.int64)
+        self._postings: List[Dict[str, int]] = []
+        self._documents: "OrderedDict[str, Tuple[List[int], int]]" = OrderedDict()
+        self._total_length = 0
+        self._lock = threading.Lock()
+    
+    def __len__(self) -> int:
+        return len(self._documents)
+    
+    def __contains__(self, key: str) -> bool:
+        return key in self._documents
+    
+    @staticmethod
+    def tokenize(text: str) -> List[str]:
+        return WORD.findall(text.lower())
+    
+    def _term_id(self, term: str) -> int:
+        term_id = self._vocabulary.get(term)
+        if term_id is None:
+            term_id = len(self._vocabulary)
+            self._vocabulary[term] = term_id
+            self._postings.append({})
+            if term_id >= len(self._doc_freq):
+                self._doc_freq = np.concatenate([self._doc_freq, np.zeros_like(self._doc_freq)])
+        return term_id
+    
+    def add(self, key: str, term_counts: Dict[str, int]) -> bool:
+        """
+        Add a document's term counts to the corpus statistics.
+        
+        Args:
+            key: Stable document key (e.g. a content fingerprint); adding a known key only refreshes it
+            term_counts: {term: occurrences} for the document
+        
+        Returns:
+            True if the document was new
+        """
+        with self._lock:
+            if key in self._documents:
+                self._documents.move_to_end(key)
+                return False
+            ids = []
+            for term, count in term_counts.items():
+                term_id = self._term_id(term)
+                self._postings[term_id][key] = count
+                ids.append(term_id)
+            length = sum(term_counts.values())
+            self._doc_freq[ids] += 1
+            self._total_length += length
+            self._documents[key] = (ids, length)
+            while len(self._documents) > self.max_documents:
+                self._evict(next(iter(self._documents)))
+            return True
+    
+    def _evict(self, key: str):
+        ids, length = self._documents.pop(key)
+        for term_id in ids:
+            del self._postings[term_id][key]
+        self._doc_freq[ids] -= 1
+        self._total_length -= length
+    
+    def remove(self, key: str):
+        with self._lock:
+            if key in self._documents:
+                self._evict(key)
+    
+    def _idf(self, doc_freq: np.ndarray) -> np.ndarray:
+        # Lucene's variant of the BM25 IDF, which is never negative
+        count = len(self._documents)
+        return np.log1p((count - doc_freq + 0.5) / (doc_freq + 0.5))
+    
+    def score(self, query: str, keys: Sequence[str]) -> np.ndarray:
+        """
+        Score indexed documents against a query.
+        
+        Scores are divided by the best score any document could reach for the
+        query (every query term present with a saturating frequency), so they
+        fall between 0.0 and 1.0 and are comparable across queries.
+        
+        Args:
+            query: Query text
+            keys: Keys of previously added documents; unknown keys score 0.0
+        
+        Returns:
+            Array of normalized scores, one per key
+        """
+        terms = list(dict.fromkeys(self.tokenize(query)))
+        scores = np.zeros(len(keys), dtype=np.float64)
+        if not terms or not keys:
+            return scores
+        with self._lock:
+            if not self._documents:
+                return scores
+            known = [self._vocabulary[term] for term in terms if term in self._vocabulary]
+            query_doc_freq = np.array([self._doc_freq[self._vocabulary[term]] if term in self._vocabulary else 0
+                                       for term in terms], dtype=np.float64)
+            best = float((self._idf(query_doc_freq) * (self.k1 + 1)).sum())
+            average_length = self._total_length / len(self._documents) or 1.0
+            
+            # Sparse candidates × query terms matrix in coordinate form
+            rows, columns, freqs = [], [], []
+            candidates = list(dict.fromkeys(keys))
+            candidate_rows = {key: row for row, key in enumerate(candidates)}
+            for column, term_id in enumerate(known):
+                posting = self._postings[term_id]
+                if len(posting) < len(candidate_rows):
+                    hits = ((candidate_rows.get(key), count) for key, count in posting.items())
+                else:
+                    hits = ((row, posting.get(key)) for key, row in candidate_rows.items())
+                for row, count in hits:
+                    if row is not None and count is not None:
+                        rows.append(row)
+                        columns.append(column)
+                        freqs.append(count)
+            if not rows:
+                return scores
+            rows = np.array(rows)
+            lengths = np.array([self._documents[candidates[row]][1] for row in rows.tolist()], dtype=np.float64)
+            idf = self._idf(self._doc_freq[np.array(known)].astype(np.float64))
+        
+        freqs = np.array(freqs, dtype=np.float64)
+        saturation = freqs + self.k1 * (1 - self.b + self.b * lengths / average_length)
+        contributions = idf[columns] * freqs * (self.k1 + 1) / saturation
+        candidate_scores = np.zeros(len(candidates), dtype=np.float64)
+        np.add.at(candidate_scores, rows, contributions)
+        if len(candidates) < len(keys):
+            candidate_scores = candidate_scores[[candidate_rows[key] for key in keys]]
+        return candidate_scores / best if best > 0 else candidate_scores
+
+_default_index: Optional[BM25Index] = None
+_default_index_lock = threading.Lock()
+
+def get_default_ranking_index() -> BM25Index:
+    """Return a process-wide BM25Index for analyzers that opt in to sharing corpus statistics."""
+    global _default_index
+    with _default_index_lock:
+        if _default_index is None:
+            _default_index = BM25Index()
+        return _default_index
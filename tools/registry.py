@@ -0,0 +1,133 @@
+# tools/registry.py
+
+import threading
+import time
+from typing import Any, Dict, Iterable, Optional
+from agent.research_agent import WebResearchAgent
+from tools.analysis_pool import AnalysisPool
+from tools.corpus import Corpus
+from tools.page_cache import PageCache
+from tools.search_cache import SearchResultCache
+from utils.http_client import HttpClient, get_default_client
+from utils.async_http_client import AsyncHttpClient, get_default_async_client
+
+class ToolRegistry:
+    """
+    Long-lived tool instances shared by every request of a server process.
+    
+    The search, scraping, analysis and news tools are built once around one
+    HTTP connection pool, one search cache and one page cache, so a request
+    only pays for its own work. All shared state is guarded by the tools'
+    own locks, which makes a registry safe to use from the threads of a
+    multi-threaded WSGI server.
+    """
+    
+    def __init__(self, use_mock: bool = False, http_client: Optional[HttpClient] = None,
+                 async_http_client: Optional[AsyncHttpClient] = None,
+                 search_cache: Optional[SearchResultCache] = None, page_cache: Optional[PageCache] = None,
+                 analysis_pool_workers: Optional[int] = None, max_results: int = 5, concurrent: bool = True,
+                 corpus: Optional[Corpus] = None):
+        """
+        Initialize the ToolRegistry.
+        
+        Args:
+            use_mock: Whether the tools use mock data
+            http_client: Shared HTTP transport; defaults to the process-wide client
+            async_http_client: Shared asyncio HTTP transport; defaults to the process-wide client
+            search_cache: Cache for web search results
+            page_cache: Cache of downloaded and parsed pages
+            analysis_pool_workers: Worker processes for HTML parsing and analysis (None disables the pool)
+            max_results: Search results processed per research request
+            concurrent: Whether research requests scrape their pages in parallel
+            corpus: Local store of scraped pages reused and searched by research requests
+        """
+        self.use_mock = use_mock
+        self.http = http_client or get_default_client()
+        self.async_http = async_http_client or get_default_async_client()
+        self.search_cache = search_cache or SearchResultCache()
+        self.page_cache = page_cache or PageCache()
+        self.analysis_pool_workers = analysis_pool_workers
+        self.analysis_pool: Optional[AnalysisPool] = None
+        self.corpus = corpus
+        self.agent = WebResearchAgent(use_mock=use_mock, max_results=max_results, concurrent=concurrent,
+                                      http_client=self.http, async_http_client=self.async_http,
+                                      search_cache=self.search_cache, page_cache=self.page_cache, corpus=corpus)
+        self._warm_lock = threading.Lock()
+        self._warmed_at: Optional[float] = None
+        self._warm_error: Optional[str] = None
+    
+    @property
+    def web_search(self):
+        return self.agent.web_search
+    
+    @property
+    def scraper(self):
+        return self.agent.scraper
+    
+    @property
+    def analyzer(self):
+        return self.agent.analyzer
+    
+    @property
+    def news_aggregator(self):
+        return self.agent.news_aggregator
+    
+    def warm(self, urls: Iterable[str] = ()):
+        """
+        Start the analysis pool and open keep-alive connections before the first request.
+        
+        Safe to call more than once and from several threads; only the first
+        call does the work.
+        
+        Args:
+            urls: URLs fetched once so their hosts already have pooled connections
+        """
+        with self._warm_lock:
+            if self._warmed_at is not None:
+                return
+            try:
+                if self.analysis_pool_workers and not self.use_mock:
+                    self.analysis_pool = AnalysisPool(max_workers=self.analysis_pool_workers,
+                                                      ranking_index=self.agent.analyzer.ranking_index)
+                    self.agent.analysis_pool = self.analysis_pool
+                # Exercise the analyzer once (without adding to the ranking corpus) so lazily built state is ready
+                warmup = {"title": "Warm up", "url": "http://warmup.invalid/",
+                          "main_content": "Research study on the market."}
+                self.analyzer.categorize_content(warmup)
+                self.analyzer.summarize_content(warmup)
+            except Exception as e:
+                self._warm_error = str(e)
+                raise
+            for url in urls:
+                try:
+                    self.http.get(url).close()
+                except Exception as e:
+                    print(f"Error warming connection to {url}: {e}")
+            self._warm_error = None
+            self._warmed_at = time.time()
+    
+    def readiness(self) -> Dict[str, Any]:
+        """
+        Report whether the registry can serve requests.
+        
+        Returns:
+            {"ready": bool, "checks": {name: bool}, ...} suitable for a readiness probe
+        """
+        checks = {
+            "warmed": self._warmed_at is not None,
+            "analysis_pool": self.use_mock or not self.analysis_pool_workers or self.analysis_pool is not None
+        }
+        status = {"ready": all(checks.values()), "checks": checks, "pool_stats": self.http.pool_stats(),
+                  "search_cache": self.search_cache.stats(), "coalesced_calls": self.web_search.flights.stats(),
+                  "search_providers": self.web_search.stats(), "scrape_hosts": self.scraper.scheduler.stats(top=20)}
+        if self.corpus is not None:
+            status["corpus"] = self.corpus.stats()
+        if self._warm_error:
+            status["error"] = self._warm_error
+        return status
+    
+    def close(self):
+        if self.analysis_pool is not None:
+            self.analysis_pool.close()
+        if self.corpus is not None:
+            self.corpus.close()
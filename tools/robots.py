@@ -0,0 +1,306 @@
+# tools/robots.py
+
+import asyncio
+import re
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+from utils.cache import CacheEntry, MemoryCache
+from utils.http_client import HttpClient, get_default_client
+from utils.async_http_client import AsyncHttpClient, get_default_async_client
+from utils.rate_limit import HostRateLimiter
+
+# User-Agent sent with robots.txt and page requests; its product token is matched against User-agent lines
+DEFAULT_USER_AGENT = "WebResearchAgent/1.0"
+
+PRODUCT_TOKEN = re.compile(r"[a-z_-]+")
+
+# Only the first 500 KiB of a robots.txt file are parsed (RFC 9309, section 2.5)
+MAX_ROBOTS_BYTES = 500 * 1024
+
+class RobotsRules:
+    """
+    Allow/Disallow rules of one robots.txt group.
+    
+    Plain path prefixes live in a character trie, so checking a path walks
+    it once and the deepest rule passed is the longest match. Rules using
+    "*" or "$" are compiled to regexes and only tried when they are longer
+    than the best trie match. As in RFC 9309, the longest matching rule
+    wins and Allow wins ties.
+    """
+    
+    def __init__(self, rules: Optional[List[Tuple[bool, str]]] = None, crawl_delay: Optional[float] = None,
+                 default_allow: bool = True):
+        """
+        Initialize the RobotsRules.
+        
+        Args:
+            rules: (allow, path pattern) pairs
+            crawl_delay: Seconds between requests requested by the site
+            default_allow: Result when no rule matches
+        """
+        self.crawl_delay = crawl_delay
+        self.default_allow = default_allow
+        self._trie: Dict = {}
+        self._patterns: List[Tuple[int, bool, re.Pattern]] = []
+        for allow, path in rules or []:
+            self.add(allow, path)
+    
+    @classmethod
+    def allow_all(cls) -> "RobotsRules":
+        return cls()
+    
+    @classmethod
+    def disallow_all(cls) -> "RobotsRules":
+        return cls(default_allow=False)
+    
+    def add(self, allow: bool, path: str):
+        if not path:
+            return  # An empty Disallow means "allow everything"
+        if "*" in path or path.endswith("$"):
+            anchored = path.endswith("$")
+            body = path[:-1] if anchored else path
+            regex = ".*".join(re.escape(part) for part in body.split("*")) + ("$" if anchored else "")
+            self._patterns.append((len(path), allow, re.compile(regex)))
+            self._patterns.sort(key=lambda pattern: pattern[0], reverse=True)
+            return
+        node = self._trie
+        for char in path:
+            node = node.setdefault(char, {})
+        # Allow wins when the same path is both allowed and disallowed
+        node[None] = node.get(None, False) or allow
+    
+    def _trie_match(self, path: str) -> Tuple[int, Optional[bool]]:
+        node = self._trie
+        best_length, best_allow = -1, None
+        for length, char in enumerate(path, 1):
+            node = node.get(char)
+            if node is None:
+                break
+            if None in node:
+                best_length, best_allow = length, node[None]
+        return best_length, best_allow
+    
+    def is_allowed(self, path: str) -> bool:
+        """Check a URL path (including any query string) against the rules."""
+        if path == "/robots.txt":
+            return True
+        best_length, best_allow = self._trie_match(path)
+        for length, allow, pattern in self._patterns:
+            if length < best_length:
+                break
+            if length == best_length and (best_allow or not allow):
+                continue
+            if pattern.match(path):
+                best_length, best_allow = length, allow
+                if allow:
+                    break
+        return self.default_allow if best_allow is None else best_allow
+
+def product_token(user_agent: str) -> str:
+    """Lower-cased product token of a User-Agent value ("WebResearchAgent/1.0" -> "webresearchagent")."""
+    match = PRODUCT_TOKEN.match(user_agent.strip().lower())
+    return match.group(0) if match else ""
+
+def parse_robots_txt(text: str, user_agent: str = DEFAULT_USER_AGENT) -> RobotsRules:
+    """
+    Parse robots.txt and keep the group that applies to user_agent.
+    
+    As in RFC 9309, the group whose User-agent product token equals ours
+    (case-insensitively) is used, falling back to "*"; groups naming the
+    same agent are merged and empty User-agent lines are ignored.
+    
+    Args:
+        text: robots.txt content
+        user_agent: Our crawler's User-Agent or product token
+    
+    Returns:
+        RobotsRules for the selected group
+    """
+    agent = product_token(user_agent)
+    groups: Dict[str, Tuple[List[Tuple[bool, str]], List[float]]] = {}
+    current_agents: List[str] = []
+    in_rules = False
+    for line in text[:MAX_ROBOTS_BYTES].splitlines():
+        line = line.split("#", 1)[0].strip()
+        if ":" not in line:
+            continue
+        field, value = (part.strip() for part in line.split(":", 1))
+        field = field.lower()
+        if field == "user-agent":
+            if in_rules:
+                current_agents, in_rules = [], False
+            name = "*" if value == "*" else product_token(value)
+            if not name:
+                continue
+            current_agents.append(name)
+            groups.setdefault(name, ([], []))
+        elif field in ("allow", "disallow") and current_agents:
+            in_rules = True
+            for name in current_agents:
+                groups[name][0].append((field == "allow", value))
+        elif field == "crawl-delay" and current_agents:
+            in_rules = True
+            try:
+                delay = float(value)
+            except ValueError:
+                continue
+            for name in current_agents:
+                groups[name][1].append(delay)
+    
+    if agent and agent in groups:
+        selected = groups[agent]
+    elif "*" in groups:
+        selected = groups["*"]
+    else:
+        return RobotsRules.allow_all()
+    rules, delays = selected
+    return RobotsRules(rules, crawl_delay=delays[0] if delays else None)
+
+def _error_status(error: Exception) -> Optional[int]:
+    """HTTP status carried by a requests or aiohttp exception, if any."""
+    response = getattr(error, "response", None)
+    status = getattr(response, "status_code", None)
+    return status if status is not None else getattr(error, "status", None)
+
+class RobotsCache:
+    """
+    Per-host robots.txt cache and crawl-delay enforcement.
+    
+    Each host's robots.txt is fetched once and cached for ttl seconds.
+    A missing file (4xx) is cached as "allow all"; an unreachable one
+    (5xx or network error) as "disallow all" for the shorter error_ttl,
+    so failing hosts are neither hammered nor scraped. Concurrent lookups
+    for the same host wait for a single fetch. Crawl-delay values are
+    pushed into a HostRateLimiter that spaces out requests per host.
+    """
+    
+    def __init__(self, http_client: Optional[HttpClient] = None,
+                 async_http_client: Optional[AsyncHttpClient] = None,
+                 user_agent: str = DEFAULT_USER_AGENT, ttl: float = 24 * 60 * 60, error_ttl: float = 10 * 60,
+                 max_hosts: int = 1024, rate_limiter: Optional[HostRateLimiter] = None,
+                 max_crawl_delay: float = 30.0):
+        """
+        Initialize the RobotsCache.
+        
+        Args:
+            http_client: Shared HTTP transport used for robots.txt requests
+            async_http_client: Shared asyncio HTTP transport used by the async methods
+            user_agent: User-Agent sent for robots.txt; its product token selects the User-agent group
+            ttl: Seconds a fetched robots.txt (or a 4xx) is cached
+            error_ttl: Seconds an unreachable robots.txt is cached as "disallow all"
+            max_hosts: Number of hosts kept in the cache
+            rate_limiter: Per-host limiter fed with Crawl-delay values
+            max_crawl_delay: Upper bound applied to Crawl-delay values
+        """
+        self.http = http_client or get_default_client()
+        self.async_http = async_http_client or get_default_async_client()
+        self.user_agent = user_agent
+        self.ttl = ttl
+        self.error_ttl = error_ttl
+        self.max_crawl_delay = max_crawl_delay
+        self.rate_limiter = rate_limiter or HostRateLimiter()
+        self.fetches = 0
+        self._rules = MemoryCache(max_entries=max_hosts)
+        self._lock = threading.Lock()
+        self._host_locks: Dict[str, threading.Lock] = {}
+        self._pending: Dict[Tuple[int, str], asyncio.Future] = {}
+    
+    @staticmethod
+    def _split(url: str) -> Tuple[str, str]:
+        parts = urlsplit(url)
+        path = parts.path or "/"
+        if parts.query:
+            path += "?" + parts.query
+        return f"{parts.scheme}://{parts.netloc}", path
+    
+    def _store(self, origin: str, rules: RobotsRules, ttl: float) -> RobotsRules:
+        self._rules.set(origin, CacheEntry(rules, expires_at=time.time() + ttl))
+        if rules.crawl_delay:
+            self.rate_limiter.set_interval(origin, min(rules.crawl_delay, self.max_crawl_delay))
+        return rules
+    
+    def _rules_from_response(self, origin: str, status: Optional[int], text: Optional[str]) -> RobotsRules:
+        if status is not None and 200 <= status < 300:
+            return self._store(origin, parse_robots_txt(text or "", self.user_agent), self.ttl)
+        if status is not None and 400 <= status < 500 and status != 429:
+            return self._store(origin, RobotsRules.allow_all(), self.ttl)
+        return self._store(origin, RobotsRules.disallow_all(), self.error_ttl)
+    
+    def rules_for(self, url: str) -> RobotsRules:
+        """Return the cached rules for a URL's host, fetching robots.txt on a miss."""
+        origin, _ = self._split(url)
+        entry = self._rules.get(origin)
+        if entry is not None:
+            return entry.value
+        with self._lock:
+            host_lock = self._host_locks.setdefault(origin, threading.Lock())
+        with host_lock:
+            entry = self._rules.get(origin)
+            if entry is not None:
+                return entry.value
+            self.fetches += 1
+            try:
+                response = self.http.get(origin + "/robots.txt", headers={"User-Agent": self.user_agent})
+                status, text = response.status_code, response.text
+            except Exception as e:
+                status, text = _error_status(e), None
+            return self._rules_from_response(origin, status, text)
+    
+    async def arules_for(self, url: str) -> RobotsRules:
+        """Asynchronous version of rules_for(); concurrent lookups for one host share a single fetch."""
+        origin, _ = self._split(url)
+        entry = self._rules.get(origin)
+        if entry is not None:
+            return entry.value
+        loop = asyncio.get_running_loop()
+        key = (id(loop), origin)
+        pending = self._pending.get(key)
+        if pending is not None:
+            return await asyncio.shield(pending)
+        future = loop.create_future()
+        self._pending[key] = future
+        try:
+            self.fetches += 1
+            try:
+                status, _, text = await self.async_http.get_text(origin + "/robots.txt",
+                                                                 headers={"User-Agent": self.user_agent})
+            except Exception as e:
+                status, text = _error_status(e), None
+            rules = self._rules_from_response(origin, status, text)
+            future.set_result(rules)
+            return rules
+        finally:
+            if not future.done():
+                future.cancel()
+            del self._pending[key]
+    
+    def is_allowed(self, url: str) -> bool:
+        _, path = self._split(url)
+        return self.rules_for(url).is_allowed(path)
+    
+    async def ais_allowed(self, url: str) -> bool:
+        _, path = self._split(url)
+        return (await self.arules_for(url)).is_allowed(path)
+    
+    def wait_for_slot(self, url: str) -> float:
+        """Block until the host's crawl delay allows another request; returns the time slept."""
+        origin, _ = self._split(url)
+        return self.rate_limiter.wait(origin)
+    
+    async def await_slot(self, url: str) -> float:
+        """Asynchronous version of wait_for_slot()."""
+        origin, _ = self._split(url)
+        return await self.rate_limiter.await_slot(origin)
+
+_default_robots: Optional[RobotsCache] = None
+_default_robots_lock = threading.Lock()
+
+def get_default_robots_cache() -> RobotsCache:
+    """Return the process-wide RobotsCache shared by scrapers that are not given one explicitly."""
+    global _default_robots
+    with _default_robots_lock:
+        if _default_robots is None:
+            _default_robots = RobotsCache()
+        return _default_robots
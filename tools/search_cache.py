@@ -0,0 +1,121 @@
+# tools/search_cache.py
+
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from utils.cache import CacheEntry, MemoryCache, SQLiteCache, TieredCache
+
+# Seconds a cached result set stays fresh, by search time range
+DEFAULT_SEARCH_TTLS = {
+    "day": 15 * 60,
+    "week": 60 * 60,
+    "month": 6 * 60 * 60,
+    "year": 24 * 60 * 60,
+    None: 6 * 60 * 60
+}
+
+class SearchResultCache:
+    """
+    TTL cache for WebSearchTool results with stale-while-revalidate.
+    
+    Entries are keyed on the normalized query, result count, time range and
+    language. Fresh entries are served directly; entries past their TTL but
+    inside the stale window are served while a background refresh runs.
+    """
+    
+    def __init__(self, backend: Any = None, path: Optional[str] = None, max_entries: int = 1024,
+                 ttls: Optional[Dict[Optional[str], float]] = None, stale_factor: float = 1.0):
+        """
+        Initialize the SearchResultCache.
+        
+        Args:
+            backend: Any cache object with get/set/delete (see utils.cache); built from path/max_entries if omitted
+            path: Optional SQLite file used as a persistent second tier behind the in-memory LRU
+            max_entries: Size of the in-memory LRU tier
+            ttls: Freshness in seconds per time range, merged over DEFAULT_SEARCH_TTLS
+            stale_factor: How long (as a multiple of the TTL) an expired entry may still be served while refreshing
+        """
+        if backend is None:
+            tiers = [MemoryCache(max_entries=max_entries)]
+            if path:
+                tiers.append(SQLiteCache(path, table="search_results"))
+            backend = TieredCache(tiers)
+        self.backend = backend
+        self.ttls = dict(DEFAULT_SEARCH_TTLS)
+        self.ttls.update(ttls or {})
+        self.stale_factor = stale_factor
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self._refresher = ThreadPoolExecutor(max_workers=2, thread_name_prefix="search-cache-refresh")
+    
+    @staticmethod
+    def make_key(query: str, num_results: int, time_range: Optional[str], language: str, offset: int = 0) -> str:
+        """Build the cache key for a search (or one page of it), normalizing case and whitespace in the query."""
+        normalized = re.sub(r"\s+", " ", query.strip().lower())
+        key = f"{normalized}|{num_results}|{time_range or ''}|{language}"
+        return f"{key}|{offset}" if offset else key
+    
+    def ttl_for(self, time_range: Optional[str]) -> float:
+        return self.ttls.get(time_range, self.ttls[None])
+    
+    def lookup(self, key: str) -> Tuple[Optional[List[Dict[str, Any]]], bool]:
+        """
+        Look up a cached result set.
+        
+        Returns:
+            (results, is_fresh); results is None on a miss
+        """
+        entry = self.backend.get(key)
+        now = time.time()
+        with self._lock:
+            if entry is None or not entry.is_usable(now):
+                self.misses += 1
+                return None, False
+            if entry.is_fresh(now):
+                self.hits += 1
+                return entry.value, True
+            self.stale_hits += 1
+            return entry.value, False
+    
+    def store(self, key: str, results: List[Dict[str, Any]], time_range: Optional[str]):
+        """Store a result set (as a list of dicts) with the TTL for its time range."""
+        ttl = self.ttl_for(time_range)
+        now = time.time()
+        self.backend.set(key, CacheEntry(results, expires_at=now + ttl,
+                                         stale_until=now + ttl * (1 + self.stale_factor), stored_at=now))
+    
+    def begin_refresh(self, key: str) -> bool:
+        """Claim the background refresh for a key; False if one is already running."""
+        with self._lock:
+            if key in self._refreshing:
+                return False
+            self._refreshing.add(key)
+            return True
+    
+    def end_refresh(self, key: str):
+        with self._lock:
+            self._refreshing.discard(key)
+    
+    def revalidate(self, key: str, fetch: Callable[[], List[Dict[str, Any]]], time_range: Optional[str]):
+        """Refresh a stale entry in the background unless a refresh for it is already running."""
+        if not self.begin_refresh(key):
+            return
+        
+        def refresh():
+            try:
+                results = fetch()
+                if results:
+                    self.store(key, results, time_range)
+            finally:
+                self.end_refresh(key)
+        
+        self._refresher.submit(refresh)
+    
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"hits": self.hits, "stale_hits": self.stale_hits, "misses": self.misses}
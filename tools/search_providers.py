@@ -0,0 +1,431 @@
+# tools/search_providers.py
+
+import asyncio
+import functools
+import threading
+import time
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Dict, Hashable, List, Optional, Sequence, Union
+from utils.http_client import HttpClient, get_default_client
+from utils.async_http_client import AsyncHttpClient, get_default_async_client
+from utils.latency import LatencyHistogram
+
+class SearchResult:
+    """Class to represent a single search result."""
+    
+    __slots__ = ("title", "url", "snippet", "date")
+    
+    def __init__(self, title: str, url: str, snippet: str, date: Optional[str] = None):
+        self.title = title
+        self.url = url
+        self.snippet = snippet
+        self.date = date
+    
+    def __repr__(self):
+        return f"SearchResult(title='{self.title[:30]}...', url='{self.url}')"
+    
+    def to_dict(self):
+        return {
+            "title": self.title,
+            "url": self.url,
+            "snippet": self.snippet,
+            "date": self.date
+        }
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "SearchResult":
+        return cls(**data)
+
+class SearchProvider:
+    """
+    A search backend used by WebSearchTool.
+    
+    Subclasses implement search() and, when they have a native asyncio
+    client, asearch(); failures are raised, not swallowed, so HedgedSearch
+    can move on to the next provider. offset skips that many top-ranked
+    results, so a query can be fetched page by page.
+    """
+    
+    name = "provider"
+    
+    def search(self, query: str, num_results: int, time_range: Optional[str] = None,
+               language: str = "en", offset: int = 0) -> List[SearchResult]:
+        raise NotImplementedError
+    
+    async def asearch(self, query: str, num_results: int, time_range: Optional[str] = None,
+                      language: str = "en", offset: int = 0) -> List[SearchResult]:
+        """Asynchronous version of search(); runs search() on the default executor unless overridden."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, functools.partial(self.search, query, num_results,
+                                                                  time_range, language, offset))
+    
+    def key(self) -> Hashable:
+        """Identity of the backend, so concurrent identical searches against it can be coalesced."""
+        return (self.name,)
+
+class SerpApiProvider(SearchProvider):
+    """Google results through SerpAPI."""
+    
+    name = "serpapi"
+    
+    # SerpAPI "tbs" values for the supported time ranges
+    TIME_RANGES = {"day": "qdr:d", "week": "qdr:w", "month": "qdr:m", "year": "qdr:y"}
+    
+    def __init__(self, api_key: str, http_client: Optional[HttpClient] = None,
+                 async_http_client: Optional[AsyncHttpClient] = None,
+                 base_url: str = "https://serpapi.com/search"):
+        self.api_key = api_key
+        self.http = http_client or get_default_client()
+        self.async_http = async_http_client or get_default_async_client()
+        self.base_url = base_url
+    
+    def key(self) -> Hashable:
+        return (self.name, self.base_url, self.api_key)
+    
+    def search(self, query: str, num_results: int, time_range: Optional[str] = None,
+               language: str = "en", offset: int = 0) -> List[SearchResult]:
+        params = self._build_params(query, num_results, time_range, language, offset)
+        response = self.http.get(self.base_url, params=params)
+        response.raise_for_status()
+        return self._parse_results(response.json())
+    
+    async def asearch(self, query: str, num_results: int, time_range: Optional[str] = None,
+                      language: str = "en", offset: int = 0) -> List[SearchResult]:
+        params = self._build_params(query, num_results, time_range, language, offset)
+        data = await self.async_http.get_json(self.base_url, params=params)
+        return self._parse_results(data)
+    
+    def _build_params(self, query: str, num_results: int, time_range: Optional[str],
+                      language: str, offset: int = 0) -> Dict[str, Union[str, int]]:
+        """Build SerpAPI request parameters."""
+        params = {
+            "q": query,
+            "api_key": self.api_key,
+            "num": num_results,
+            "hl": language
+        }
+        if time_range in self.TIME_RANGES:
+            params["tbs"] = self.TIME_RANGES[time_range]
+        if offset:
+            params["start"] = offset
+        return params
+    
+    def _parse_results(self, data: Dict) -> List[SearchResult]:
+        """Convert a SerpAPI response body into SearchResult objects."""
+        error = data.get("error")
+        if error and not data.get("organic_results") and "any results" not in error:
+            # SerpAPI reports failures (bad key, quota, ...) in a 200 body; only "no results" is a real answer
+            raise RuntimeError(error)
+        return [SearchResult(
+            title=item.get("title", ""),
+            url=item.get("link", ""),
+            snippet=item.get("snippet", ""),
+            date=item.get("date", None)
+        ) for item in data.get("organic_results", [])]
+
+class SearxngProvider(SearchProvider):
+    """
+    Results from a SearXNG instance's JSON API (the instance must enable the json format).
+    
+    SearXNG pages have an instance-defined size, so offset is mapped to the
+    page number assuming pages of num_results.
+    """
+    
+    name = "searxng"
+    
+    def __init__(self, base_url: str, http_client: Optional[HttpClient] = None,
+                 async_http_client: Optional[AsyncHttpClient] = None):
+        self.base_url = base_url.rstrip("/")
+        self.http = http_client or get_default_client()
+        self.async_http = async_http_client or get_default_async_client()
+    
+    def key(self) -> Hashable:
+        return (self.name, self.base_url)
+    
+    def search(self, query: str, num_results: int, time_range: Optional[str] = None,
+               language: str = "en", offset: int = 0) -> List[SearchResult]:
+        params = self._build_params(query, num_results, time_range, language, offset)
+        response = self.http.get(self.base_url + "/search", params=params)
+        response.raise_for_status()
+        return self._parse_results(response.json(), num_results)
+    
+    async def asearch(self, query: str, num_results: int, time_range: Optional[str] = None,
+                      language: str = "en", offset: int = 0) -> List[SearchResult]:
+        params = self._build_params(query, num_results, time_range, language, offset)
+        data = await self.async_http.get_json(self.base_url + "/search", params=params)
+        return self._parse_results(data, num_results)
+    
+    def _build_params(self, query: str, num_results: int, time_range: Optional[str], language: str,
+                      offset: int = 0) -> Dict[str, Union[str, int]]:
+        params = {"q": query, "format": "json", "language": language}
+        if offset:
+            params["pageno"] = offset // max(1, num_results) + 1
+        if time_range in ("day", "week", "month", "year"):
+            params["time_range"] = time_range
+        return params
+    
+    def _parse_results(self, data: Dict, num_results: int) -> List[SearchResult]:
+        return [SearchResult(
+            title=item.get("title", ""),
+            url=item.get("url", ""),
+            snippet=item.get("content", ""),
+            date=item.get("publishedDate")
+        ) for item in data.get("results", [])[:num_results]]
+
+class CorpusSearchProvider(SearchProvider):
+    """Pages already stored in a local Corpus; time ranges are ignored."""
+    
+    name = "corpus"
+    
+    def __init__(self, corpus):
+        self.corpus = corpus
+    
+    def key(self) -> Hashable:
+        return (self.name, self.corpus.path, id(self.corpus))
+    
+    def search(self, query: str, num_results: int, time_range: Optional[str] = None,
+               language: str = "en", offset: int = 0) -> List[SearchResult]:
+        return [SearchResult(hit.title, hit.url, (hit.content.main_content or "")[:200])
+                for hit in self.corpus.search(query, limit=offset + num_results)[offset:]]
+
+class HedgedSearch:
+    """
+    Runs a search against an ordered list of providers with hedged requests.
+    
+    The first provider is asked straight away. If it has not answered after
+    its hedge delay (by default the hedge_quantile of its own recorded
+    latencies), or it fails or returns nothing, the same query goes to the
+    next provider; the first non-empty answer wins. Slow calls cannot stall
+    a search for much longer than the primary's usual tail, and with a
+    timeout the wait is bounded outright.
+    
+    Each provider runs on its own bounded thread pool, so calls stuck on a
+    stalled provider never delay the hedge to the next one. A provider whose
+    pool is fully busy is skipped while another provider remains, rather
+    than queueing more work behind it.
+    """
+    
+    def __init__(self, providers: Sequence[SearchProvider], hedge_after: Optional[float] = None,
+                 hedge_quantile: float = 0.95, min_samples: int = 20, initial_hedge_delay: float = 2.0,
+                 timeout: Optional[float] = None, max_workers: int = 8):
+        """
+        Initialize the HedgedSearch.
+        
+        Args:
+            providers: Providers in order of preference
+            hedge_after: Fixed seconds to wait before hedging, instead of the latency quantile
+            hedge_quantile: Latency quantile of a provider after which the next one is asked
+            min_samples: Samples a provider needs before its quantile is trusted
+            initial_hedge_delay: Hedge delay used until then
+            timeout: Overall seconds a search may take before giving up with no results
+            max_workers: Threads per provider running its calls for search()
+        """
+        self.providers = list(providers)
+        self.hedge_after = hedge_after
+        self.hedge_quantile = hedge_quantile
+        self.min_samples = min_samples
+        self.initial_hedge_delay = initial_hedge_delay
+        self.timeout = timeout
+        self.histograms = {provider.name: LatencyHistogram() for provider in self.providers}
+        self.max_workers = max_workers
+        self.hedged = 0
+        self.timeouts = 0
+        self.skipped = 0
+        self.wins = Counter()
+        self._in_flight = Counter()
+        self._lock = threading.Lock()
+        self._executors = {provider.name: ThreadPoolExecutor(max_workers=max_workers,
+                                                             thread_name_prefix=f"search-{provider.name}")
+                           for provider in self.providers}
+    
+    def key(self) -> Hashable:
+        return tuple(provider.key() for provider in self.providers)
+    
+    def hedge_delay(self, provider: SearchProvider) -> float:
+        """Seconds to wait for a provider before asking the next one."""
+        if self.hedge_after is not None:
+            return self.hedge_after
+        histogram = self.histograms[provider.name]
+        if histogram.count < max(1, self.min_samples):
+            return self.initial_hedge_delay
+        return histogram.quantile(self.hedge_quantile)
+    
+    def search(self, query: str, num_results: int, time_range: Optional[str] = None,
+               language: str = "en", offset: int = 0) -> List[SearchResult]:
+        """
+        Search the providers, hedging slow ones.
+        
+        Args:
+            query: The search query string
+            num_results: Number of results to return
+            time_range: Time range for results (e.g., "day", "week", "month")
+            language: Language code for results
+            offset: Number of top-ranked results to skip
+        
+        Returns:
+            The first non-empty answer, or an empty list if every provider failed or the timeout passed
+        """
+        return self.try_search(query, num_results, time_range, language, offset) or []
+    
+    def try_search(self, query: str, num_results: int, time_range: Optional[str] = None,
+                   language: str = "en", offset: int = 0) -> Optional[List[SearchResult]]:
+        """
+        search(), telling "no results" apart from "no answer".
+        
+        Returns:
+            The first non-empty answer; an empty list if a provider answered
+            but none had results; None if every provider failed or the
+            timeout passed
+        """
+        started = time.monotonic()
+        deadline_at = started + self.timeout if self.timeout is not None else None
+        remaining = list(self.providers)
+        pending = {}
+        hedge_at = started
+        answered = False
+        while remaining or pending:
+            now = time.monotonic()
+            if deadline_at is not None and now >= deadline_at:
+                self._timed_out(pending.values())
+                return None
+            if remaining and now >= hedge_at:
+                provider = remaining.pop(0)
+                if not self._reserve(provider, last=not remaining and not pending):
+                    continue
+                self._count_hedge(pending)
+                pending[self._executors[provider.name].submit(self._call, provider, query, num_results, time_range,
+                                                              language, offset)] = provider
+                hedge_at = now + self.hedge_delay(provider)
+                continue
+            
+            wake_at = min(hedge_at if remaining else float("inf"),
+                          deadline_at if deadline_at is not None else float("inf"))
+            done, _ = wait(pending, timeout=max(0.0, wake_at - now) if wake_at != float("inf") else None,
+                           return_when=FIRST_COMPLETED)
+            for future in done:
+                provider = pending.pop(future)
+                results = future.result()
+                if results:
+                    self._count_win(provider)
+                    return results
+                answered = answered or results is not None
+                hedge_at = time.monotonic()  # A failed or empty answer is hedged straight away
+        return [] if answered else None
+    
+    async def asearch(self, query: str, num_results: int, time_range: Optional[str] = None,
+                      language: str = "en", offset: int = 0) -> List[SearchResult]:
+        """Asynchronous version of search(); losing provider calls are cancelled once one answers."""
+        return await self.atry_search(query, num_results, time_range, language, offset) or []
+    
+    async def atry_search(self, query: str, num_results: int, time_range: Optional[str] = None,
+                          language: str = "en", offset: int = 0) -> Optional[List[SearchResult]]:
+        """Asynchronous version of try_search()."""
+        started = time.monotonic()
+        deadline_at = started + self.timeout if self.timeout is not None else None
+        remaining = list(self.providers)
+        pending = {}
+        hedge_at = started
+        answered = False
+        try:
+            while remaining or pending:
+                now = time.monotonic()
+                if deadline_at is not None and now >= deadline_at:
+                    self._timed_out(pending.values())
+                    return None
+                if remaining and now >= hedge_at:
+                    provider = remaining.pop(0)
+                    self._count_hedge(pending)
+                    task = asyncio.ensure_future(self._acall(provider, query, num_results, time_range, language,
+                                                                      offset))
+                    pending[task] = provider
+                    hedge_at = now + self.hedge_delay(provider)
+                    continue
+                
+                wake_at = min(hedge_at if remaining else float("inf"),
+                              deadline_at if deadline_at is not None else float("inf"))
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED,
+                                             timeout=max(0.0, wake_at - now) if wake_at != float("inf") else None)
+                for task in done:
+                    provider = pending.pop(task)
+                    results = task.result()
+                    if results:
+                        self._count_win(provider)
+                        return results
+                    answered = answered or results is not None
+                    hedge_at = time.monotonic()
+            return [] if answered else None
+        finally:
+            for task in pending:
+                task.cancel()
+    
+    def _reserve(self, provider: SearchProvider, last: bool) -> bool:
+        """Claim a thread of the provider's pool; a fully busy provider is skipped unless it is the last hope."""
+        with self._lock:
+            if self._in_flight[provider.name] >= self.max_workers and not last:
+                self.skipped += 1
+                return False
+            self._in_flight[provider.name] += 1
+            return True
+    
+    def _count_hedge(self, pending: Dict):
+        if pending:
+            with self._lock:
+                self.hedged += 1
+    
+    def _count_win(self, provider: SearchProvider):
+        with self._lock:
+            self.wins[provider.name] += 1
+    
+    def _timed_out(self, providers):
+        with self._lock:
+            self.timeouts += 1
+        print(f"Search timed out after {self.timeout}s waiting for {', '.join(p.name for p in providers) or 'providers'}")
+    
+    def _call(self, provider: SearchProvider, query: str, num_results: int, time_range: Optional[str],
+              language: str, offset: int) -> Optional[List[SearchResult]]:
+        """Run one provider call, recording its latency; failures are reported and return None."""
+        started = time.monotonic()
+        try:
+            results = provider.search(query, num_results, time_range, language, offset)
+        except Exception as e:
+            print(f"Search request failed ({provider.name}): {e}")
+            return None
+        finally:
+            with self._lock:
+                self._in_flight[provider.name] -= 1
+        self.histograms[provider.name].record(time.monotonic() - started)
+        return results
+    
+    async def _acall(self, provider: SearchProvider, query: str, num_results: int, time_range: Optional[str],
+                     language: str, offset: int) -> Optional[List[SearchResult]]:
+        """Asynchronous version of _call()."""
+        started = time.monotonic()
+        try:
+            results = await provider.asearch(query, num_results, time_range, language, offset)
+        except asyncio.CancelledError:
+            # A cancelled loser took at least this long; recording it keeps the slow tail in the histogram
+            self.histograms[provider.name].record(time.monotonic() - started)
+            raise
+        except Exception as e:
+            print(f"Search request failed ({provider.name}): {e}")
+            return None
+        self.histograms[provider.name].record(time.monotonic() - started)
+        return results
+    
+    def stats(self) -> Dict[str, Any]:
+        """Hedges fired, timeouts, busy providers skipped, wins and calls in flight per provider, and latencies."""
+        with self._lock:
+            stats = {
+                "hedged": self.hedged,
+                "timeouts": self.timeouts,
+                "skipped": self.skipped,
+                "wins": dict(self.wins),
+                "in_flight": dict(self._in_flight)
+            }
+        stats["latency"] = {name: histogram.snapshot() for name, histogram in self.histograms.items()}
+        return stats
+    
+    def close(self):
+        for executor in self._executors.values():
+            executor.shutdown(wait=False, cancel_futures=True)
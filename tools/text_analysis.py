@@ -0,0 +1,99 @@
+# tools/text_analysis.py
+
+import hashlib
+import re
+from collections import Counter
+from functools import cached_property, lru_cache
+from typing import Dict, List, Tuple
+
+# Sentence boundaries used by key-point extraction and summaries
+SENTENCE_BOUNDARY = re.compile(r'[.!?]+')
+
+# Word tokens counted for relevant terms (a maximal run of word characters is always bounded by \b)
+WORD = re.compile(r'\w+')
+
+# Entity patterns (deliberately simple; a real implementation would use NER). The leading
+# lookaheads only reject impossible start positions early and do not change what matches.
+PERSON = re.compile(r'(?=[A-Z])\b[A-Z][a-z]+ [A-Z][a-z]+\b')
+ORGANIZATION = re.compile(r'(?=[A-Z])\b([A-Z][a-z]+ ){1,3}(Corporation|Inc|Ltd|LLC|Company)\b')
+DATE = re.compile(r'(?=[\dJFMASOND])(?:\b\d{1,2}[/-]\d{1,2}[/-]\d{2,4}\b|'
+                  r'\b(Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]* \d{1,2},? \d{4}\b)')
+
+# Words never reported as relevant terms
+STOPWORDS = {'the', 'and', 'is', 'in', 'to', 'of', 'a', 'for', 'with', 'on', 'by', 'that', 'this', 'are', 'or'}
+
+class Document:
+    """
+    A title and body normalized once for every ContentAnalyzer method.
+    
+    Each view (lowercased text, sentences, word counts, entity matches) is
+    computed on first use and then kept, so analyzing one document with
+    several methods lowercases, splits and tokenizes it only once.
+    """
+    
+    def __init__(self, text: str, title: str = ""):
+        self.text = text
+        self.title = title
+    
+    @cached_property
+    def text_lower(self) -> str:
+        return self.text.lower()
+    
+    @cached_property
+    def category_text(self) -> str:
+        """Lowercased title followed by the lowercased body."""
+        return (self.title + " " + self.text).lower()
+    
+    @cached_property
+    def fingerprint(self) -> str:
+        """Stable key identifying the title and body, used for corpus statistics."""
+        return hashlib.sha1((self.title + "\0" + self.text).encode("utf-8", "surrogatepass")).hexdigest()
+    
+    @cached_property
+    def index_terms(self) -> Counter:
+        """Word counts over the title and body, as indexed for ranking."""
+        return Counter(WORD.findall(self.category_text))
+    
+    @cached_property
+    def sentences(self) -> List[str]:
+        """Raw sentence pieces, including empty ones, exactly as split on sentence punctuation."""
+        return SENTENCE_BOUNDARY.split(self.text)
+    
+    @cached_property
+    def stripped_sentences(self) -> List[Tuple[str, str]]:
+        """(sentence, lowercased sentence) for every non-empty stripped sentence."""
+        stripped = []
+        for sentence in self.sentences:
+            sentence = sentence.strip()
+            if sentence:
+                stripped.append((sentence, sentence.lower()))
+        return stripped
+    
+    @cached_property
+    def word_counts(self) -> Counter:
+        return Counter(WORD.findall(self.text_lower))
+    
+    @cached_property
+    def top_words(self) -> List[Tuple[str, int]]:
+        return self.word_counts.most_common(20)
+    
+    @cached_property
+    def entity_mentions(self) -> Dict[str, List[str]]:
+        people = PERSON.findall(self.text)
+        orgs = ORGANIZATION.findall(self.text)
+        dates = DATE.findall(self.text)
+        return {
+            "people": list(set(people))[:5],  # Limit to 5 unique names
+            "organizations": [" ".join(org) for org in orgs][:5],
+            "dates": list(set(dates))[:5]
+        }
+    
+    def sentences_matching(self, query_terms: List[str]) -> List[str]:
+        """Stripped sentences containing any of the query terms."""
+        return [sentence for sentence, lowered in self.stripped_sentences
+                if any(term in lowered for term in query_terms)]
+
+@lru_cache(maxsize=256)
+def get_document(text: str, title: str = "") -> Document:
+    """Return the shared Document for a text and title, building it on first use."""
+    return Document(text, title)
@@ -1,31 +1,96 @@
 # tools/web_scraper.py
 
+import asyncio
 import requests
-from bs4 import BeautifulSoup
-from typing import Optional, List, Dict
+from html import escape
+from typing import Any, Optional, List, Dict, Tuple
+from utils.http_client import HttpClient, get_default_client
+from utils.async_http_client import ASYNC_HTTP_ERRORS, AsyncHttpClient, get_default_async_client
+from tools.page_cache import PageCache, PageRecord
+from tools.html_extractor import extract_content
+from tools.parser_backends import get_backend
+from tools.robots import DEFAULT_USER_AGENT, RobotsCache, get_default_robots_cache
+from utils.singleflight import SingleFlight, get_default_singleflight
+from utils.host_scheduler import THROTTLE_STATUSES, AdaptiveHostScheduler, get_default_host_scheduler
+from tools.page_stream import (ALLOWED_CONTENT_TYPES, DEFAULT_MAX_BYTES, PageReader,
+                               check_response_headers)
 
 class ScrapedContent:
     """Class to hold scraped content from a webpage."""
-    def __init__(self, title: str, url: str, main_content: str, metadata: Dict, tables: List[Dict], lists: List[Dict], links: List[Dict]):
+    
+    # Slotted: caches and the corpus hold thousands of these, and a per-instance __dict__ dominates their size
+    __slots__ = ("title", "url", "main_content", "metadata", "tables", "lists", "links")
+    
+    def __init__(self, title: str, url: str, main_content: str, metadata: Optional[Dict] = None,
+                 tables: Optional[List[Dict]] = None, lists: Optional[List[Dict]] = None,
+                 links: Optional[List[Dict]] = None):
         self.title = title
         self.url = url
         self.main_content = main_content
-        self.metadata = metadata
-        self.tables = tables
-        self.lists = lists
-        self.links = links
+        self.metadata = metadata if metadata is not None else {}
+        self.tables = tables if tables is not None else []
+        self.lists = lists if lists is not None else []
+        self.links = links if links is not None else []
+    
+    def __repr__(self):
+        return f"ScrapedContent(title='{(self.title or '')[:30]}...', url='{self.url}')"
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "title": self.title,
+            "url": self.url,
+            "main_content": self.main_content,
+            "metadata": self.metadata,
+            "tables": self.tables,
+            "lists": self.lists,
+            "links": self.links
+        }
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ScrapedContent":
+        return cls(**data)
 
 class WebScraper:
     """Tool for scraping content from web pages."""
     
-    def __init__(self, use_mock: bool = True):
+    def __init__(self, use_mock: bool = True, http_client: Optional[HttpClient] = None,
+                 async_http_client: Optional[AsyncHttpClient] = None,
+                 page_cache: Optional[PageCache] = None, parser: str = "html.parser",
+                 max_bytes: Optional[int] = DEFAULT_MAX_BYTES, allowed_content_types=ALLOWED_CONTENT_TYPES,
+                 stop_after_main_content: bool = False, chunk_size: int = 64 * 1024,
+                 robots: Optional[RobotsCache] = None, respect_robots_txt: bool = True,
+                 singleflight: Optional[SingleFlight] = None, scheduler: Optional[AdaptiveHostScheduler] = None):
         """
         Initialize the WebScraper.
         
         Args:
             use_mock: Whether to use mock data for testing
+            http_client: Shared HTTP transport; defaults to the process-wide client
+            async_http_client: Shared asyncio HTTP transport used by ascrape_url
+            page_cache: Optional cache of downloaded and parsed pages
+            parser: HTML parser backend ("html.parser", "lxml" or "selectolax")
+            max_bytes: Maximum number of body bytes downloaded per page, or None for no limit
+            allowed_content_types: Content types accepted before the body is downloaded
+            stop_after_main_content: Stop downloading once the main content container has closed
+            chunk_size: Size of the chunks read from the network
+            robots: robots.txt cache and per-host crawl-delay limiter, shared process-wide by default
+            respect_robots_txt: Check robots.txt and honour Crawl-delay before fetching
+            singleflight: Coalesces concurrent scrapes of the same URL, shared process-wide by default
+            scheduler: Adaptive per-host concurrency limits for downloads, shared process-wide by default
         """
         self.use_mock = use_mock
+        self.parser = get_backend(parser)
+        self.max_bytes = max_bytes
+        self.allowed_content_types = allowed_content_types
+        self.stop_after_main_content = stop_after_main_content
+        self.chunk_size = chunk_size
+        self.page_cache = page_cache
+        self.http = http_client or get_default_client()
+        self.async_http = async_http_client or get_default_async_client()
+        self.respect_robots_txt = respect_robots_txt
+        self.robots = robots or (get_default_robots_cache() if respect_robots_txt else None)
+        self.flights = singleflight or get_default_singleflight()
+        self.scheduler = scheduler or get_default_host_scheduler()
     
     def _mock_scrape(self, url: str) -> ScrapedContent:
         """Generate mock scraped content for testing."""
@@ -53,9 +118,24 @@ class WebScraper:
         )
     
     def _respect_robots_txt(self, url: str) -> bool:
-        """Check robots.txt for permission to scrape (simplified)."""
-        # Placeholder implementation; in production, use a robots.txt parser
-        return True
+        """Check robots.txt for permission to scrape."""
+        if not self.respect_robots_txt:
+            return True
+        try:
+            return self.robots.is_allowed(url)
+        except Exception as e:
+            print(f"Error checking robots.txt for {url}: {e}")
+            return False
+    
+    async def _arespect_robots_txt(self, url: str) -> bool:
+        """Asynchronous version of _respect_robots_txt()."""
+        if not self.respect_robots_txt:
+            return True
+        try:
+            return await self.robots.ais_allowed(url)
+        except Exception as e:
+            print(f"Error checking robots.txt for {url}: {e}")
+            return False
     
     def scrape_url(self, url: str) -> Optional[ScrapedContent]:
         """
@@ -63,141 +143,323 @@ class WebScraper:
         
         Args:
             url: The URL to scrape
-            
+        
         Returns:
             ScrapedContent object or None if scraping fails
         """
         if self.use_mock:
             return self._mock_scrape(url)
-        
+        return self.flights.do(self._flight_key("scrape", url), self._scrape, url)
+    
+    def _flight_key(self, operation: str, url: str):
+        # Scrapers configured differently produce different results for the same URL
+        return (operation, url, type(self.parser).__name__, self.max_bytes, self.stop_after_main_content,
+                self.respect_robots_txt)
+    
+    def _scrape(self, url: str) -> Optional[ScrapedContent]:
+        """Scrape a URL; concurrent identical calls share one run."""
         if not self._respect_robots_txt(url):
             print(f"Scraping not allowed by robots.txt for {url}")
             return None
         
         try:
-            response = requests.get(url, headers={"User-Agent": "Mozilla/5.0"})
-            response.raise_for_status()
-            soup = BeautifulSoup(response.text, "html.parser")
-            
-            # Extract the title
-            title = soup.find("title").text if soup.find("title") else "No title"
-            
-            # Initialize main content
-            main_content = ""
-            
-            # Try multiple common selectors for article content
-            content_selectors = [
-                {"tag": "div", "attrs": {"class": ["article-body", "content-body", "story-body"]}},
-                {"tag": "section", "attrs": {"class": ["article", "content", "main-content"]}},
-                {"tag": "div", "attrs": {"class": "field--body"}},
-                {"tag": "div", "attrs": {"id": "mw-content-text"}},
-                {"tag": "article", "attrs": {}},  # Generic <article> tag
-                {"tag": "div", "attrs": {"class": ["entry-content", "post-content"]}},
-            ]
-
-            content_div = None
-            for selector in content_selectors:
-                content_div = soup.find(selector["tag"], **selector.get("attrs", {}))
-                if content_div:
-                    break
-
-            if content_div:
-                # Extract paragraphs
-                paragraphs = content_div.find_all("p")
-                for p in paragraphs:
-                    if p.text.strip():
-                        main_content += p.text.strip() + "\n"
-                
-                # Try to extract rankings from a table, list, or div with ranked items
-                ranking_list = content_div.find(["table", "ul", "ol", "div"])
-                if ranking_list:
-                    if ranking_list.name == "table":
-                        main_content += "\nRanking Table:\n"
-                        headers = [th.text.strip() for th in ranking_list.find_all("th")]
-                        if headers:
-                            main_content += f"Headers: {headers}\n"
-                        for i, row in enumerate(ranking_list.find_all("tr")[1:6], 1):  # Top 5 rows
-                            cols = row.find_all(["td", "th"])
-                            if cols:
-                                row_text = [col.text.strip() for col in cols]
-                                main_content += f"Rank {i}: {', '.join(row_text)}\n"
-                    elif ranking_list.name in ["ul", "ol"]:
-                        main_content += "\nList of Rankings:\n"
-                        for li in ranking_list.find_all("li")[:5]:
-                            main_content += f"- {li.text.strip()}\n"
-                    else:  # div, try to find ranked items (e.g., <div> with class 'rank-item')
-                        rank_items = ranking_list.find_all("div", class_=["rank-item", "list-item"])[:5]
-                        if rank_items:
-                            main_content += "\nRanked Items:\n"
-                            for i, item in enumerate(rank_items, 1):
-                                main_content += f"Rank {i}: {item.text.strip()}\n"
-            else:
-                # Fallback: try to find a significant text block with keywords related to the query
-                main_content_elements = soup.find_all(["p", "div", "article"], recursive=True)
-                for element in main_content_elements:
-                    text = element.text.strip()
-                    if text and len(text) > 100 and any(keyword.lower() in text.lower() for keyword in ["university", "college", "ranking", "top"]):
-                        main_content += text + "\n"
-                        break
-                else:
-                    # Last resort: first significant block
-                    for element in main_content_elements:
-                        text = element.text.strip()
-                        if text and len(text) > 100:
-                            main_content += text + "\n"
-                            break
+            record, content = self._cached_content(url)
+            if content is not None:
+                return content
             
-            # Extract metadata (improved to capture more fields)
-            metadata = {}
-            for tag in soup.find_all("meta"):
-                if tag.get("name") and tag.get("content"):
-                    metadata[tag.get("name")] = tag.get("content")
-                elif tag.get("property") and tag.get("content"):
-                    metadata[tag.get("property")] = tag.get("content")
-            
-            # Extract tables (capture all rows for the first relevant table)
-            tables = []
-            for table in soup.find_all("table")[:1]:  # Limit to first table (main ranking table)
-                headers = [th.text.strip() for th in table.find_all("th")]
-                rows = []
-                for row in table.find_all("tr")[1:6]:  # Extract top 5 rows (skip header row)
-                    cols = row.find_all("td")
-                    if cols:  # Ensure row has data
-                        rows.append([col.text.strip() for col in cols])
-                if headers and rows:  # Only include if table has headers and data
-                    tables.append({"headers": headers, "rows": rows})
+            status, headers, reader = self._download(url, self._request_headers(record))
+            if status == 304 and record is not None:
+                content = self._revalidated_content(record, headers)
+                if content is not None:
+                    return content
+                status, headers, reader = self._download(url, self._request_headers(None))
+            return self._content_from_reader(url, reader, headers)
+        except Exception as e:
+            print(f"Error scraping {url}: {e}")
+            return None
+    
+    async def ascrape_url(self, url: str) -> Optional[ScrapedContent]:
+        """
+        Asynchronous version of scrape_url() built on the shared AsyncHttpClient.
+        
+        The download runs on the event loop; HTML parsing is handed to the
+        loop's default executor so large pages do not block other jobs.
+        
+        Args:
+            url: The URL to scrape
+        
+        Returns:
+            ScrapedContent object or None if scraping fails
+        """
+        if self.use_mock:
+            return self._mock_scrape(url)
+        return await self.flights.ado(self._flight_key("scrape", url), lambda: self._ascrape(url))
+    
+    async def _ascrape(self, url: str) -> Optional[ScrapedContent]:
+        """Asynchronous version of _scrape()."""
+        if not await self._arespect_robots_txt(url):
+            print(f"Scraping not allowed by robots.txt for {url}")
+            return None
+        
+        try:
+            loop = asyncio.get_running_loop()
+            record, content = self._cached_content(url)
+            if content is not None:
+                return content
             
-            # Extract lists (excluding navigation)
-            lists = []
-            for ul in soup.find_all(["ul", "ol"])[:3]:
-                items = [li.text.strip() for li in ul.find_all("li")]
-                # Exclude navigation lists and ensure relevance
-                if items and "Main page" not in items and "Contents" not in items and "Jobs" not in items and "Employers" not in items:
-                    lists.append({"type": ul.name, "items": items[:10]})
+            status, headers, reader = await self._adownload(url, self._request_headers(record))
+            if status == 304 and record is not None:
+                content = await loop.run_in_executor(None, self._revalidated_content, record, headers)
+                if content is not None:
+                    return content
+                status, headers, reader = await self._adownload(url, self._request_headers(None))
+            return await loop.run_in_executor(None, self._content_from_reader, url, reader, headers)
+        except Exception as e:
+            print(f"Error scraping {url}: {e}")
+            return None
+    
+    def fetch_html(self, url: str) -> Optional[str]:
+        """
+        Download a page and return its decoded HTML without parsing it.
+        
+        Used when parsing is handed to worker processes (see tools.analysis_pool).
+        Robots rules, size limits and the page cache's validators apply as in scrape_url.
+        
+        Args:
+            url: The URL to fetch
+        
+        Returns:
+            HTML string or None if the download fails
+        """
+        if self.use_mock:
+            return self._mock_html(url)
+        return self.flights.do(self._flight_key("html", url), self._fetch_html, url)
+    
+    def _fetch_html(self, url: str) -> Optional[str]:
+        if not self._respect_robots_txt(url):
+            return None
+        
+        try:
+            record = self._cached_record(url)
+            if record is not None and record.is_fresh():
+                html = self._html_for_record(record)
+                if html is not None:
+                    self.page_cache.record_hit("fresh")
+                    return html
             
-            # Extract links (limited to the first 5 relevant links)
-            links = []
-            for a in soup.find_all("a", href=True):
-                link_text = a.text.strip()
-                link_url = a.get("href")
-                # Exclude navigation and irrelevant links
-                if link_text and link_url and not link_url.startswith("#") and "signup" not in link_url and "login" not in link_url:
-                    links.append({"text": link_text, "url": link_url})
-                    if len(links) >= 5:
-                        break
+            status, headers, reader = self._download(url, self._request_headers(record))
+            if status == 304 and record is not None:
+                html = self._revalidated_html(record, headers)
+                if html is not None:
+                    return html
+                status, headers, reader = self._download(url, self._request_headers(None))
+            return self._html_from_reader(url, reader, headers)
+        except Exception as e:
+            print(f"Error fetching {url}: {e}")
+            return None
+    
+    async def afetch_html(self, url: str) -> Optional[str]:
+        """Asynchronous version of fetch_html()."""
+        if self.use_mock:
+            return self._mock_html(url)
+        return await self.flights.ado(self._flight_key("html", url), lambda: self._afetch_html(url))
+    
+    async def _afetch_html(self, url: str) -> Optional[str]:
+        if not await self._arespect_robots_txt(url):
+            return None
+        
+        try:
+            record = self._cached_record(url)
+            if record is not None and record.is_fresh():
+                html = self._html_for_record(record)
+                if html is not None:
+                    self.page_cache.record_hit("fresh")
+                    return html
             
-            return ScrapedContent(
-                title=title,
-                url=url,
-                main_content=main_content,
-                metadata=metadata,
-                tables=tables,
-                lists=lists,
-                links=links
-            )
+            status, headers, reader = await self._adownload(url, self._request_headers(record))
+            if status == 304 and record is not None:
+                html = self._revalidated_html(record, headers)
+                if html is not None:
+                    return html
+                status, headers, reader = await self._adownload(url, self._request_headers(None))
+            return self._html_from_reader(url, reader, headers)
         except Exception as e:
-            print(f"Error scraping {url}: {e}")
+            print(f"Error fetching {url}: {e}")
+            return None
+    
+    def _cached_record(self, url: str) -> Optional[PageRecord]:
+        return self.page_cache.lookup(url) if self.page_cache is not None else None
+    
+    def _html_for_record(self, record: PageRecord) -> Optional[str]:
+        body = self.page_cache.load_body(record.body_hash)
+        return self._decode_body(body, record.encoding) if body is not None else None
+    
+    def _revalidated_html(self, record: PageRecord, headers) -> Optional[str]:
+        html = self._html_for_record(record)
+        if html is not None:
+            self.page_cache.refresh(record.url, headers)
+            self.page_cache.record_hit("revalidated")
+        return html
+    
+    def _mock_html(self, url: str) -> str:
+        """Render the mock page as HTML, so mock runs exercise the parsing path of fetch_html() callers."""
+        content = self._mock_scrape(url)
+        meta = "".join(f'<meta name="{escape(name)}" content="{escape(value)}">'
+                       for name, value in content.metadata.items())
+        table = content.tables[0]
+        rows = "".join("<tr>" + "".join(f"<td>{escape(cell)}</td>" for cell in row) + "</tr>"
+                       for row in table["rows"])
+        items = "".join(f"<li>{escape(item)}</li>" for item in content.lists[0]["items"])
+        links = "".join(f'<a href="{escape(link["url"])}">{escape(link["text"])}</a>' for link in content.links)
+        return (f"<html><head><title>{escape(content.title)}</title>{meta}</head><body><article>"
+                f"<p>{escape(content.main_content)}</p></article>"
+                f"<table><tr>{''.join(f'<th>{escape(h)}</th>' for h in table['headers'])}</tr>{rows}</table>"
+                f"<ul>{items}</ul>{links}</body></html>")
+    
+    def _html_from_reader(self, url: str, reader: PageReader, headers) -> str:
+        body, html, complete = reader.finish()
+        if complete and self.page_cache is not None:
+            self.page_cache.record_miss()
+            self.page_cache.store(url, body, reader.encoding, headers)
+        return html
+    
+    def _download(self, url: str, headers: Dict[str, str]) -> Tuple[int, Any, Optional[PageReader]]:
+        """Stream a page under the size cap; returns (status, headers, reader), with no reader for a 304."""
+        if self.respect_robots_txt:
+            self.robots.wait_for_slot(url)
+        # 429/503 are retried here rather than inside the client, so the scheduler sees each one and
+        # the next attempt waits out the host's pause instead of sleeping while holding a slot
+        retry_statuses = self.http.retry_statuses - THROTTLE_STATUSES
+        for attempt in range(self.http.max_retries + 1):
+            with self.scheduler.slot(url) as slot, \
+                    self.http.get(url, headers=headers, stream=True, retry_statuses=retry_statuses) as response:
+                slot.observe(response.status_code, response.headers)
+                if response.status_code in THROTTLE_STATUSES and attempt < self.http.max_retries:
+                    continue
+                if response.status_code == 304:
+                    return response.status_code, response.headers, None
+                response.raise_for_status()
+                check_response_headers(response.headers, self.max_bytes, self.allowed_content_types)
+                reader = self._new_reader(response.encoding)
+                for chunk in response.iter_content(chunk_size=self.chunk_size):
+                    if not reader.feed(chunk):
+                        break
+                return response.status_code, response.headers, reader
+    
+    async def _adownload(self, url: str, headers: Dict[str, str]) -> Tuple[int, Any, Optional[PageReader]]:
+        """Asynchronous version of _download()."""
+        if self.respect_robots_txt:
+            await self.robots.await_slot(url)
+        retry_statuses = self.async_http.retry_statuses - THROTTLE_STATUSES
+        
+        async def read_body(response):
+            # Observed as soon as the headers arrive, before the body is streamed
+            slot.observe(response.status, response.headers)
+            return await self._aread_body(response)
+        
+        attempt = 0
+        while True:
+            slot = self.scheduler.slot(url)
+            try:
+                async with slot:
+                    return await self.async_http.get_streaming(url, read_body, headers=headers,
+                                                               retry_statuses=retry_statuses)
+            except ASYNC_HTTP_ERRORS:
+                if slot.status not in THROTTLE_STATUSES or attempt >= self.async_http.max_retries:
+                    raise
+            attempt += 1
+    
+    async def _aread_body(self, response) -> Optional[PageReader]:
+        """Stream an aiohttp response body under the size cap."""
+        if response.status == 304:
             return None
+        check_response_headers(response.headers, self.max_bytes, self.allowed_content_types)
+        reader = self._new_reader(requests.utils.get_encoding_from_headers(response.headers))
+        async for chunk in response.content.iter_chunked(self.chunk_size):
+            if not reader.feed(chunk):
+                break
+        return reader
+    
+    def _new_reader(self, encoding: Optional[str]) -> PageReader:
+        return PageReader(encoding, max_bytes=self.max_bytes, stop_after_main_content=self.stop_after_main_content)
+    
+    def _content_from_reader(self, url: str, reader: PageReader, headers) -> ScrapedContent:
+        body, html, complete = reader.finish()
+        if not complete:
+            # Partial bodies are parsed but never cached
+            return self._parse_html(html, url)
+        return self._content_from_body(url, body, reader.encoding, headers, html=html)
+    
+    def _request_headers(self, record: Optional[PageRecord]) -> Dict[str, str]:
+        """Request headers, including revalidation headers for a cached page."""
+        # The same product token robots.txt rules were evaluated for
+        headers = {"User-Agent": self.robots.user_agent if self.robots is not None else DEFAULT_USER_AGENT}
+        if self.page_cache is not None:
+            headers.update(self.page_cache.conditional_headers(record))
+        return headers
+    
+    def _cached_content(self, url: str) -> Tuple[Optional[PageRecord], Optional[ScrapedContent]]:
+        """Return the cached page record and, if it is still fresh, its parsed content."""
+        if self.page_cache is None:
+            return None, None
+        record = self.page_cache.lookup(url)
+        if record is not None and record.is_fresh():
+            content = self._content_for_record(record)
+            if content is not None:
+                self.page_cache.record_hit("fresh")
+                return record, content
+        return record, None
+    
+    def _content_for_record(self, record: PageRecord) -> Optional[ScrapedContent]:
+        """Parsed content for a cached page, parsing the stored body only if needed."""
+        content = self.page_cache.get_parsed(record.body_hash, record.url)
+        if content is None:
+            body = self.page_cache.load_body(record.body_hash)
+            if body is None:
+                return None
+            content = self._parse_html(self._decode_body(body, record.encoding), record.url)
+            self.page_cache.set_parsed(record.body_hash, content)
+        return content
+    
+    def _revalidated_content(self, record: PageRecord, headers) -> Optional[ScrapedContent]:
+        """Handle a 304 Not Modified response for a cached page."""
+        content = self._content_for_record(record)
+        if content is not None:
+            self.page_cache.refresh(record.url, headers)
+            self.page_cache.record_hit("revalidated")
+        return content
+    
+    def _content_from_body(self, url: str, body: bytes, encoding: Optional[str], headers,
+                           html: Optional[str] = None) -> ScrapedContent:
+        """Parse a downloaded body, reusing a cached parse when the same body was seen before."""
+        if html is None:
+            html = self._decode_body(body, encoding)
+        if self.page_cache is None:
+            return self._parse_html(html, url)
+        
+        body_hash = self.page_cache.store(url, body, encoding, headers)
+        if body_hash is None:
+            return self._parse_html(html, url)
+        content = self.page_cache.get_parsed(body_hash, url)
+        if content is not None:
+            self.page_cache.record_hit("parsed")
+            return content
+        
+        self.page_cache.record_miss()
+        content = self._parse_html(html, url)
+        self.page_cache.set_parsed(body_hash, content)
+        return content
+    
+    def _decode_body(self, body: bytes, encoding: Optional[str]) -> str:
+        """Decode a response body the same way requests builds Response.text."""
+        try:
+            return str(body, encoding or "utf-8", errors="replace")
+        except LookupError:
+            return str(body, "utf-8", errors="replace")
+    
+    def _parse_html(self, html: str, url: str) -> ScrapedContent:
+        """Extract title, main content, metadata, tables, lists and links from an HTML document."""
+        return ScrapedContent(url=url, **extract_content(self.parser.build_index(html)))
 
 if __name__ == "__main__":
     pass
\ No newline at end of file
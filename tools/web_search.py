@@ -1,48 +1,76 @@
 # tools/web_search.py
 
-import requests
+import asyncio
 import os
-import json
-from typing import List, Dict, Optional, Union
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Iterator, List, Dict, Optional, Set
 import random
+from utils.http_client import HttpClient, get_default_client
+from utils.async_http_client import AsyncHttpClient, get_default_async_client
+from tools.search_cache import SearchResultCache
+from tools.search_providers import (HedgedSearch, SearchProvider, SearchResult, SearxngProvider,
+                                    SerpApiProvider)
+from utils.singleflight import SingleFlight, get_default_singleflight
 
-class SearchResult:
-    """Class to represent a single search result."""
-    
-    def __init__(self, title: str, url: str, snippet: str, date: Optional[str] = None):
-        self.title = title
-        self.url = url
-        self.snippet = snippet
-        self.date = date
-    
-    def __repr__(self):
-        return f"SearchResult(title='{self.title[:30]}...', url='{self.url}')"
-    
-    def to_dict(self):
-        return {
-            "title": self.title,
-            "url": self.url,
-            "snippet": self.snippet,
-            "date": self.date
-        }
+# Results a page request asks for when search results are fetched page by page
+DEFAULT_PAGE_SIZE = 10
+
+# Total number of results the mock search engine knows about for any query
+MOCK_RESULT_COUNT = 100
 
 class WebSearchTool:
     """
     Tool for performing web searches.
     This implementation supports both real API calls and mock responses for testing.
+    
+    Searches go to one or more providers (SerpAPI by default, plus a SearXNG
+    instance when SEARXNG_URL is set) through HedgedSearch, so a slow
+    provider is backed up by the next one instead of stalling the pipeline.
     """
     
-    def __init__(self, api_key: Optional[str] = None, use_mock: bool = False):
+    def __init__(self, api_key: Optional[str] = None, use_mock: bool = False,
+                 http_client: Optional[HttpClient] = None,
+                 async_http_client: Optional[AsyncHttpClient] = None,
+                 cache: Optional[SearchResultCache] = None, singleflight: Optional[SingleFlight] = None,
+                 providers: Optional[List[SearchProvider]] = None, hedge_after: Optional[float] = None,
+                 timeout: Optional[float] = None):
+        """
+        Initialize the WebSearchTool.
+        
+        Args:
+            api_key: SerpAPI key; defaults to SERPAPI_KEY
+            use_mock: Whether to use mock data for testing
+            http_client: Shared HTTP transport; defaults to the process-wide client
+            async_http_client: Shared asyncio HTTP transport used by asearch
+            cache: Optional cache for search results
+            singleflight: Coalesces concurrent identical searches, shared process-wide by default
+            providers: Search providers in order of preference; defaults to SerpAPI, then SearXNG if configured
+            hedge_after: Fixed seconds before a search is hedged to the next provider (default: the
+                provider's p95 latency)
+            timeout: Overall seconds a search may take across all providers
+        """
         self.api_key = api_key or os.environ.get("SERPAPI_KEY")
-        self.use_mock = use_mock or not self.api_key
-        self.base_url = "https://serpapi.com/search"
+        self.cache = cache
+        self.http = http_client or get_default_client()
+        self.async_http = async_http_client or get_default_async_client()
+        # Identical searches issued concurrently (e.g. trending topics) share one provider request
+        self.flights = singleflight or get_default_singleflight()
+        if providers is None:
+            providers = []
+            if self.api_key:
+                providers.append(SerpApiProvider(self.api_key, self.http, self.async_http))
+            if os.environ.get("SEARXNG_URL"):
+                providers.append(SearxngProvider(os.environ["SEARXNG_URL"], self.http, self.async_http))
+        self.providers = providers
+        self.backend = HedgedSearch(providers, hedge_after=hedge_after, timeout=timeout)
+        self.use_mock = use_mock or not providers
         
-        if not self.use_mock and not self.api_key:
+        if not use_mock and not providers:
             print("Warning: No SerpAPI key provided. Using mock search results instead.")
-            self.use_mock = True
     
     def search(self, query: str, num_results: int = 10, time_range: Optional[str] = None, 
-               language: str = "en") -> List[SearchResult]:
+               language: str = "en", offset: int = 0) -> List[SearchResult]:
         """
         Perform a web search using the provided query.
         
@@ -51,61 +79,275 @@ class WebSearchTool:
             num_results: Number of results to return
             time_range: Time range for results (e.g., "day", "week", "month")
             language: Language code for results
-            
+            offset: Number of top-ranked results to skip (for fetching later pages)
+        
         Returns:
             List of SearchResult objects
         """
+        return self._try_search(query, num_results, time_range, language, offset) or []
+    
+    def _try_search(self, query: str, num_results: int, time_range: Optional[str], language: str,
+                    offset: int) -> Optional[List[SearchResult]]:
+        """search(), but None when no provider answered (as opposed to answering with no results)."""
         if self.use_mock:
-            return self._mock_search(query, num_results)
-        
-        # Real API implementation
-        params = {
-            "q": query,
-            "api_key": self.api_key,
-            "num": num_results,
-            "hl": language
-        }
-        
-        if time_range:
-            if time_range == "day":
-                params["tbs"] = "qdr:d"
-            elif time_range == "week":
-                params["tbs"] = "qdr:w"
-            elif time_range == "month":
-                params["tbs"] = "qdr:m"
-            elif time_range == "year":
-                params["tbs"] = "qdr:y"
+            return self._mock_search(query, num_results, offset)
         
-        try:
-            response = requests.get(self.base_url, params=params)
-            response.raise_for_status()
-            data = response.json()
-            
-            results = []
-            for item in data.get("organic_results", []):
-                result = SearchResult(
-                    title=item.get("title", ""),
-                    url=item.get("link", ""),
-                    snippet=item.get("snippet", ""),
-                    date=item.get("date", None)
+        return self.flights.do(self._flight_key(query, num_results, time_range, language, offset),
+                               self._search, query, num_results, time_range, language, offset)
+    
+    def _flight_key(self, query: str, num_results: int, time_range: Optional[str], language: str, offset: int):
+        return ("search", self.backend.key(), query, num_results, time_range, language, offset)
+    
+    def _search(self, query: str, num_results: int, time_range: Optional[str], language: str,
+                offset: int) -> Optional[List[SearchResult]]:
+        """Serve a search from the cache or the providers; concurrent identical calls share one run."""
+        if self.cache is None:
+            return self._fetch_results(query, num_results, time_range, language, offset)
+        
+        key = self.cache.make_key(query, num_results, time_range, language, offset)
+        cached, fresh = self.cache.lookup(key)
+        if cached is not None:
+            if not fresh:
+                self.cache.revalidate(
+                    key,
+                    lambda: [r.to_dict() for r in
+                             self._fetch_results(query, num_results, time_range, language, offset) or []],
+                    time_range
                 )
-                results.append(result)
-            
-            return results
+            return [SearchResult.from_dict(item) for item in cached]
+        
+        results = self._fetch_results(query, num_results, time_range, language, offset)
+        if results:
+            self.cache.store(key, [r.to_dict() for r in results], time_range)
+        return results
+    
+    def _fetch_results(self, query: str, num_results: int, time_range: Optional[str],
+                       language: str, offset: int = 0) -> Optional[List[SearchResult]]:
+        """Query the providers directly, bypassing the cache; None if no provider answered."""
+        return self.backend.try_search(query, num_results, time_range, language, offset)
+    
+    async def asearch(self, query: str, num_results: int = 10, time_range: Optional[str] = None,
+                      language: str = "en", offset: int = 0) -> List[SearchResult]:
+        """
+        Asynchronous version of search() built on the shared AsyncHttpClient.
+        
+        Args:
+            query: The search query string
+            num_results: Number of results to return
+            time_range: Time range for results (e.g., "day", "week", "month")
+            language: Language code for results
+            offset: Number of top-ranked results to skip (for fetching later pages)
+        
+        Returns:
+            List of SearchResult objects
+        """
+        return await self._atry_search(query, num_results, time_range, language, offset) or []
+    
+    async def _atry_search(self, query: str, num_results: int, time_range: Optional[str], language: str,
+                           offset: int) -> Optional[List[SearchResult]]:
+        """Asynchronous version of _try_search()."""
+        if self.use_mock:
+            return self._mock_search(query, num_results, offset)
+        
+        return await self.flights.ado(self._flight_key(query, num_results, time_range, language, offset),
+                                      lambda: self._asearch(query, num_results, time_range, language, offset))
+    
+    async def _asearch(self, query: str, num_results: int, time_range: Optional[str],
+                       language: str, offset: int) -> Optional[List[SearchResult]]:
+        """Asynchronous version of _search()."""
+        if self.cache is None:
+            return await self._afetch_results(query, num_results, time_range, language, offset)
+        
+        key = self.cache.make_key(query, num_results, time_range, language, offset)
+        cached, fresh = self.cache.lookup(key)
+        if cached is not None:
+            if not fresh and self.cache.begin_refresh(key):
+                asyncio.ensure_future(self._arefresh(key, query, num_results, time_range, language, offset))
+            return [SearchResult.from_dict(item) for item in cached]
+        
+        results = await self._afetch_results(query, num_results, time_range, language, offset)
+        if results:
+            self.cache.store(key, [r.to_dict() for r in results], time_range)
+        return results
+    
+    async def _arefresh(self, key: str, query: str, num_results: int, time_range: Optional[str],
+                        language: str, offset: int):
+        """Refresh a stale cache entry on the event loop."""
+        try:
+            results = await self._afetch_results(query, num_results, time_range, language, offset)
+            if results:
+                self.cache.store(key, [r.to_dict() for r in results], time_range)
+        finally:
+            self.cache.end_refresh(key)
+    
+    async def _afetch_results(self, query: str, num_results: int, time_range: Optional[str],
+                              language: str, offset: int = 0) -> Optional[List[SearchResult]]:
+        """Query the providers directly on the event loop, bypassing the cache; None if no provider answered."""
+        return await self.backend.atry_search(query, num_results, time_range, language, offset)
+    
+    def iter_search(self, query: str, num_results: int = 50, time_range: Optional[str] = None,
+                    language: str = "en", page_size: int = DEFAULT_PAGE_SIZE,
+                    max_concurrent_pages: int = 3, page_retries: int = 1) -> Iterator[SearchResult]:
+        """
+        Search for up to num_results results, yielding each as soon as its page arrives.
         
-        except requests.RequestException as e:
-            print(f"Search request failed: {e}")
-            return []
+        See iter_search_pages() for how pages are fetched.
+        
+        Args:
+            query: The search query string
+            num_results: Maximum number of distinct results to yield
+            time_range: Time range for results (e.g., "day", "week", "month")
+            language: Language code for results
+            page_size: Results requested per page
+            max_concurrent_pages: Pages requested ahead of the one being consumed
+            page_retries: Extra attempts for a page request no provider answered
+        
+        Yields:
+            SearchResult objects in rank order, without repeated URLs
+        """
+        for page in self.iter_search_pages(query, num_results, time_range, language, page_size, max_concurrent_pages,
+                                           page_retries):
+            yield from page
     
-    def _mock_search(self, query: str, num_results: int = 10) -> List[SearchResult]:
-        """Generate mock search results for testing."""
+    def iter_search_pages(self, query: str, num_results: int = 50, time_range: Optional[str] = None,
+                          language: str = "en", page_size: int = DEFAULT_PAGE_SIZE,
+                          max_concurrent_pages: int = 3, page_retries: int = 1) -> Iterator[List[SearchResult]]:
+        """
+        Search page by page, yielding each page's new results as soon as it arrives.
+        
+        Up to max_concurrent_pages page requests are in flight at once, so
+        later pages load while the caller works on the first. Pages are
+        yielded in rank order; URLs already seen on an earlier page are
+        dropped, and paging stops at num_results results or at the first
+        page a provider answers with no results. Providers often return a
+        few results short of a full page, so a short page does not end the
+        search; a page no provider answered is retried page_retries times
+        and then skipped. Each page goes through the cache and request
+        coalescing like search(). A search that fits in one page is a
+        single search() call.
+        
+        Args:
+            query: The search query string
+            num_results: Maximum number of distinct results to yield
+            time_range: Time range for results (e.g., "day", "week", "month")
+            language: Language code for results
+            page_size: Results requested per page
+            max_concurrent_pages: Pages requested ahead of the one being consumed
+            page_retries: Extra attempts for a page request no provider answered
+        
+        Yields:
+            Non-empty lists of new SearchResult objects
+        """
+        if num_results <= page_size:
+            results = self.search(query, num_results, time_range, language)
+            if results:
+                yield results[:num_results]
+            return
+        
+        offsets = iter(range(0, num_results, page_size))
+        executor = ThreadPoolExecutor(max_workers=max(1, max_concurrent_pages), thread_name_prefix="search-page")
+        in_flight = deque()
+        
+        def fetch_page(offset: int) -> Optional[List[SearchResult]]:
+            for _ in range(max(0, page_retries) + 1):
+                page = self._try_search(query, page_size, time_range, language, offset)
+                if page is not None:
+                    return page
+            print(f"Skipping search results {offset + 1}-{offset + page_size} for {query!r}: no provider answered")
+            return None
+        
+        def request_next_page():
+            offset = next(offsets, None)
+            if offset is not None:
+                in_flight.append(executor.submit(fetch_page, offset))
+        
+        try:
+            for _ in range(max(1, max_concurrent_pages)):
+                request_next_page()
+            seen: Set[str] = set()
+            remaining = num_results
+            while in_flight and remaining > 0:
+                page = in_flight.popleft().result()
+                if page == []:
+                    break  # The provider has no more results
+                request_next_page()
+                new_results = self._new_results(page or [], seen, remaining)
+                if new_results:
+                    remaining -= len(new_results)
+                    yield new_results
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+    
+    async def aiter_search_pages(self, query: str, num_results: int = 50, time_range: Optional[str] = None,
+                                 language: str = "en", page_size: int = DEFAULT_PAGE_SIZE,
+                                 max_concurrent_pages: int = 3,
+                                 page_retries: int = 1) -> AsyncIterator[List[SearchResult]]:
+        """Asynchronous version of iter_search_pages()."""
+        if num_results <= page_size:
+            results = await self.asearch(query, num_results, time_range, language)
+            if results:
+                yield results[:num_results]
+            return
+        
+        offsets = iter(range(0, num_results, page_size))
+        in_flight = deque()
+        
+        async def fetch_page(offset: int) -> Optional[List[SearchResult]]:
+            for _ in range(max(0, page_retries) + 1):
+                page = await self._atry_search(query, page_size, time_range, language, offset)
+                if page is not None:
+                    return page
+            print(f"Skipping search results {offset + 1}-{offset + page_size} for {query!r}: no provider answered")
+            return None
+        
+        def request_next_page():
+            offset = next(offsets, None)
+            if offset is not None:
+                in_flight.append(asyncio.ensure_future(fetch_page(offset)))
+        
+        try:
+            for _ in range(max(1, max_concurrent_pages)):
+                request_next_page()
+            seen: Set[str] = set()
+            remaining = num_results
+            while in_flight and remaining > 0:
+                page = await in_flight.popleft()
+                if page == []:
+                    break  # The provider has no more results
+                request_next_page()
+                new_results = self._new_results(page or [], seen, remaining)
+                if new_results:
+                    remaining -= len(new_results)
+                    yield new_results
+        finally:
+            for task in in_flight:
+                task.cancel()
+    
+    @staticmethod
+    def _new_results(page: List[SearchResult], seen: Set[str], limit: int) -> List[SearchResult]:
+        """Results of a page whose URL has not been seen yet, at most limit of them."""
+        new_results = []
+        for result in page:
+            if len(new_results) >= limit:
+                break
+            if result.url and result.url not in seen:
+                seen.add(result.url)
+                new_results.append(result)
+        return new_results
+    
+    def stats(self) -> Dict[str, Any]:
+        """Hedging and per-provider latency statistics."""
+        return self.backend.stats()
+    
+    def _mock_search(self, query: str, num_results: int = 10, offset: int = 0) -> List[SearchResult]:
+        """Generate mock search results for testing (MOCK_RESULT_COUNT in total, so paging reaches an end)."""
         search_domain = query.lower().split()
         if len(search_domain) > 2:
             search_domain = search_domain[:2]
         domain = "".join(search_domain)
         
         results = []
-        for i in range(min(num_results, 10)):
+        for i in range(offset, min(offset + num_results, MOCK_RESULT_COUNT)):
             title = f"Result {i+1} for {query}"
             url = f"https://example-{domain}.com/page{i+1}"
             snippet = f"This is a mock snippet for the search query '{query}'. It contains some sample text that might be relevant to the search terms."
@@ -122,7 +364,7 @@ class WebSearchTool:
         Args:
             original_query: The original search query
             additional_terms: List of terms to add to the query
-            
+        
         Returns:
             List of SearchResult objects from the refined search
         """
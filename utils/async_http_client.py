@@ -0,0 +1,162 @@
+# utils/async_http_client.py
+
+import asyncio
+import threading
+import weakref
+from typing import Dict, Optional, Any, Iterable, Tuple
+
+try:
+    import aiohttp
+except ImportError:  # aiohttp is only needed for the async pipeline
+    aiohttp = None
+
+# Exceptions raised by AsyncHttpClient for network and HTTP status failures
+ASYNC_HTTP_ERRORS = (aiohttp.ClientError, asyncio.TimeoutError) if aiohttp else (asyncio.TimeoutError,)
+
+class AsyncHttpClient:
+    """
+    Asyncio counterpart of HttpClient.
+    
+    Keeps one aiohttp session per event loop with a keep-alive connector,
+    applies connect/read timeouts and retries 429/5xx responses with
+    exponential backoff, so many research jobs can share one event loop.
+    A loop's session is closed when the loop shuts down its async
+    generators, which asyncio.run does before returning.
+    """
+    
+    def __init__(self, limit: int = 100, limit_per_host: int = 10,
+                 connect_timeout: float = 5.0, read_timeout: float = 15.0,
+                 max_retries: int = 3, backoff_factor: float = 0.5,
+                 retry_statuses: Iterable[int] = (429, 500, 502, 503, 504),
+                 max_retry_after: float = 30.0, headers: Optional[Dict[str, str]] = None):
+        """
+        Initialize the AsyncHttpClient.
+        
+        Args:
+            limit: Maximum number of simultaneous connections
+            limit_per_host: Maximum number of simultaneous connections per host
+            connect_timeout: Seconds to wait for a connection to be established
+            read_timeout: Seconds to wait for the server to send data
+            max_retries: Maximum number of retries for failed requests
+            backoff_factor: Base delay for exponential backoff between retries
+            retry_statuses: HTTP status codes that trigger a retry
+            max_retry_after: Upper bound applied to Retry-After delays between retries
+            headers: Default headers sent with every request
+        """
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.retry_statuses = frozenset(retry_statuses)
+        self.max_retry_after = max_retry_after
+        self.headers = dict(headers or {})
+        self._sessions = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+    
+    async def _session(self) -> "aiohttp.ClientSession":
+        """Return the session bound to the running event loop, creating it on first use."""
+        if aiohttp is None:
+            raise ImportError("aiohttp is required for the async research pipeline (pip install aiohttp)")
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            session, closer = self._sessions.get(loop, (None, None))
+            if session is None or session.closed:
+                connector = aiohttp.TCPConnector(limit=self.limit, limit_per_host=self.limit_per_host)
+                timeout = aiohttp.ClientTimeout(sock_connect=self.connect_timeout, sock_read=self.read_timeout)
+                session = aiohttp.ClientSession(connector=connector, timeout=timeout, headers=self.headers)
+                closer = self._close_at_shutdown(loop, session)
+                self._sessions[loop] = (session, closer)
+            else:
+                closer = None
+        if closer is not None:
+            # Starting the generator registers it with the loop's shutdown_asyncgens(); keep it referenced
+            await closer.__anext__()
+        return session
+    
+    async def _close_at_shutdown(self, loop: asyncio.AbstractEventLoop, session: "aiohttp.ClientSession"):
+        """Async generator parked on its first yield; loop.shutdown_asyncgens() (run by asyncio.run) closes the session."""
+        try:
+            yield
+        finally:
+            with self._lock:
+                if self._sessions.get(loop, (None,))[0] is session:
+                    del self._sessions[loop]
+            await session.close()
+    
+    async def _request(self, url: str, params: Optional[Dict[str, Any]], headers: Optional[Dict[str, str]],
+                       read_body, retry_statuses: Optional[Iterable[int]] = None):
+        """GET a URL with retries and return (status, headers, body) where body comes from read_body(response)."""
+        session = await self._session()
+        statuses = self.retry_statuses if retry_statuses is None else frozenset(retry_statuses)
+        attempt = 0
+        while True:
+            async with session.get(url, params=params, headers=headers) as response:
+                if response.status in statuses and attempt < self.max_retries:
+                    delay = self._retry_delay(response, attempt)
+                else:
+                    response.raise_for_status()
+                    return response.status, response.headers, await read_body(response)
+            attempt += 1
+            await asyncio.sleep(delay)
+    
+    def _retry_delay(self, response, attempt: int) -> float:
+        """Seconds to wait before the next attempt, honouring Retry-After (up to max_retry_after) when present."""
+        retry_after = response.headers.get("Retry-After")
+        if retry_after and retry_after.isdigit():
+            return min(float(retry_after), self.max_retry_after)
+        return self.backoff_factor * (2 ** attempt)
+    
+    async def get_json(self, url: str, params: Optional[Dict[str, Any]] = None,
+                       headers: Optional[Dict[str, str]] = None) -> Any:
+        """Fetch a URL and decode the JSON body."""
+        _, _, data = await self._request(url, params, headers, lambda response: response.json(content_type=None))
+        return data
+    
+    async def get_text(self, url: str, params: Optional[Dict[str, Any]] = None,
+                       headers: Optional[Dict[str, str]] = None) -> Tuple[int, Any, str]:
+        """Fetch a URL and return (status, headers, decoded text body)."""
+        return await self._request(url, params, headers, lambda response: response.text(errors="replace"))
+    
+    async def get_bytes(self, url: str, params: Optional[Dict[str, Any]] = None,
+                        headers: Optional[Dict[str, str]] = None) -> Tuple[int, Any, bytes]:
+        """Fetch a URL and return (status, headers, raw body); 304 responses are returned, not raised."""
+        return await self._request(url, params, headers, lambda response: response.read())
+    
+    async def get_streaming(self, url: str, read_body, params: Optional[Dict[str, Any]] = None,
+                            headers: Optional[Dict[str, str]] = None,
+                            retry_statuses: Optional[Iterable[int]] = None) -> Tuple[int, Any, Any]:
+        """
+        Fetch a URL and let read_body consume the response incrementally.
+        
+        Args:
+            url: URL to fetch
+            read_body: Coroutine function called with the open aiohttp response
+            params: Optional query string parameters
+            headers: Optional per-request headers
+            retry_statuses: HTTP status codes retried for this request instead of the client's
+        
+        Returns:
+            (status, headers, result of read_body)
+        """
+        return await self._request(url, params, headers, read_body, retry_statuses)
+    
+    async def close(self):
+        """Close the session bound to the running event loop."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            session, closer = self._sessions.pop(loop, (None, None))
+        if closer is not None:
+            await closer.aclose()
+
+_default_async_client: Optional[AsyncHttpClient] = None
+_default_async_client_lock = threading.Lock()
+
+def get_default_async_client() -> AsyncHttpClient:
+    """Return the process-wide AsyncHttpClient shared by tools that are not given one explicitly."""
+    global _default_async_client
+    with _default_async_client_lock:
+        if _default_async_client is None:
+            _default_async_client = AsyncHttpClient()
+        return _default_async_client
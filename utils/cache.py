@@ -0,0 +1,168 @@
+# utils/cache.py
+
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, List, Optional
+from utils import serialization
+
+class CacheEntry:
+    """A cached value with its freshness window and the longer window in which it may be served stale."""
+    
+    def __init__(self, value: Any, expires_at: float, stale_until: Optional[float] = None,
+                 stored_at: Optional[float] = None):
+        self.value = value
+        self.stored_at = stored_at if stored_at is not None else time.time()
+        self.expires_at = expires_at
+        self.stale_until = stale_until if stale_until is not None else expires_at
+    
+    def is_fresh(self, now: Optional[float] = None) -> bool:
+        return (now if now is not None else time.time()) < self.expires_at
+    
+    def is_usable(self, now: Optional[float] = None) -> bool:
+        return (now if now is not None else time.time()) < self.stale_until
+
+class MemoryCache:
+    """Thread-safe in-memory LRU cache of CacheEntry objects."""
+    
+    def __init__(self, max_entries: int = 1024):
+        """
+        Initialize the MemoryCache.
+        
+        Args:
+            max_entries: Maximum number of entries kept before the least recently used is evicted
+        """
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key: str) -> Optional[CacheEntry]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if not entry.is_usable():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry
+    
+    def set(self, key: str, entry: CacheEntry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def delete(self, key: str):
+        with self._lock:
+            self._entries.pop(key, None)
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+
+class SQLiteCache:
+    """
+    Persistent cache backed by a SQLite table.
+    
+    Values must be JSON-serializable. One connection is shared by all
+    threads and guarded by a lock.
+    """
+    
+    def __init__(self, path: str = ":memory:", table: str = "cache"):
+        """
+        Initialize the SQLiteCache.
+        
+        Args:
+            path: Database file path (":memory:" for a private in-memory database)
+            table: Table name, so several caches can share one database file
+        """
+        if not table.isidentifier():
+            raise ValueError(f"Invalid cache table name: {table}")
+        self.path = path
+        self.table = table
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {self.table} ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, stored_at REAL NOT NULL, "
+                "expires_at REAL NOT NULL, stale_until REAL NOT NULL)"
+            )
+    
+    def get(self, key: str) -> Optional[CacheEntry]:
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT value, stored_at, expires_at, stale_until FROM {self.table} WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        entry = CacheEntry(serialization.loads(row[0]), expires_at=row[2], stale_until=row[3], stored_at=row[1])
+        if not entry.is_usable():
+            self.delete(key)
+            return None
+        return entry
+    
+    def set(self, key: str, entry: CacheEntry):
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, stored_at, expires_at, stale_until) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, serialization.dumps_text(entry.value), entry.stored_at, entry.expires_at, entry.stale_until)
+            )
+    
+    def delete(self, key: str):
+        with self._lock, self._conn:
+            self._conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+    
+    def purge_expired(self) -> int:
+        """Delete entries that can no longer be served, returning how many were removed."""
+        with self._lock, self._conn:
+            cursor = self._conn.execute(f"DELETE FROM {self.table} WHERE stale_until <= ?", (time.time(),))
+            return cursor.rowcount
+    
+    def clear(self):
+        with self._lock, self._conn:
+            self._conn.execute(f"DELETE FROM {self.table}")
+    
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+class TieredCache:
+    """
+    Cache that checks several backends in order (e.g. memory, then SQLite).
+    
+    Hits in a slower tier are copied into the faster tiers; writes go to
+    every tier.
+    """
+    
+    def __init__(self, tiers: List[Any]):
+        self.tiers = tiers
+    
+    def get(self, key: str) -> Optional[CacheEntry]:
+        for i, tier in enumerate(self.tiers):
+            entry = tier.get(key)
+            if entry is not None:
+                for faster in self.tiers[:i]:
+                    faster.set(key, entry)
+                return entry
+        return None
+    
+    def set(self, key: str, entry: CacheEntry):
+        for tier in self.tiers:
+            tier.set(key, entry)
+    
+    def delete(self, key: str):
+        for tier in self.tiers:
+            tier.delete(key)
+    
+    def clear(self):
+        for tier in self.tiers:
+            tier.clear()
@@ -1,7 +1,19 @@
 # utils/helpers.py
 
 import re
-from typing import Dict, List, Any
+from bisect import insort
+from typing import Dict, List, Any, Optional
+from utils.keyword_matcher import KeywordMatcher
+
+# Query terms that signal each intent
+INTENT_TERMS = {
+    "news": ["latest", "recent", "news", "update"],
+    "factual": ["price", "data", "statistic", "fact"],
+    "exploratory": ["about", "overview"]
+}
+
+# All intent terms in one matcher, built once at import time
+_INTENT_MATCHER = KeywordMatcher({term: intent for intent, terms in INTENT_TERMS.items() for term in terms})
 
 class QueryAnalyzer:
     """Helper class for analyzing user queries."""
@@ -12,16 +24,17 @@ class QueryAnalyzer:
         
         Args:
             query: User query
-            
+        
         Returns:
             Dictionary with query analysis
         """
         query_lower = query.lower()
         
         # Determine intent
-        is_news_related = any(term in query_lower for term in ["latest", "recent", "news", "update"])
-        is_factual = any(term in query_lower for term in ["price", "data", "statistic", "fact"])
-        is_exploratory = len(query.split()) > 5 or any(term in query_lower for term in ["about", "overview"])
+        intents = set(_INTENT_MATCHER.matched_labels(query_lower))
+        is_news_related = "news" in intents
+        is_factual = "factual" in intents
+        is_exploratory = len(query.split()) > 5 or "exploratory" in intents
         
         # Generate search terms
         search_query = query
@@ -36,7 +49,63 @@ class QueryAnalyzer:
             "is_exploratory": is_exploratory
         }
 
-def generate_report(query: str, analyses: List[Dict], news_articles: List[Any], contradictions: List[Dict]) -> Dict[str, Any]:
+class IncrementalReport:
+    """
+    Research report assembled piece by piece as sources finish.
+    
+    Analyses are kept sorted by relevance on insertion (binary search), so
+    a complete report can be produced after every new source without
+    re-sorting everything seen so far.
+    """
+    
+    def __init__(self, query: str):
+        self.query = query
+        self.analyses: List[Dict] = []
+        self.news: List[Dict] = []
+        self.contradictions: List[Dict] = []
+        self.duplicates: List[Dict] = []
+    
+    def add_analysis(self, analysis: Dict):
+        """Insert a source analysis; sources of equal relevance keep their arrival order."""
+        insort(self.analyses, analysis, key=lambda item: -item["analysis"]["relevance"])
+    
+    def add_news(self, news_articles: List[Any]):
+        self.news.extend(article.to_dict() for article in news_articles)
+    
+    def set_contradictions(self, contradictions: List[Dict]):
+        self.contradictions = contradictions
+    
+    def set_duplicates(self, duplicates: List[Dict]):
+        self.duplicates = duplicates
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Report built from everything added so far."""
+        report = {
+            "query": self.query,
+            "summary": "",
+            "key_findings": [],
+            "news": list(self.news),
+            "contradictions": self.contradictions,
+            "duplicates": self.duplicates,
+            "sources": []
+        }
+        
+        # Key findings from the top 3 sources
+        for analysis in self.analyses[:3]:
+            report["key_findings"].extend(analysis["analysis"]["key_information"]["key_points"])
+            report["sources"].append({
+                "title": analysis["title"],
+                "url": analysis["url"],
+                "relevance": analysis["analysis"]["relevance"],
+                "reliability": analysis["analysis"]["reliability"]["reliability_score"]
+            })
+        
+        summaries = " ".join(analysis["analysis"]["summary"] for analysis in self.analyses[:2])
+        report["summary"] = summaries[:500] + "..." if len(summaries) > 500 else summaries
+        return report
+
+def generate_report(query: str, analyses: List[Dict], news_articles: List[Any], contradictions: List[Dict],
+                    duplicates: Optional[List[Dict]] = None) -> Dict[str, Any]:
     """
     Generate a structured research report.
     
@@ -45,34 +114,15 @@ def generate_report(query: str, analyses: List[Dict], news_articles: List[Any],
         analyses: List of content analyses
         news_articles: List of news articles
         contradictions: List of identified contradictions
-        
+        duplicates: Near-duplicate pages merged into each kept source
+    
     Returns:
         Structured report
     """
-    report = {
-        "query": query,
-        "summary": "",
-        "key_findings": [],
-        "news": [article.to_dict() for article in news_articles],
-        "contradictions": contradictions,
-        "sources": []
-    }
-    
-    # Sort analyses by relevance
-    sorted_analyses = sorted(analyses, key=lambda x: x["analysis"]["relevance"], reverse=True)
-    
-    # Generate key findings
-    for analysis in sorted_analyses[:3]:  # Top 3 sources
-        report["key_findings"].extend(analysis["analysis"]["key_information"]["key_points"])
-        report["sources"].append({
-            "title": analysis["title"],
-            "url": analysis["url"],
-            "relevance": analysis["analysis"]["relevance"],
-            "reliability": analysis["analysis"]["reliability"]["reliability_score"]
-        })
-    
-    # Generate summary
-    summaries = [analysis["analysis"]["summary"] for analysis in sorted_analyses[:2]]
-    report["summary"] = " ".join(summaries)[:500] + "..." if len(" ".join(summaries)) > 500 else " ".join(summaries)
-    
-    return report
\ No newline at end of file
+    report = IncrementalReport(query)
+    for analysis in analyses:
+        report.add_analysis(analysis)
+    report.add_news(news_articles)
+    report.set_contradictions(contradictions)
+    report.set_duplicates(duplicates or [])
+    return report.to_dict()
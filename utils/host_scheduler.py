@@ -0,0 +1,277 @@
+# utils/host_scheduler.py
+
+import asyncio
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+# Responses that mean the host wants fewer requests
+THROTTLE_STATUSES = frozenset({429, 503})
+
+def host_key(url: str) -> str:
+    """Scheduling key for a URL: its scheme, host and port."""
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}".lower()
+
+def _retry_after(headers: Any) -> Optional[float]:
+    value = headers.get("Retry-After") if headers is not None else None
+    return float(value) if value and value.strip().isdigit() else None
+
+def _wake(future: asyncio.Future):
+    if not future.done():
+        future.set_result(None)
+
+class _HostState:
+    """Concurrency limit and counters for one host."""
+    
+    def __init__(self, limit: float):
+        self.limit = limit
+        self.in_flight = 0
+        self.requests = 0
+        self.throttled = 0
+        self.errors = 0
+        self.queued_seconds = 0.0
+        self.latency: Optional[float] = None
+        self.min_latency: Optional[float] = None
+        self.paused_until = 0.0
+        self.last_decrease_at = 0.0
+        self.waiters: List[Tuple[asyncio.AbstractEventLoop, asyncio.Future]] = []
+    
+    def to_dict(self, now: float) -> Dict[str, Any]:
+        return {
+            "limit": round(self.limit, 2),
+            "in_flight": self.in_flight,
+            "requests": self.requests,
+            "throttled": self.throttled,
+            "errors": self.errors,
+            "queued_seconds": round(self.queued_seconds, 3),
+            "latency": round(self.latency, 4) if self.latency is not None else None,
+            "min_latency": round(self.min_latency, 4) if self.min_latency is not None else None,
+            "paused_for": round(max(0.0, self.paused_until - now), 3)
+        }
+
+class HostSlot:
+    """
+    One request to a host, used as a (sync or async) context manager.
+    
+    Entering waits for a free slot on the host; leaving releases it and
+    feeds the scheduler the request's latency and outcome. Call observe()
+    with the response status and headers as soon as they arrive: latency is
+    measured up to that first call, so the time spent reading a large body
+    does not count as the host slowing down. HTTP errors raised inside the
+    block are observed automatically.
+    """
+    
+    def __init__(self, scheduler: "AdaptiveHostScheduler", host: str):
+        self.scheduler = scheduler
+        self.host = host
+        self.status: Optional[int] = None
+        self.retry_after: Optional[float] = None
+        self.started_at: Optional[float] = None
+        self.responded_at: Optional[float] = None
+    
+    def observe(self, status: Optional[int], headers: Any = None):
+        if self.responded_at is None:
+            self.responded_at = time.monotonic()
+        self.status = status
+        self.retry_after = _retry_after(headers)
+    
+    def _observe_error(self, error: BaseException):
+        if self.status is not None:
+            return
+        # requests.HTTPError carries the response; aiohttp.ClientResponseError carries status and headers itself
+        response = getattr(error, "response", None)
+        status = getattr(response, "status_code", None)
+        if status is None:
+            status = getattr(error, "status", None)
+        self.observe(status if isinstance(status, int) else None,
+                     getattr(response, "headers", None) or getattr(error, "headers", None))
+    
+    def __enter__(self) -> "HostSlot":
+        self.scheduler._acquire(self)
+        return self
+    
+    def __exit__(self, exc_type, exc, traceback):
+        if exc is not None:
+            self._observe_error(exc)
+        self.scheduler._release(self, failed=exc is not None)
+    
+    async def __aenter__(self) -> "HostSlot":
+        await self.scheduler._aacquire(self)
+        return self
+    
+    async def __aexit__(self, exc_type, exc, traceback):
+        if exc is not None:
+            self._observe_error(exc)
+        self.scheduler._release(self, failed=exc is not None)
+
+class AdaptiveHostScheduler:
+    """
+    Per-host concurrency limits that adapt to how each host responds (AIMD).
+    
+    Every host starts at initial_limit concurrent requests. A request that
+    finished while the host was at its limit, with latency (time to the
+    response headers) close to the fastest seen from that host, raises the
+    limit additively (by about one slot per limit's worth of responses).
+    A 429/503 response, or latency drifting to latency_tolerance times the
+    fastest, cuts it multiplicatively, at most once per round trip; 429/503
+    also pause the host for its Retry-After. Fast hosts are therefore used
+    fully while a struggling host is backed off before it starts blocking
+    us. Threads and asyncio tasks share the same limits.
+    """
+    
+    def __init__(self, initial_limit: float = 2.0, min_limit: float = 1.0, max_limit: float = 8.0,
+                 additive_increase: float = 1.0, decrease_factor: float = 0.5, latency_tolerance: float = 2.0,
+                 throttle_pause: float = 1.0, max_pause: float = 60.0, max_hosts: int = 1024):
+        """
+        Initialize the AdaptiveHostScheduler.
+        
+        Args:
+            initial_limit: Concurrent requests allowed to a host not seen before
+            min_limit: Lowest limit a host can be cut to
+            max_limit: Highest limit a host can grow to
+            additive_increase: Slots added per limit's worth of healthy responses
+            decrease_factor: Multiplier applied to the limit on a throttle or latency spike
+            latency_tolerance: Smoothed latency, as a multiple of the host's fastest, treated as overload
+            throttle_pause: Seconds a host is paused after 429/503 without Retry-After
+            max_pause: Upper bound applied to Retry-After pauses
+            max_hosts: Idle hosts beyond this many are forgotten, least recently used first
+        """
+        self.initial_limit = initial_limit
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.additive_increase = additive_increase
+        self.decrease_factor = decrease_factor
+        self.latency_tolerance = latency_tolerance
+        self.throttle_pause = throttle_pause
+        self.max_pause = max_pause
+        self.max_hosts = max_hosts
+        self._hosts: "OrderedDict[str, _HostState]" = OrderedDict()
+        self._condition = threading.Condition()
+    
+    def slot(self, url: str) -> HostSlot:
+        """A request slot for url's host; enter it with `with` or `async with`."""
+        return HostSlot(self, host_key(url))
+    
+    def _state(self, host: str) -> _HostState:
+        state = self._hosts.get(host)
+        if state is None:
+            state = self._hosts[host] = _HostState(self.initial_limit)
+            if len(self._hosts) > self.max_hosts:
+                for name in [name for name, other in self._hosts.items()
+                             if not other.in_flight and not other.waiters][:len(self._hosts) - self.max_hosts]:
+                    del self._hosts[name]
+        self._hosts.move_to_end(host)
+        return state
+    
+    def _try_acquire(self, slot: HostSlot) -> Optional[float]:
+        """Take a slot if the host has one free; otherwise return the seconds to wait (inf: until a release)."""
+        state = self._state(slot.host)
+        now = time.monotonic()
+        if now < state.paused_until:
+            return state.paused_until - now
+        if state.in_flight < max(1, math.floor(state.limit)):
+            state.in_flight += 1
+            state.requests += 1
+            slot.started_at = now
+            return None
+        return math.inf
+    
+    def _acquire(self, slot: HostSlot):
+        requested_at = time.monotonic()
+        with self._condition:
+            while True:
+                wait = self._try_acquire(slot)
+                if wait is None:
+                    self._hosts[slot.host].queued_seconds += slot.started_at - requested_at
+                    return
+                self._condition.wait(None if wait == math.inf else wait)
+    
+    async def _aacquire(self, slot: HostSlot):
+        requested_at = time.monotonic()
+        loop = asyncio.get_running_loop()
+        while True:
+            with self._condition:
+                wait = self._try_acquire(slot)
+                if wait is None:
+                    self._hosts[slot.host].queued_seconds += slot.started_at - requested_at
+                    return
+                woken = loop.create_future()
+                self._hosts[slot.host].waiters.append((loop, woken))
+            try:
+                await asyncio.wait_for(woken, None if wait == math.inf else wait)
+            except asyncio.TimeoutError:
+                pass
+    
+    def _release(self, slot: HostSlot, failed: bool):
+        if slot.started_at is None:
+            return
+        now = time.monotonic()
+        latency = (slot.responded_at if slot.responded_at is not None else now) - slot.started_at
+        with self._condition:
+            state = self._state(slot.host)
+            was_saturated = state.in_flight >= max(1, math.floor(state.limit))
+            state.in_flight -= 1
+            if slot.status in THROTTLE_STATUSES:
+                state.throttled += 1
+                self._decrease(state, now)
+                pause = slot.retry_after if slot.retry_after is not None else self.throttle_pause
+                state.paused_until = max(state.paused_until, now + min(pause, self.max_pause))
+            elif failed:
+                state.errors += 1
+            else:
+                state.latency = latency if state.latency is None else 0.7 * state.latency + 0.3 * latency
+                state.min_latency = latency if state.min_latency is None else min(state.min_latency, latency)
+                if state.latency > self.latency_tolerance * state.min_latency + 0.01:
+                    self._decrease(state, now)
+                elif was_saturated:
+                    state.limit = min(self.max_limit, state.limit + self.additive_increase / state.limit)
+            waiters, state.waiters = state.waiters, []
+            self._condition.notify_all()
+        for loop, woken in waiters:
+            try:
+                loop.call_soon_threadsafe(_wake, woken)
+            except RuntimeError:
+                pass  # The waiter's event loop has closed
+    
+    def _decrease(self, state: _HostState, now: float):
+        """Multiplicative decrease, applied at most once per smoothed round trip so one burst counts once."""
+        if now - state.last_decrease_at < (state.latency or 0.0):
+            return
+        state.limit = max(self.min_limit, state.limit * self.decrease_factor)
+        state.last_decrease_at = now
+    
+    def limit(self, url: str) -> float:
+        """Current concurrency limit for url's host."""
+        with self._condition:
+            return self._state(host_key(url)).limit
+    
+    def stats(self, top: Optional[int] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        Per-host limits and counters, busiest hosts first.
+        
+        Args:
+            top: Only report this many hosts
+        
+        Returns:
+            {host: {"limit", "in_flight", "requests", "throttled", "errors", "queued_seconds",
+            "latency", "min_latency", "paused_for"}}
+        """
+        now = time.monotonic()
+        with self._condition:
+            hosts = sorted(self._hosts.items(), key=lambda item: -item[1].requests)
+            return {host: state.to_dict(now) for host, state in hosts[:top]}
+
+_default_scheduler: Optional[AdaptiveHostScheduler] = None
+_default_scheduler_lock = threading.Lock()
+
+def get_default_host_scheduler() -> AdaptiveHostScheduler:
+    """Return the process-wide AdaptiveHostScheduler shared by scrapers that are not given one explicitly."""
+    global _default_scheduler
+    with _default_scheduler_lock:
+        if _default_scheduler is None:
+            _default_scheduler = AdaptiveHostScheduler()
+        return _default_scheduler
@@ -0,0 +1,173 @@
+# utils/http_client.py
+
+import threading
+import time
+from typing import Dict, Optional, Tuple, Iterable, Any
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.util.retry import Retry
+
+class PoolCounters:
+    """Thread-safe counters of connection checkouts served from the pool (hits) or newly opened (misses)."""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.misses = 0
+    
+    def record_checkout(self):
+        with self._lock:
+            self.checkouts += 1
+    
+    def record_miss(self):
+        with self._lock:
+            self.misses += 1
+    
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.checkouts - self.misses,
+                "misses": self.misses,
+                "checkouts": self.checkouts
+            }
+
+def _counting_pool_class(base, counters: PoolCounters):
+    """Build a urllib3 pool class that reports connection reuse to the given counters."""
+    
+    class CountingConnectionPool(base):
+        def _get_conn(self, timeout=None):
+            counters.record_checkout()
+            return super()._get_conn(timeout=timeout)
+        
+        def _new_conn(self):
+            counters.record_miss()
+            return super()._new_conn()
+    
+    CountingConnectionPool.__name__ = "Counting" + base.__name__
+    return CountingConnectionPool
+
+class _CountingHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter whose per-host pools feed a shared PoolCounters instance."""
+    
+    def __init__(self, counters: PoolCounters, **kwargs):
+        self.counters = counters
+        super().__init__(**kwargs)
+    
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _counting_pool_class(HTTPConnectionPool, self.counters),
+            "https": _counting_pool_class(HTTPSConnectionPool, self.counters)
+        }
+
+class HttpClient:
+    """
+    Shared HTTP transport for the tools.
+    
+    Wraps a requests.Session with keep-alive connection pools per host,
+    default connect/read timeouts and retries with exponential backoff for
+    rate-limited (429) and server error (5xx) responses. Connection errors
+    are retried by urllib3; statuses are retried here, so a caller can
+    narrow them per request (e.g. to see every 429 itself).
+    """
+    
+    def __init__(self, pool_connections: int = 10, pool_maxsize: int = 10,
+                 connect_timeout: float = 5.0, read_timeout: float = 15.0,
+                 max_retries: int = 3, backoff_factor: float = 0.5,
+                 retry_statuses: Iterable[int] = (429, 500, 502, 503, 504),
+                 max_retry_after: float = 30.0, headers: Optional[Dict[str, str]] = None):
+        """
+        Initialize the HttpClient.
+        
+        Args:
+            pool_connections: Number of per-host connection pools to keep
+            pool_maxsize: Maximum number of keep-alive connections per host
+            connect_timeout: Seconds to wait for a connection to be established
+            read_timeout: Seconds to wait for the server to send data
+            max_retries: Maximum number of retries for failed requests
+            backoff_factor: Base delay for exponential backoff between retries
+            retry_statuses: HTTP status codes that trigger a retry
+            max_retry_after: Upper bound applied to Retry-After delays between retries
+            headers: Default headers sent with every request
+        """
+        self.timeout: Tuple[float, float] = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.retry_statuses = frozenset(retry_statuses)
+        self.max_retry_after = max_retry_after
+        self.counters = PoolCounters()
+        self.session = requests.Session()
+        if headers:
+            self.session.headers.update(headers)
+        
+        retry = Retry(
+            total=max_retries,
+            backoff_factor=backoff_factor,
+            allowed_methods=frozenset(["GET", "HEAD"]),
+            # urllib3 would otherwise retry any 429/503 carrying Retry-After itself
+            respect_retry_after_header=False,
+            raise_on_status=False
+        )
+        adapter = _CountingHTTPAdapter(
+            self.counters,
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            max_retries=retry
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+    
+    def get(self, url: str, params: Optional[Dict[str, Any]] = None,
+            headers: Optional[Dict[str, str]] = None, timeout=None,
+            retry_statuses: Optional[Iterable[int]] = None, **kwargs) -> requests.Response:
+        """
+        Send a GET request through the pooled session.
+        
+        Args:
+            url: URL to fetch
+            params: Optional query string parameters
+            headers: Optional per-request headers
+            timeout: Optional timeout overriding the client defaults
+            retry_statuses: HTTP status codes retried for this request instead of the client's
+        
+        Returns:
+            requests.Response object
+        """
+        statuses = self.retry_statuses if retry_statuses is None else frozenset(retry_statuses)
+        attempt = 0
+        while True:
+            response = self.session.get(url, params=params, headers=headers,
+                                        timeout=timeout or self.timeout, **kwargs)
+            if response.status_code not in statuses or attempt >= self.max_retries:
+                return response
+            delay = self._retry_delay(response, attempt)
+            response.close()
+            attempt += 1
+            time.sleep(delay)
+    
+    def _retry_delay(self, response: requests.Response, attempt: int) -> float:
+        """Seconds to wait before the next attempt, honouring Retry-After (up to max_retry_after) when present."""
+        retry_after = response.headers.get("Retry-After")
+        if retry_after and retry_after.isdigit():
+            return min(float(retry_after), self.max_retry_after)
+        return self.backoff_factor * (2 ** attempt)
+    
+    def pool_stats(self) -> Dict[str, int]:
+        """Return connection pool hit/miss counters."""
+        return self.counters.snapshot()
+    
+    def close(self):
+        """Close all pooled connections."""
+        self.session.close()
+
+_default_client: Optional[HttpClient] = None
+_default_client_lock = threading.Lock()
+
+def get_default_client() -> HttpClient:
+    """Return the process-wide HttpClient shared by tools that are not given one explicitly."""
+    global _default_client
+    with _default_client_lock:
+        if _default_client is None:
+            _default_client = HttpClient()
+        return _default_client
@@ -0,0 +1,63 @@
+# utils/keyword_matcher.py
+
+from typing import Any, Dict, Iterable, List, Optional, Set, Union
+
+class KeywordMatcher:
+    """
+    Finds which keywords of a {keyword: label} taxonomy occur in a text.
+    
+    Keywords are matched as substrings (like ``keyword in text``), one
+    C-level scan per keyword. Each keyword may carry a label (e.g. a
+    category); labels are reported in the order of the first keyword that
+    produced them, which preserves the priority order of the taxonomy the
+    matcher was built from.
+    """
+    
+    def __init__(self, keywords: Union[Dict[str, Any], Iterable[str]], case_sensitive: bool = False):
+        """
+        Initialize the KeywordMatcher.
+        
+        Args:
+            keywords: Keywords in priority order, or a {keyword: label} mapping in priority order
+            case_sensitive: Match case exactly instead of lowercasing keywords and text
+        """
+        items = list(keywords.items()) if isinstance(keywords, dict) else [(keyword, keyword) for keyword in keywords]
+        self.case_sensitive = case_sensitive
+        self.keywords: List[str] = []
+        self.labels: List[Any] = []
+        for keyword, label in items:
+            if keyword:
+                self.keywords.append(keyword if case_sensitive else keyword.lower())
+                self.labels.append(label)
+    
+    def _prepare(self, text: str) -> str:
+        return text if self.case_sensitive else text.lower()
+    
+    def matched_indices(self, text: str) -> Set[int]:
+        """Indices of the keywords that occur in text."""
+        text = self._prepare(text)
+        return {index for index, keyword in enumerate(self.keywords) if keyword in text}
+    
+    def matched_keywords(self, text: str) -> List[str]:
+        """Keywords that occur in text, in priority order."""
+        return [self.keywords[index] for index in sorted(self.matched_indices(text))]
+    
+    def matched_labels(self, text: str, limit: Optional[int] = None) -> List[Any]:
+        """
+        Distinct labels of the keywords found in text.
+        
+        Args:
+            text: Text to scan
+            limit: Maximum number of labels to return
+        
+        Returns:
+            Labels ordered by the priority of their first matching keyword
+        """
+        labels: List[Any] = []
+        for index in sorted(self.matched_indices(text)):
+            label = self.labels[index]
+            if label not in labels:
+                labels.append(label)
+                if limit is not None and len(labels) >= limit:
+                    break
+        return labels
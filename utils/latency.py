@@ -0,0 +1,82 @@
+# utils/latency.py
+
+import bisect
+import math
+import threading
+from typing import Dict, List, Optional
+
+def _bucket_bounds(smallest: float, largest: float, growth: float) -> List[float]:
+    bounds = [smallest]
+    while bounds[-1] < largest:
+        bounds.append(bounds[-1] * growth)
+    return bounds
+
+class LatencyHistogram:
+    """
+    Thread-safe histogram of call durations with geometric buckets.
+    
+    Each bucket is `growth` times wider than the previous one, so quantiles
+    are accurate to within that factor from milliseconds to minutes while
+    the histogram stays a fixed, small list of counters however many
+    samples it has seen.
+    """
+    
+    def __init__(self, smallest: float = 0.001, largest: float = 120.0, growth: float = 1.2):
+        """
+        Initialize the LatencyHistogram.
+        
+        Args:
+            smallest: Upper bound in seconds of the first bucket
+            largest: Durations above this land in the last bucket
+            growth: Ratio between consecutive bucket bounds
+        """
+        self.bounds = _bucket_bounds(smallest, largest, growth)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self._lock = threading.Lock()
+    
+    def record(self, seconds: float):
+        index = bisect.bisect_left(self.bounds, seconds)
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.total += seconds
+            self.max = max(self.max, seconds)
+    
+    def quantile(self, q: float) -> Optional[float]:
+        """
+        Estimate a quantile of the recorded durations.
+        
+        Args:
+            q: Quantile between 0 and 1 (e.g. 0.95)
+        
+        Returns:
+            Upper bound of the bucket holding the quantile (capped at the
+            largest duration seen), or None before the first sample
+        """
+        with self._lock:
+            if not self.count:
+                return None
+            rank = max(1, math.ceil(q * self.count))
+            seen = 0
+            for index, count in enumerate(self.counts):
+                seen += count
+                if seen >= rank:
+                    bound = self.bounds[index] if index < len(self.bounds) else self.max
+                    return min(bound, self.max)
+            return self.max
+    
+    def snapshot(self) -> Dict[str, Optional[float]]:
+        """Count, mean, p50/p95/p99 and maximum in seconds."""
+        with self._lock:
+            count, total, largest = self.count, self.total, self.max
+        return {
+            "count": count,
+            "mean": total / count if count else None,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+            "max": largest if count else None
+        }
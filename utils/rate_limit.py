@@ -0,0 +1,96 @@
+# utils/rate_limit.py
+
+import asyncio
+import threading
+import time
+from typing import Dict, Optional
+
+class TokenBucket:
+    """
+    Thread-safe token bucket that hands out reservations instead of blocking.
+    
+    reserve() always succeeds and returns how long the caller must wait before
+    using its token. Reservations may drive the balance negative, so concurrent
+    callers are spaced out one interval apart rather than all waking at once.
+    """
+    
+    def __init__(self, rate: float, capacity: float = 1.0):
+        """
+        Initialize the TokenBucket.
+        
+        Args:
+            rate: Tokens added per second
+            capacity: Maximum number of tokens that can accumulate (burst size)
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def reserve(self, tokens: float = 1.0) -> float:
+        """
+        Take tokens from the bucket.
+        
+        Returns:
+            Seconds to wait before the reserved tokens may be used
+        """
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+            self.updated_at = now
+            self.tokens -= tokens
+            if self.tokens >= 0 or self.rate <= 0:
+                return 0.0
+            return -self.tokens / self.rate
+
+class HostRateLimiter:
+    """One TokenBucket per host, shared by every scrape (threaded or asyncio) in the process."""
+    
+    def __init__(self, default_interval: float = 0.0):
+        """
+        Initialize the HostRateLimiter.
+        
+        Args:
+            default_interval: Minimum seconds between requests to a host with no explicit interval
+        """
+        self.default_interval = default_interval
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+    
+    def set_interval(self, host: str, interval: float):
+        """Set the minimum seconds between requests to a host (e.g. from a robots.txt Crawl-delay)."""
+        with self._lock:
+            if interval <= 0:
+                self._buckets[host] = None
+                return
+            bucket = self._buckets.get(host)
+            if bucket is None or bucket.rate != 1.0 / interval:
+                self._buckets[host] = TokenBucket(rate=1.0 / interval)
+    
+    def reserve(self, host: str) -> float:
+        """Reserve the next request slot for a host and return the seconds to wait for it."""
+        with self._lock:
+            if host not in self._buckets and self.default_interval > 0:
+                self._buckets[host] = TokenBucket(rate=1.0 / self.default_interval)
+            bucket = self._buckets.get(host)
+        return bucket.reserve() if bucket is not None else 0.0
+    
+    def wait(self, host: str) -> float:
+        """Block the calling thread until a request to host is allowed; returns the time slept."""
+        delay = self.reserve(host)
+        if delay > 0:
+            time.sleep(delay)
+        return delay
+    
+    async def await_slot(self, host: str) -> float:
+        """Asynchronous version of wait()."""
+        delay = self.reserve(host)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return delay
+    
+    def interval(self, host: str) -> Optional[float]:
+        with self._lock:
+            bucket = self._buckets.get(host)
+        return 1.0 / bucket.rate if bucket is not None else None
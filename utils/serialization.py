@@ -0,0 +1,56 @@
+# utils/serialization.py
+
+import json
+from typing import Any, Union
+
+try:
+    import orjson
+except ImportError:  # orjson is an optional, faster encoder
+    orjson = None
+
+_ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS if orjson else 0
+
+def _default(value: Any) -> Any:
+    """Encode objects JSON does not know: result models via to_dict(), sets as lists, anything else as str."""
+    to_dict = getattr(value, "to_dict", None)
+    if callable(to_dict):
+        return to_dict()
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    return str(value)
+
+def dumps(value: Any, sort_keys: bool = False) -> bytes:
+    """
+    Serialize a value to compact UTF-8 JSON.
+    
+    This is the one encoding used for caches, stores, worker payloads and
+    HTTP responses. Result models (SearchResult, ScrapedContent,
+    NewsArticle, ...) are encoded through their to_dict().
+    
+    Args:
+        value: Value to serialize
+        sort_keys: Sort object keys, for payloads that are hashed or compared
+    
+    Returns:
+        JSON bytes
+    """
+    if orjson is not None:
+        options = _ORJSON_OPTIONS | (orjson.OPT_SORT_KEYS if sort_keys else 0)
+        try:
+            return orjson.dumps(value, default=_default, option=options)
+        except TypeError:
+            pass  # e.g. integers wider than 64 bits; the standard encoder handles them
+    return json.dumps(value, default=_default, sort_keys=sort_keys, separators=(",", ":"),
+                      ensure_ascii=False).encode("utf-8")
+
+def dumps_text(value: Any, sort_keys: bool = False) -> str:
+    """dumps() as a str, for TEXT columns and text responses."""
+    return dumps(value, sort_keys=sort_keys).decode("utf-8")
+
+def loads(data: Union[bytes, bytearray, memoryview, str]) -> Any:
+    """Parse JSON produced by dumps() (or any other JSON encoder)."""
+    if orjson is not None:
+        return orjson.loads(data)
+    if isinstance(data, memoryview):
+        data = bytes(data)
+    return json.loads(data)
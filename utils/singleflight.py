@@ -0,0 +1,121 @@
+# utils/singleflight.py
+
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+class _Call:
+    """One in-flight execution that callers with the same key wait on."""
+    
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+class SingleFlight:
+    """
+    Coalesces concurrent identical calls into one execution.
+    
+    The first caller for a key runs the function; callers arriving with the
+    same key while it is running wait and receive the same result (or the
+    same exception). Nothing is cached: once the call completes, the next
+    caller starts a new execution. Coalesced callers share the returned
+    object, so it should be treated as read-only.
+    """
+    
+    def __init__(self):
+        self._calls: Dict[Hashable, _Call] = {}
+        self._tasks: Dict[Tuple[int, Hashable], asyncio.Future] = {}
+        self._lock = threading.Lock()
+        self.executions = 0
+        self.coalesced = 0
+    
+    def do(self, key: Hashable, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Run fn(*args, **kwargs), or wait for the identical call already in flight.
+        
+        Args:
+            key: Identity of the call; calls with equal keys must be interchangeable
+            fn: Function to run
+        
+        Returns:
+            The result of the shared execution
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.executions += 1
+            else:
+                self.coalesced += 1
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        
+        try:
+            call.result = fn(*args, **kwargs)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+    
+    async def ado(self, key: Hashable, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Asynchronous version of do() for calls made on the same event loop.
+        
+        The shared work runs as its own task, so cancelling one caller does
+        not cancel it for the others.
+        
+        Args:
+            key: Identity of the call
+            factory: Zero-argument callable returning the awaitable to run
+        
+        Returns:
+            The result of the shared execution
+        """
+        loop = asyncio.get_running_loop()
+        task_key = (id(loop), key)
+        with self._lock:
+            task = self._tasks.get(task_key)
+            if task is not None:
+                self.coalesced += 1
+            else:
+                task = self._tasks[task_key] = asyncio.ensure_future(factory())
+                self.executions += 1
+                task.add_done_callback(lambda _: self._forget(task_key, task))
+        return await asyncio.shield(task)
+    
+    def _forget(self, task_key: Tuple[int, Hashable], task: asyncio.Future):
+        with self._lock:
+            if self._tasks.get(task_key) is task:
+                del self._tasks[task_key]
+        if not task.cancelled():
+            task.exception()  # Mark the exception retrieved even if every caller was cancelled
+    
+    def stats(self) -> Dict[str, int]:
+        """Executions started and calls that joined an execution already in flight."""
+        with self._lock:
+            return {
+                "calls": self.executions + self.coalesced,
+                "executions": self.executions,
+                "coalesced": self.coalesced,
+                "in_flight": len(self._calls) + len(self._tasks)
+            }
+
+_default_singleflight: Optional[SingleFlight] = None
+_default_singleflight_lock = threading.Lock()
+
+def get_default_singleflight() -> SingleFlight:
+    """Return the process-wide SingleFlight shared by tools that are not given one explicitly."""
+    global _default_singleflight
+    with _default_singleflight_lock:
+        if _default_singleflight is None:
+            _default_singleflight = SingleFlight()
+        return _default_singleflight